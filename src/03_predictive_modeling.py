@@ -5,21 +5,18 @@ Hour 5-6: Predictive Modeling
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.ensemble import GradientBoostingClassifier, GradientBoostingRegressor, RandomForestRegressor
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import (classification_report, confusion_matrix, roc_auc_score,
                              roc_curve, mean_squared_error, r2_score, mean_absolute_error)
 import pickle
+from schema import load_artifact, save_artifact
+from report_stage import stage_figure
+from segment_cube import SegmentCube
 import warnings
 warnings.filterwarnings('ignore')
 
-# Set style
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (16, 10)
-
 print("="*80)
 print("AFRIMASH PREDICTIVE MODELING")
 print("="*80)
@@ -29,11 +26,11 @@ print("="*80)
 # ============================================================================
 print("\n📁 STEP 1: LOADING SEGMENTED DATA...")
 try:
-    rfm_df = pd.read_csv('rfm_segmented.csv')
+    rfm_df = load_artifact('rfm_segmented.csv')
     print(f"✓ Loaded {len(rfm_df):,} customers with segments")
 except FileNotFoundError:
     # Fallback to clean data if segmented doesn't exist
-    rfm_df = pd.read_csv('rfm_clean.csv')
+    rfm_df = load_artifact('rfm_clean.csv')
     print(f"✓ Loaded {len(rfm_df):,} customers (clean data)")
 
 # ============================================================================
@@ -323,9 +320,16 @@ print(rfm_df['Customer_Priority'].value_counts())
 print("\n💾 STEP 6: SAVING PREDICTIONS...")
 
 # Save complete dataset with all predictions
-rfm_df.to_csv('rfm_with_predictions.csv', index=False)
+save_artifact(rfm_df, 'rfm_with_predictions.csv')
 print(f"✓ Saved rfm_with_predictions.csv ({len(rfm_df):,} customers)")
 
+# Pre-aggregated segment cube: dashboards slice and roll this up instead of
+# grouping customer rows (segment_cube.py)
+segment_cube = SegmentCube.build(rfm_df)
+segment_cube_path = segment_cube.save()
+print(f"✓ Saved {segment_cube_path} ({len(segment_cube.cells):,} cells over "
+      f"{len(segment_cube.dimensions)} dimensions)")
+
 # Save high-risk customers
 high_risk = rfm_df[
     (rfm_df['Churn_Risk_Level'].isin(['High', 'Critical'])) &
@@ -334,7 +338,7 @@ high_risk = rfm_df[
 
 high_risk_export = high_risk[['Customer_ID', 'RFM_Segment', 'Monetary', 'Predicted_CLV',
                                'Churn_Probability', 'Churn_Risk_Level', 'Customer_Priority']]
-high_risk_export.to_csv('high_risk_customers.csv', index=False)
+save_artifact(high_risk_export, 'high_risk_customers.csv')
 print(f"✓ Saved high_risk_customers.csv ({len(high_risk):,} customers)")
 
 # Save high-value opportunities
@@ -344,7 +348,7 @@ high_value = rfm_df[
 
 high_value_export = high_value[['Customer_ID', 'RFM_Segment', 'Monetary', 'Predicted_CLV',
                                  'Churn_Probability', 'CLV_Category']]
-high_value_export.to_csv('high_value_opportunities.csv', index=False)
+save_artifact(high_value_export, 'high_value_opportunities.csv')
 print(f"✓ Saved high_value_opportunities.csv ({len(high_value):,} customers)")
 
 # Save action priority list
@@ -353,7 +357,7 @@ action_priority_export = action_priority[['Customer_ID', 'RFM_Segment', 'Monetar
                                           'Predicted_CLV', 'Churn_Probability',
                                           'Purchase_Timing_Status', 'Customer_Priority',
                                           'Customer_Value_Score']]
-action_priority_export.to_csv('action_priority_list.csv', index=False)
+save_artifact(action_priority_export, 'action_priority_list.csv')
 print(f"✓ Saved action_priority_list.csv ({len(action_priority):,} customers)")
 
 # Save model summary
@@ -388,228 +392,46 @@ print(f"✓ Saved prediction_impact_summary.csv")
 # ============================================================================
 # 7. VISUALIZATIONS
 # ============================================================================
-print("\n📊 STEP 7: CREATING VISUALIZATIONS...")
-
-# Churn Prediction Analysis
-fig, axes = plt.subplots(2, 3, figsize=(20, 12))
-fig.suptitle('CHURN PREDICTION ANALYSIS', fontsize=20, fontweight='bold')
-
-# 7.1 Churn Distribution
-ax = axes[0, 0]
-churn_dist = rfm_df['Is_Churned'].value_counts()
-colors = ['#28a745', '#dc3545']
-ax.pie(churn_dist.values, labels=['Active', 'Churned'], autopct='%1.1f%%',
-       colors=colors, startangle=90)
-ax.set_title('Churn Distribution', fontsize=14, fontweight='bold')
-
-# 7.2 ROC Curve
-ax = axes[0, 1]
+print("\n📊 STEP 7: STAGING VISUALIZATIONS...")
+
+# Figures are drawn by report_stage.py; only their inputs are saved here
 fpr, tpr, _ = roc_curve(y_test_churn, y_pred_proba_churn)
-ax.plot(fpr, tpr, color='darkorange', lw=2, label=f'ROC curve (AUC = {auc_roc:.3f})')
-ax.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--', label='Random')
-ax.set_xlabel('False Positive Rate')
-ax.set_ylabel('True Positive Rate')
-ax.set_title('ROC Curve - Churn Prediction', fontsize=14, fontweight='bold')
-ax.legend()
-ax.grid(True, alpha=0.3)
-
-# 7.3 Feature Importance - Churn
-ax = axes[0, 2]
 feature_importance_churn = pd.DataFrame({
     'Feature': churn_features,
     'Importance': churn_model.feature_importances_
 }).sort_values('Importance', ascending=False).head(10)
 
-ax.barh(range(len(feature_importance_churn)), feature_importance_churn['Importance'])
-ax.set_yticks(range(len(feature_importance_churn)))
-ax.set_yticklabels(feature_importance_churn['Feature'])
-ax.set_xlabel('Importance')
-ax.set_title('Top 10 Features - Churn Prediction', fontsize=14, fontweight='bold')
-ax.invert_yaxis()
-
-# 7.4 Churn Risk Distribution
-ax = axes[1, 0]
-risk_counts = rfm_df['Churn_Risk_Level'].value_counts()
-risk_order = ['Low', 'Medium', 'High', 'Critical']
-risk_counts = risk_counts.reindex(risk_order, fill_value=0)
-risk_colors = {'Low': '#28a745', 'Medium': '#ffc107', 'High': '#fd7e14', 'Critical': '#dc3545'}
-colors = [risk_colors[x] for x in risk_order]
-ax.bar(risk_order, risk_counts.values, color=colors)
-ax.set_title('Churn Risk Level Distribution', fontsize=14, fontweight='bold')
-ax.set_ylabel('Number of Customers')
-for i, v in enumerate(risk_counts.values):
-    ax.text(i, v, f'{v:,}', ha='center', va='bottom')
-
-# 7.5 Churn Probability Distribution
-ax = axes[1, 1]
-ax.hist(rfm_df['Churn_Probability'], bins=50, color='steelblue', edgecolor='black', alpha=0.7)
-ax.axvline(0.5, color='red', linestyle='--', linewidth=2, label='50% Threshold')
-ax.set_xlabel('Churn Probability')
-ax.set_ylabel('Number of Customers')
-ax.set_title('Churn Probability Distribution', fontsize=14, fontweight='bold')
-ax.legend()
-
-# 7.6 Confusion Matrix
-ax = axes[1, 2]
-cm = confusion_matrix(y_test_churn, y_pred_churn)
-sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', ax=ax, cbar=False)
-ax.set_xlabel('Predicted')
-ax.set_ylabel('Actual')
-ax.set_title('Confusion Matrix', fontsize=14, fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('churn_prediction_analysis.png', dpi=300, bbox_inches='tight')
-print("✓ Saved churn_prediction_analysis.png")
-
-# CLV Prediction Analysis
-fig, axes = plt.subplots(2, 3, figsize=(20, 12))
-fig.suptitle('CLV PREDICTION ANALYSIS', fontsize=20, fontweight='bold')
-
-# 7.7 CLV Category Distribution
-ax = axes[0, 0]
-clv_counts = rfm_df['CLV_Category'].value_counts()
-colors = plt.cm.RdYlGn(np.linspace(0.2, 0.8, len(clv_counts)))
-clv_counts.plot(kind='bar', ax=ax, color=colors)
-ax.set_title('CLV Category Distribution', fontsize=14, fontweight='bold')
-ax.set_ylabel('Number of Customers')
-ax.set_xlabel('CLV Category')
-plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
-for i, v in enumerate(clv_counts.values):
-    ax.text(i, v, f'{v:,}', ha='center', va='bottom')
-
-# 7.8 Actual vs Predicted CLV
-ax = axes[0, 1]
-sample_indices = np.random.choice(len(y_test_clv), min(1000, len(y_test_clv)), replace=False)
-ax.scatter(y_test_clv.iloc[sample_indices], y_pred_clv[sample_indices],
-           alpha=0.5, s=20, color='steelblue')
-ax.plot([y_test_clv.min(), y_test_clv.max()],
-        [y_test_clv.min(), y_test_clv.max()],
-        'r--', lw=2, label='Perfect Prediction')
-ax.set_xlabel('Actual CLV (₵)')
-ax.set_ylabel('Predicted CLV (₵)')
-ax.set_title(f'Actual vs Predicted CLV (R² = {r2:.3f})', fontsize=14, fontweight='bold')
-ax.legend()
-ax.set_xscale('log')
-ax.set_yscale('log')
-ax.grid(True, alpha=0.3)
-
-# 7.9 Feature Importance - CLV
-ax = axes[0, 2]
+stage_figure('churn_prediction_analysis', 'churn_prediction_analysis.png', {
+    'rfm': rfm_df[['Is_Churned', 'Churn_Risk_Level', 'Churn_Probability']],
+    'fpr': fpr,
+    'tpr': tpr,
+    'auc_roc': auc_roc,
+    'feature_importance': feature_importance_churn,
+    'confusion_matrix': confusion_matrix(y_test_churn, y_pred_churn),
+})
+print("✓ Staged churn_prediction_analysis.png")
+
 feature_importance_clv = pd.DataFrame({
     'Feature': clv_features,
     'Importance': clv_model.feature_importances_
 }).sort_values('Importance', ascending=False).head(10)
 
-ax.barh(range(len(feature_importance_clv)), feature_importance_clv['Importance'], color='green', alpha=0.7)
-ax.set_yticks(range(len(feature_importance_clv)))
-ax.set_yticklabels(feature_importance_clv['Feature'])
-ax.set_xlabel('Importance')
-ax.set_title('Top 10 Features - CLV Prediction', fontsize=14, fontweight='bold')
-ax.invert_yaxis()
-
-# 7.10 CLV Distribution
-ax = axes[1, 0]
-ax.hist(rfm_df['Predicted_CLV'], bins=50, color='green', edgecolor='black', alpha=0.7)
-ax.set_xlabel('Predicted CLV (₵)')
-ax.set_ylabel('Number of Customers')
-ax.set_title('Predicted CLV Distribution', fontsize=14, fontweight='bold')
-ax.set_xscale('log')
-ax.axvline(rfm_df['Predicted_CLV'].median(), color='red', linestyle='--',
-           linewidth=2, label=f'Median: ₵{rfm_df["Predicted_CLV"].median()/1e6:.2f}M')
-ax.legend()
-
-# 7.11 CLV vs Churn Matrix
-ax = axes[1, 1]
-scatter = ax.scatter(rfm_df['Churn_Probability'], rfm_df['Predicted_CLV'],
-                     c=rfm_df['Customer_Value_Score'], cmap='RdYlGn_r',
-                     alpha=0.6, s=30)
-ax.set_xlabel('Churn Probability')
-ax.set_ylabel('Predicted CLV (₵)')
-ax.set_title('CLV vs Churn Risk Matrix', fontsize=14, fontweight='bold')
-ax.set_yscale('log')
-ax.axvline(0.5, color='red', linestyle='--', linewidth=1, alpha=0.5)
-ax.axhline(rfm_df['Predicted_CLV'].median(), color='blue', linestyle='--', linewidth=1, alpha=0.5)
-plt.colorbar(scatter, ax=ax, label='Priority Score')
-ax.grid(True, alpha=0.3)
-
-# 7.12 Purchase Timing Status
-ax = axes[1, 2]
-timing_counts = rfm_df['Purchase_Timing_Status'].value_counts()
-colors = plt.cm.Spectral(np.linspace(0, 1, len(timing_counts)))
-timing_counts.plot(kind='barh', ax=ax, color=colors)
-ax.set_title('Purchase Timing Status', fontsize=14, fontweight='bold')
-ax.set_xlabel('Number of Customers')
-for i, v in enumerate(timing_counts.values):
-    ax.text(v, i, f' {v:,}', va='center')
-
-plt.tight_layout()
-plt.savefig('clv_prediction_analysis.png', dpi=300, bbox_inches='tight')
-print("✓ Saved clv_prediction_analysis.png")
-
-# Customer Priority Matrix
-fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-fig.suptitle('CUSTOMER PRIORITY MATRIX', fontsize=18, fontweight='bold')
-
-# Priority Distribution
-ax = axes[0, 0]
-priority_counts = rfm_df['Customer_Priority'].value_counts()
-colors = {'CRITICAL': '#dc3545', 'High': '#fd7e14', 'Medium': '#ffc107', 'Low': '#28a745'}
-priority_colors = [colors.get(p, '#6c757d') for p in priority_counts.index]
-priority_counts.plot(kind='bar', ax=ax, color=priority_colors)
-ax.set_title('Customer Priority Distribution', fontsize=14, fontweight='bold')
-ax.set_ylabel('Number of Customers')
-plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
-for i, v in enumerate(priority_counts.values):
-    ax.text(i, v, f'{v:,}', ha='center', va='bottom')
-
-# Priority by Revenue
-ax = axes[0, 1]
-priority_revenue = rfm_df.groupby('Customer_Priority')['Monetary'].sum() / 1e9
-priority_revenue.plot(kind='bar', ax=ax, color=priority_colors)
-ax.set_title('Total Revenue by Priority (₵ Billions)', fontsize=14, fontweight='bold')
-ax.set_ylabel('Revenue (₵B)')
-plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
-for i, v in enumerate(priority_revenue.values):
-    ax.text(i, v, f'₵{v:.2f}B', ha='center', va='bottom')
-
-# Top 20 High Priority Customers
-ax = axes[1, 0]
-top_priority = rfm_df.nlargest(20, 'Customer_Value_Score')[['Customer_ID', 'Customer_Value_Score']]
-ax.barh(range(len(top_priority)), top_priority['Customer_Value_Score'], color='darkred', alpha=0.7)
-ax.set_yticks(range(len(top_priority)))
-ax.set_yticklabels(top_priority['Customer_ID'].values)
-ax.set_xlabel('Priority Score')
-ax.set_title('Top 20 Highest Priority Customers', fontsize=14, fontweight='bold')
-ax.invert_yaxis()
-
-# Quadrant Analysis
-ax = axes[1, 1]
-high_clv_threshold = rfm_df['Predicted_CLV'].quantile(0.75)
-high_churn_threshold = 0.5
-
-for priority in rfm_df['Customer_Priority'].unique():
-    subset = rfm_df[rfm_df['Customer_Priority'] == priority]
-    ax.scatter(subset['Churn_Probability'], subset['Predicted_CLV'],
-               label=priority, alpha=0.6, s=30)
-
-ax.axvline(high_churn_threshold, color='red', linestyle='--', linewidth=1, alpha=0.5)
-ax.axhline(high_clv_threshold, color='blue', linestyle='--', linewidth=1, alpha=0.5)
-ax.set_xlabel('Churn Probability')
-ax.set_ylabel('Predicted CLV (₵)')
-ax.set_title('Customer Segmentation Quadrant', fontsize=14, fontweight='bold')
-ax.set_yscale('log')
-ax.legend(fontsize=8)
-ax.grid(True, alpha=0.3)
-
-# Add quadrant labels
-ax.text(0.25, high_clv_threshold*2, 'Protect\n(High Value, Low Churn)',
-        ha='center', va='center', fontsize=10, bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.5))
-ax.text(0.75, high_clv_threshold*2, 'CRITICAL\n(High Value, High Churn)',
-        ha='center', va='center', fontsize=10, bbox=dict(boxstyle='round', facecolor='lightcoral', alpha=0.5))
-
-plt.tight_layout()
-plt.savefig('customer_priority_matrix.png', dpi=300, bbox_inches='tight')
-print("✓ Saved customer_priority_matrix.png")
+stage_figure('clv_prediction_analysis', 'clv_prediction_analysis.png', {
+    'rfm': rfm_df[['CLV_Category', 'Predicted_CLV', 'Churn_Probability',
+                   'Customer_Value_Score', 'Purchase_Timing_Status']],
+    'y_test': y_test_clv.to_numpy(),
+    'y_pred': y_pred_clv,
+    'r2': r2,
+    'feature_importance': feature_importance_clv,
+})
+print("✓ Staged clv_prediction_analysis.png")
+
+stage_figure('customer_priority_matrix', 'customer_priority_matrix.png', {
+    'rfm': rfm_df[['Customer_Priority', 'Monetary', 'Customer_Value_Score', 'Customer_ID',
+                   'Predicted_CLV', 'Churn_Probability']],
+})
+print("✓ Staged customer_priority_matrix.png")
+print("  Render with: python report_stage.py")
 
 # ============================================================================
 # 8. MODEL PERFORMANCE SUMMARY
@@ -658,3 +480,4 @@ print("  8. clv_model.pkl - Trained CLV model")
 print("  9. churn_prediction_analysis.png - Churn visualizations")
 print("  10. clv_prediction_analysis.png - CLV visualizations")
 print("  11. customer_priority_matrix.png - Priority matrix")
+print("  12. ../data/processed/segment_cube.csv - Pre-aggregated segment measures for the dashboards")
@@ -5,17 +5,13 @@ Hour 7: Product Recommendation Engine
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from collections import defaultdict
 from itertools import combinations
+from schema import load_artifact, save_artifact
+from report_stage import stage_figure
 import warnings
 warnings.filterwarnings('ignore')
 
-# Set style
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (16, 10)
-
 print("="*80)
 print("AFRIMASH PRODUCT RECOMMENDATION ENGINE")
 print("="*80)
@@ -24,8 +20,9 @@ print("="*80)
 # 1. LOAD DATA
 # ============================================================================
 print("\n📁 STEP 1: LOADING DATA...")
-rfm_df = pd.read_csv('rfm_with_predictions.csv')
-trans_df = pd.read_csv('transactions_clean.csv')
+rfm_df = load_artifact('rfm_with_predictions.csv')
+# Only the transaction count is reported; project a single column
+trans_df = load_artifact('transactions_clean.csv', columns=['Order #'])
 
 print(f"✓ Loaded {len(rfm_df):,} customers")
 print(f"✓ Loaded {len(trans_df):,} transactions")
@@ -192,7 +189,7 @@ if len(association_rules) > 0:
     print(association_rules.head()[['Antecedent', 'Consequent', 'Confidence', 'Lift']])
 
 # Save association rules
-association_rules.to_csv('product_association_rules.csv', index=False)
+save_artifact(association_rules, 'product_association_rules.csv')
 print(f"\n✓ Saved product_association_rules.csv")
 
 def recommend_products_association(customer_id, customer_product_matrix, association_rules, top_n=5):
@@ -305,7 +302,7 @@ recommendations_df = pd.DataFrame(all_recommendations)
 print(f"\n✓ Generated {len(recommendations_df):,} recommendations")
 
 # Save recommendations
-recommendations_df.to_csv('product_recommendations.csv', index=False)
+save_artifact(recommendations_df, 'product_recommendations.csv')
 print(f"✓ Saved product_recommendations.csv")
 
 # ============================================================================
@@ -348,7 +345,7 @@ print(f"✓ Identified {len(cross_sell_df):,} cross-sell opportunities")
 print(f"  Potential Revenue: ₵{cross_sell_df['Potential_Value'].sum()/1e9:.2f}B")
 
 # Save cross-sell opportunities
-cross_sell_df.to_csv('cross_sell_opportunities.csv', index=False)
+save_artifact(cross_sell_df, 'cross_sell_opportunities.csv')
 print(f"✓ Saved cross_sell_opportunities.csv")
 
 # ============================================================================
@@ -377,150 +374,28 @@ print(f"✓ Saved recommendation_summary.csv")
 # Top recommendations per customer
 top_recs_per_customer = recommendations_df.sort_values(['Customer_ID', 'Confidence'], ascending=[True, False])
 top_3_per_customer = top_recs_per_customer.groupby('Customer_ID').head(3)
-top_3_per_customer.to_csv('top_recommendations_per_customer.csv', index=False)
+save_artifact(top_3_per_customer, 'top_recommendations_per_customer.csv')
 print(f"✓ Saved top_recommendations_per_customer.csv")
 
 # ============================================================================
 # 9. VISUALIZATIONS
 # ============================================================================
-print("\n📊 STEP 9: CREATING VISUALIZATIONS...")
-
-fig, axes = plt.subplots(2, 3, figsize=(20, 12))
-fig.suptitle('PRODUCT RECOMMENDATION ANALYSIS', fontsize=20, fontweight='bold')
-
-# 9.1 Top Recommended Categories
-ax = axes[0, 0]
-if len(recommendations_df) > 0:
-    top_categories = recommendations_df['Recommended_Category'].value_counts().head(10)
-    colors = plt.cm.Set3(range(len(top_categories)))
-    top_categories.plot(kind='barh', ax=ax, color=colors)
-    ax.set_title('Top 10 Recommended Categories', fontsize=14, fontweight='bold')
-    ax.set_xlabel('Number of Recommendations')
-    for i, v in enumerate(top_categories.values):
-        ax.text(v, i, f' {v:,}', va='center')
-
-# 9.2 Recommendation Method Distribution
-ax = axes[0, 1]
-if len(recommendations_df) > 0:
-    method_dist = recommendations_df['Reason'].value_counts()
-    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1']
-    ax.pie(method_dist.values, labels=method_dist.index, autopct='%1.1f%%',
-           colors=colors[:len(method_dist)], startangle=90)
-    ax.set_title('Recommendation Method Distribution', fontsize=14, fontweight='bold')
-
-# 9.3 Confidence Distribution
-ax = axes[0, 2]
-if len(recommendations_df) > 0:
-    ax.hist(recommendations_df['Confidence'], bins=30, color='steelblue', edgecolor='black', alpha=0.7)
-    ax.axvline(0.7, color='red', linestyle='--', linewidth=2, label='High Confidence (0.7)')
-    ax.set_xlabel('Confidence Score')
-    ax.set_ylabel('Number of Recommendations')
-    ax.set_title('Recommendation Confidence Distribution', fontsize=14, fontweight='bold')
-    ax.legend()
-
-# 9.4 Association Rules - Top Pairs
-ax = axes[1, 0]
-if len(association_rules) > 0:
-    top_rules = association_rules.nlargest(10, 'Lift')
-    rule_labels = [f"{row['Antecedent']}\n→ {row['Consequent']}" for _, row in top_rules.iterrows()]
-    y_pos = range(len(rule_labels))
-    ax.barh(y_pos, top_rules['Lift'].values, color='green', alpha=0.7)
-    ax.set_yticks(y_pos)
-    ax.set_yticklabels(rule_labels, fontsize=9)
-    ax.set_xlabel('Lift')
-    ax.set_title('Top 10 Product Associations (by Lift)', fontsize=14, fontweight='bold')
-    ax.invert_yaxis()
-
-# 9.5 Cross-sell Potential by Segment
-ax = axes[1, 1]
-if len(cross_sell_df) > 0 and 'RFM_Segment' in cross_sell_df.columns:
-    segment_potential = cross_sell_df.groupby('RFM_Segment')['Potential_Value'].sum() / 1e9
-    segment_potential = segment_potential.sort_values(ascending=False)
-    colors = plt.cm.Pastel1(range(len(segment_potential)))
-    segment_potential.plot(kind='bar', ax=ax, color=colors)
-    ax.set_title('Cross-sell Potential by Segment (₵B)', fontsize=14, fontweight='bold')
-    ax.set_ylabel('Potential Revenue (₵B)')
-    ax.set_xlabel('Segment')
-    plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
-    for i, v in enumerate(segment_potential.values):
-        ax.text(i, v, f'₵{v:.2f}B', ha='center', va='bottom')
-
-# 9.6 Recommendations by Customer CLV
-ax = axes[1, 2]
-if len(recommendations_df) > 0:
-    # Merge with customer CLV
-    recs_with_clv = recommendations_df.merge(
-        rfm_df[['Customer_ID', 'Predicted_CLV', 'CLV_Category']],
-        on='Customer_ID',
-        how='left'
-    )
-
-    if 'CLV_Category' in recs_with_clv.columns:
-        clv_recs = recs_with_clv['CLV_Category'].value_counts()
-        colors = plt.cm.RdYlGn(np.linspace(0.2, 0.8, len(clv_recs)))
-        clv_recs.plot(kind='bar', ax=ax, color=colors)
-        ax.set_title('Recommendations by Customer CLV Category', fontsize=14, fontweight='bold')
-        ax.set_ylabel('Number of Recommendations')
-        ax.set_xlabel('CLV Category')
-        plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
-
-plt.tight_layout()
-plt.savefig('recommendation_analysis.png', dpi=300, bbox_inches='tight')
-print("✓ Saved recommendation_analysis.png")
-
-# Cross-sell Opportunities Visualization
-fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-fig.suptitle('CROSS-SELL OPPORTUNITIES ANALYSIS', fontsize=18, fontweight='bold')
-
-# Top Cross-sell Opportunities
-ax = axes[0, 0]
-if len(cross_sell_df) > 0:
-    top_cross_sell = cross_sell_df.nlargest(20, 'Potential_Value')
-    ax.barh(range(len(top_cross_sell)), top_cross_sell['Potential_Value']/1e6, color='darkgreen', alpha=0.7)
-    ax.set_yticks(range(len(top_cross_sell)))
-    ax.set_yticklabels(top_cross_sell['Customer_ID'].values, fontsize=8)
-    ax.set_xlabel('Potential Value (₵M)')
-    ax.set_title('Top 20 Cross-sell Opportunities', fontsize=14, fontweight='bold')
-    ax.invert_yaxis()
-
-# Cross-sell by Current Categories
-ax = axes[0, 1]
-if len(cross_sell_df) > 0:
-    category_dist = cross_sell_df['Current_Categories'].value_counts().sort_index()
-    ax.bar(category_dist.index, category_dist.values, color='teal', alpha=0.7)
-    ax.set_xlabel('Number of Current Categories')
-    ax.set_ylabel('Number of Customers')
-    ax.set_title('Cross-sell Customers by Current Category Count', fontsize=14, fontweight='bold')
-    for i, v in enumerate(category_dist.values):
-        ax.text(category_dist.index[i], v, f'{v:,}', ha='center', va='bottom')
-
-# Recommended Categories for Cross-sell
-ax = axes[1, 0]
-if len(cross_sell_df) > 0:
-    rec_categories = cross_sell_df['Recommended_Category'].value_counts().head(10)
-    colors = plt.cm.Paired(range(len(rec_categories)))
-    rec_categories.plot(kind='barh', ax=ax, color=colors)
-    ax.set_title('Top Categories for Cross-sell', fontsize=14, fontweight='bold')
-    ax.set_xlabel('Number of Opportunities')
-    for i, v in enumerate(rec_categories.values):
-        ax.text(v, i, f' {v:,}', va='center')
-
-# CLV vs Cross-sell Confidence
-ax = axes[1, 1]
-if len(cross_sell_df) > 0:
-    scatter = ax.scatter(cross_sell_df['Confidence'], cross_sell_df['Predicted_CLV'],
-                        c=cross_sell_df['Potential_Value'], cmap='viridis',
-                        alpha=0.6, s=50)
-    ax.set_xlabel('Recommendation Confidence')
-    ax.set_ylabel('Predicted CLV (₵)')
-    ax.set_title('CLV vs Recommendation Confidence', fontsize=14, fontweight='bold')
-    ax.set_yscale('log')
-    plt.colorbar(scatter, ax=ax, label='Potential Value (₵)')
-    ax.grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('cross_sell_opportunities.png', dpi=300, bbox_inches='tight')
-print("✓ Saved cross_sell_opportunities.png")
+print("\n📊 STEP 9: STAGING VISUALIZATIONS...")
+
+# Figures are drawn by report_stage.py; only their inputs are saved here
+stage_figure('recommendation_analysis', 'recommendation_analysis.png', {
+    'recommendations': recommendations_df,
+    'association_rules': association_rules,
+    'cross_sell': cross_sell_df,
+    'rfm': rfm_df[['Customer_ID', 'Predicted_CLV', 'CLV_Category']],
+})
+print("✓ Staged recommendation_analysis.png")
+
+stage_figure('cross_sell_opportunities', 'cross_sell_opportunities.png', {
+    'cross_sell': cross_sell_df,
+})
+print("✓ Staged cross_sell_opportunities.png")
+print("  Render with: python report_stage.py")
 
 # ============================================================================
 # 10. KEY INSIGHTS
@@ -0,0 +1,173 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Embedded analytical store for the processed artifacts
+
+Every artifact in data/processed is published into one SQLite file with
+indexes on Customer_ID, Date_Key and the segment columns. Dashboards and the
+API ask for the columns and rows they need (a customer, a date range, a few
+segments) and SQLite answers from the indexes instead of re-reading whole
+CSVs. A table is republished automatically when its file changed on disk, so
+the pipeline keeps writing artifacts through save_artifact.
+
+Usage (from src/):
+    python analytics_store.py          # publish/refresh every artifact
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from date_dimension import DATE_KEY, to_date_key
+from schema import (ARTIFACTS, CUSTOMER_KEY, DATE_COLUMNS, PROCESSED_DIR, artifact_source,
+                    customer_keys, enforce_schema, load_artifact)
+
+STORE_PATH = os.path.join(PROCESSED_DIR, 'afrimash.db')
+
+# Columns that get an index wherever a table has them
+INDEXED_COLUMNS = ['Customer_ID', DATE_KEY, 'RFM_Segment', 'Cluster_Name', 'Churn_Risk_Level',
+                   'CLV_Category', 'Customer_Priority', 'Product_Category']
+
+# Bookkeeping table: which file version each table was published from
+META_TABLE = '_artifacts'
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _connect(store_path):
+    conn = sqlite3.connect(store_path)
+    conn.execute(f'CREATE TABLE IF NOT EXISTS {META_TABLE} '
+                 '(name TEXT PRIMARY KEY, mtime REAL, size INTEGER, rows INTEGER)')
+    return conn
+
+
+def _source_version(path):
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+
+
+def _table_columns(conn, name):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({_quote(name)})')]
+
+
+def publish_frame(conn, name, df):
+    """Replace table `name` with df and index its lookup columns"""
+    df = df.drop(columns=[CUSTOMER_KEY], errors='ignore').copy()
+    for col in df.select_dtypes('category').columns:
+        df[col] = df[col].astype(object).where(df[col].notna(), None)
+    df.to_sql(name, conn, if_exists='replace', index=False, chunksize=50_000)
+    for col in INDEXED_COLUMNS:
+        if col in df.columns:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {_quote(f"idx_{name}_{col}")} '
+                         f'ON {_quote(name)} ({_quote(col)})')
+    return len(df)
+
+
+def publish(names=None, processed_dir=PROCESSED_DIR, store_path=None, force=False):
+    """
+    Publish artifacts into the store.
+
+    Only tables whose source file changed since the last publish are rewritten
+    (unless force=True). Returns a summary row per artifact.
+    """
+    store_path = store_path or os.path.join(processed_dir, os.path.basename(STORE_PATH))
+    names = list(ARTIFACTS) if names is None else [names] if isinstance(names, str) else names
+    rows = []
+    with closing(_connect(store_path)) as conn, conn:
+        published = {row[0]: row[1:] for row in conn.execute(f'SELECT name, mtime, size, rows FROM {META_TABLE}')}
+        for name in names:
+            # Whichever of the CSV / Feather copy is current
+            path = artifact_source(name, processed_dir)
+            if not os.path.exists(path):
+                continue
+            mtime, size = _source_version(path)
+            if not force and name in published and published[name][:2] == (mtime, size):
+                rows.append({'Table': name, 'Rows': published[name][2], 'Status': 'current'})
+                continue
+            n = publish_frame(conn, name, load_artifact(path))
+            conn.execute(f'INSERT OR REPLACE INTO {META_TABLE} VALUES (?, ?, ?, ?)', (name, mtime, size, n))
+            rows.append({'Table': name, 'Rows': n, 'Status': 'published'})
+    return pd.DataFrame(rows, columns=['Table', 'Rows', 'Status'])
+
+
+def _as_list(values):
+    if isinstance(values, (str, bytes)) or np.isscalar(values):
+        return [values]
+    return list(values)
+
+
+def query_table(name, columns=None, exclude=None, customer_ids=None, date_range=None,
+                where=None, customer_key=False, processed_dir=PROCESSED_DIR, store_path=None):
+    """
+    Read rows/columns of an artifact from the store with the shared schema applied.
+
+    ``customer_ids`` and ``where`` ({column: value or list of values}) become
+    indexed equality/IN filters, and ``date_range`` is an inclusive
+    (start, end) on Date_Key that accepts dates or YYYYMMDD keys.
+    """
+    store_path = store_path or os.path.join(processed_dir, os.path.basename(STORE_PATH))
+    publish(name, processed_dir, store_path)
+
+    with closing(sqlite3.connect(store_path)) as conn:
+        available = _table_columns(conn, name)
+        if not available:
+            raise FileNotFoundError(f"Artifact '{name}' has not been published")
+        selected = [col for col in available if (columns is None or col in columns)
+                    and (exclude is None or col not in exclude)]
+
+        clauses, params = [], []
+        filters = dict(where or {})
+        if customer_ids is not None:
+            filters['Customer_ID'] = customer_ids
+        for col, values in filters.items():
+            values = _as_list(values)
+            clauses.append(f'{_quote(col)} IN ({", ".join("?" * len(values))})')
+            params.extend(v.item() if isinstance(v, np.generic) else v for v in values)
+        if date_range is not None:
+            start, end = (to_date_key(value) for value in date_range)
+            if start is not None:
+                clauses.append(f'{_quote(DATE_KEY)} >= ?')
+                params.append(start)
+            if end is not None:
+                clauses.append(f'{_quote(DATE_KEY)} <= ?')
+                params.append(end)
+
+        sql = f'SELECT {", ".join(map(_quote, selected))} FROM {_quote(name)}'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        df = pd.read_sql_query(sql, conn, params=params)
+
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    df = enforce_schema(df)
+    if customer_key and 'Customer_ID' in df.columns:
+        df[CUSTOMER_KEY] = customer_keys(df['Customer_ID'])
+    return df
+
+
+def customer_profile(customer_id, tables=('rfm_with_predictions', 'product_recommendations'),
+                     processed_dir=PROCESSED_DIR, store_path=None):
+    """Indexed lookup of one customer's rows in each of the given tables"""
+    return {name: query_table(name, customer_ids=customer_id, processed_dir=processed_dir,
+                              store_path=store_path)
+            for name in tables}
+
+
+def explain(name, column, processed_dir=PROCESSED_DIR, store_path=None):
+    """SQLite's plan for an equality lookup on column (shows which index is used)"""
+    store_path = store_path or os.path.join(processed_dir, os.path.basename(STORE_PATH))
+    with closing(sqlite3.connect(store_path)) as conn:
+        plan = conn.execute(f'EXPLAIN QUERY PLAN SELECT * FROM {_quote(name)} WHERE {_quote(column)} = ?',
+                            (0,)).fetchall()
+    return ' | '.join(row[-1] for row in plan)
+
+
+if __name__ == '__main__':
+    directory = sys.argv[1] if len(sys.argv) > 1 else PROCESSED_DIR
+    print(publish(processed_dir=directory).to_string(index=False))
@@ -0,0 +1,181 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Shopping-session basket builder
+
+Farmers often split one production cycle over several orders a few days
+apart (chicks, then feed, then drugs). Orders are sorted by customer and
+date, and a new basket starts whenever the customer changes or the gap since
+the customer's previous order exceeds the session gap; basket ids are the
+cumulative sum of those break flags, so there are no Python loops.
+
+Baskets are stored like the line-item table: a basket id per order plus
+CSR-style arrays (basket -> distinct item ids, customer -> baskets) that
+market-basket and sequence analyses can slice without regrouping.
+
+Usage (from src/):
+    python baskets.py          # build from transactions_clean + order_lines.npz
+    python baskets.py 14       # 14-day session gap
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from order_lines import LineItems
+from schema import PROCESSED_DIR, load_artifact
+
+DEFAULT_SESSION_GAP_DAYS = 7
+BASKETS_PATH = os.path.join(PROCESSED_DIR, 'baskets.npz')
+
+
+def assign_baskets(transactions, gap_days=DEFAULT_SESSION_GAP_DAYS, customer_col='Customer_ID',
+                   date_col='Date'):
+    """
+    Basket id for every transaction row, aligned to the input index.
+
+    Ids are dense and ordered by customer, then by the basket's first order,
+    so one customer's baskets are consecutive and chronological.
+    """
+    customers = pd.factorize(transactions[customer_col], sort=True)[0]
+    dates = transactions[date_col].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    order = np.lexsort((dates, customers))
+
+    sorted_customers = customers[order]
+    sorted_dates = dates[order]
+    gap = pd.Timedelta(days=gap_days).value
+    new_basket = np.ones(len(order), dtype=bool)
+    new_basket[1:] = ((np.diff(sorted_customers) != 0)
+                      | (np.diff(sorted_dates) > gap))
+
+    basket_ids = np.empty(len(order), dtype=np.int32)
+    basket_ids[order] = np.cumsum(new_basket) - 1
+    return pd.Series(basket_ids, index=transactions.index, name='Basket_ID')
+
+
+def _offsets(group_ids, n_groups):
+    """CSR offsets for sorted group ids"""
+    indptr = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(group_ids, minlength=n_groups), out=indptr[1:])
+    return indptr
+
+
+class Baskets:
+    """Basket id per order plus basket -> item and customer -> basket arrays"""
+
+    def __init__(self, order_id, basket_id, basket_customer, basket_start, basket_end,
+                 item_indptr, item_id, products, customers):
+        self.order_id = np.asarray(order_id, dtype=np.int32)
+        self.basket_id = np.asarray(basket_id, dtype=np.int32)
+        self.basket_customer = np.asarray(basket_customer, dtype=np.int32)
+        self.basket_start = np.asarray(basket_start, dtype='datetime64[s]')
+        self.basket_end = np.asarray(basket_end, dtype='datetime64[s]')
+        self.item_indptr = np.asarray(item_indptr, dtype=np.int64)
+        self.item_id = np.asarray(item_id, dtype=np.int32)
+        self.products = pd.Index(products, dtype=object)
+        self.customers = pd.Index(customers, dtype=object)
+
+    def __len__(self):
+        return len(self.basket_customer)
+
+    @classmethod
+    def build(cls, transactions, line_items, gap_days=DEFAULT_SESSION_GAP_DAYS):
+        """
+        Group orders into baskets and attach the products of their line items.
+
+        ``line_items`` is a LineItems table (canonicalize it first to merge
+        spellings of one SKU); an order contributes each product once.
+        """
+        orders = transactions.drop_duplicates('Order #')
+        basket_ids = assign_baskets(orders, gap_days).to_numpy()
+        n_baskets = int(basket_ids.max()) + 1 if len(basket_ids) else 0
+
+        # Per-basket customer and date span
+        customer_codes, customers = pd.factorize(orders['Customer_ID'], sort=True)
+        dates = orders['Date'].to_numpy(dtype='datetime64[s]')
+        basket_customer = np.zeros(n_baskets, dtype=np.int32)
+        basket_customer[basket_ids] = customer_codes
+        spans = pd.DataFrame({'basket': basket_ids, 'date': dates}).groupby('basket')['date']
+
+        # Line items -> baskets through a sorted order-id lookup
+        order_ids = orders['Order #'].to_numpy(dtype=np.int64)
+        by_order = np.argsort(order_ids)
+        position = np.searchsorted(order_ids[by_order], line_items.order_id)
+        position = np.minimum(position, len(order_ids) - 1)
+        matched = order_ids[by_order][position] == line_items.order_id
+        item_baskets = basket_ids[by_order][position[matched]]
+        items = line_items.product_id[matched]
+
+        # Distinct (basket, item) pairs, sorted by basket
+        pairs = np.unique(item_baskets.astype(np.int64) * len(line_items.products) + items)
+        pair_baskets = pairs // max(len(line_items.products), 1)
+        pair_items = pairs - pair_baskets * len(line_items.products)
+
+        return cls(order_ids, basket_ids, basket_customer, spans.min().to_numpy(), spans.max().to_numpy(),
+                   _offsets(pair_baskets, n_baskets), pair_items, line_items.products, customers)
+
+    def items(self, basket):
+        """Item ids in one basket"""
+        return self.item_id[self.item_indptr[basket]:self.item_indptr[basket + 1]]
+
+    @property
+    def customer_indptr(self):
+        """CSR offsets: baskets of customer c are customer_indptr[c]:customer_indptr[c + 1]"""
+        return _offsets(self.basket_customer, len(self.customers))
+
+    def to_sparse(self):
+        """Binary basket x item matrix for market-basket analysis"""
+        data = np.ones(len(self.item_id), dtype=np.int8)
+        return sparse.csr_matrix((data, self.item_id, self.item_indptr),
+                                 shape=(len(self), len(self.products)))
+
+    def to_frame(self):
+        """One row per order with its basket id"""
+        return pd.DataFrame({
+            'Order #': self.order_id,
+            'Basket_ID': self.basket_id,
+            'Customer_ID': self.customers.to_numpy()[self.basket_customer[self.basket_id]],
+        })
+
+    def summary(self):
+        """One row per basket: customer, date span, orders and distinct items"""
+        return pd.DataFrame({
+            'Basket_ID': np.arange(len(self), dtype=np.int32),
+            'Customer_ID': self.customers.to_numpy()[self.basket_customer],
+            'Basket_Start': self.basket_start,
+            'Basket_End': self.basket_end,
+            'Orders': np.bincount(self.basket_id, minlength=len(self)),
+            'Items': np.diff(self.item_indptr),
+        })
+
+    def save(self, path=BASKETS_PATH):
+        """Save the arrays and dictionaries to a compressed .npz file"""
+        np.savez_compressed(path, order_id=self.order_id, basket_id=self.basket_id,
+                            basket_customer=self.basket_customer,
+                            basket_start=self.basket_start.astype(np.int64),
+                            basket_end=self.basket_end.astype(np.int64),
+                            item_indptr=self.item_indptr, item_id=self.item_id,
+                            products=self.products.to_numpy(dtype=str),
+                            customers=self.customers.to_numpy(dtype=str))
+
+    @classmethod
+    def load(cls, path=BASKETS_PATH):
+        with np.load(path) as data:
+            return cls(data['order_id'], data['basket_id'], data['basket_customer'],
+                       data['basket_start'].astype('datetime64[s]'),
+                       data['basket_end'].astype('datetime64[s]'),
+                       data['item_indptr'], data['item_id'], data['products'], data['customers'])
+
+
+if __name__ == '__main__':
+    gap_days = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SESSION_GAP_DAYS
+    transactions = load_artifact('transactions_clean', columns=['Customer_ID', 'Order #', 'Date'])
+    line_items = LineItems.load(os.path.join(PROCESSED_DIR, 'order_lines.npz'))
+    baskets = Baskets.build(transactions, line_items, gap_days)
+    baskets.save()
+    summary = baskets.summary()
+    print(f"✓ {len(transactions):,} orders -> {len(baskets):,} baskets ({gap_days}-day session gap)")
+    print(f"✓ Multi-order baskets: {(summary['Orders'] > 1).sum():,}, "
+          f"mean items per basket: {summary['Items'].mean():.2f}")
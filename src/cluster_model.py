@@ -0,0 +1,169 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Persisted K-Means cluster model for scoring new customers
+
+The segmentation stage saves the fitted scaler (mean/scale), the centroids
+and the cluster names as a versioned JSON artifact. New or updated customers
+are then assigned to clusters in batches by vectorized distance to the
+centroids, O(k) per customer, without refitting on the whole population.
+
+For populations too large for batch KMeans, train_minibatch fits the scaler
+and a MiniBatchKMeans with partial_fit, one batch of customers at a time.
+
+Usage (from src/):
+    python cluster_model.py                     # score rfm_clean with the latest model
+    python cluster_model.py new_customers.csv
+"""
+
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from schema import load_artifact
+
+MODEL_DIR = 'cluster_models'
+MODEL_PATTERN = re.compile(r'cluster_model_v(\d+)\.json$')
+FORMAT_VERSION = 1
+
+CLUSTERING_FEATURES = ['Recency', 'Frequency', 'Monetary', 'Avg_Order_Value',
+                       'Customer_Age_Days', 'Purchase_Rate']
+SCORING_BATCH_SIZE = 100_000
+
+
+class ClusterModel:
+    """Scaler parameters, centroids and cluster names of a fitted segmentation"""
+
+    def __init__(self, features, mean, scale, centroids, cluster_names, version=None, metadata=None):
+        self.features = list(features)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.centroids = np.asarray(centroids, dtype=np.float64)
+        self.cluster_names = {int(cluster): name for cluster, name in cluster_names.items()}
+        self.version = version
+        self.metadata = dict(metadata or {})
+
+    @classmethod
+    def from_fitted(cls, scaler, centroids, cluster_names, features=CLUSTERING_FEATURES, **metadata):
+        """Capture a fitted StandardScaler and the KMeans centroids"""
+        return cls(features, scaler.mean_, scaler.scale_, centroids, cluster_names, metadata=metadata)
+
+    @property
+    def n_clusters(self):
+        return len(self.centroids)
+
+    def transform(self, customers):
+        """Scaled feature matrix (missing values count as 0, as in training)"""
+        X = customers[self.features].fillna(0).to_numpy(dtype=np.float64)
+        return (X - self.mean) / self.scale
+
+    def predict(self, customers, batch_size=SCORING_BATCH_SIZE):
+        """Nearest-centroid cluster id per customer, computed batch by batch"""
+        labels = np.empty(len(customers), dtype=np.int8)
+        centroid_norms = (self.centroids ** 2).sum(axis=1)
+        for start in range(0, len(customers), batch_size):
+            X = self.transform(customers.iloc[start:start + batch_size])
+            # |x - c|^2 = |x|^2 - 2 x.c + |c|^2; |x|^2 is constant per row
+            distances = centroid_norms - 2 * X @ self.centroids.T
+            labels[start:start + batch_size] = distances.argmin(axis=1)
+        return labels
+
+    def assign(self, customers, batch_size=SCORING_BATCH_SIZE):
+        """Cluster and Cluster_Name columns for the given customers"""
+        clusters = self.predict(customers, batch_size)
+        return pd.DataFrame({
+            'Cluster': clusters,
+            'Cluster_Name': pd.Series(clusters).map(self.cluster_names).to_numpy(),
+        }, index=customers.index)
+
+    def to_dict(self):
+        return {
+            'format_version': FORMAT_VERSION,
+            'version': self.version,
+            'features': self.features,
+            'scaler_mean': self.mean.tolist(),
+            'scaler_scale': self.scale.tolist(),
+            'centroids': self.centroids.tolist(),
+            'cluster_names': {str(cluster): name for cluster, name in self.cluster_names.items()},
+            'metadata': self.metadata,
+        }
+
+    def save(self, model_dir=MODEL_DIR):
+        """Write the model as the next version in model_dir; returns its path"""
+        os.makedirs(model_dir, exist_ok=True)
+        versions = [int(MODEL_PATTERN.search(path).group(1))
+                    for path in glob.glob(os.path.join(model_dir, 'cluster_model_v*.json'))
+                    if MODEL_PATTERN.search(path)]
+        self.version = max(versions, default=0) + 1
+        self.metadata.setdefault('trained_at', pd.Timestamp.now().isoformat(timespec='seconds'))
+        path = os.path.join(model_dir, f'cluster_model_v{self.version:03d}.json')
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path=MODEL_DIR):
+        """Load a model file, or the latest version in a model directory"""
+        if os.path.isdir(path):
+            candidates = [p for p in glob.glob(os.path.join(path, 'cluster_model_v*.json')) if MODEL_PATTERN.search(p)]
+            if not candidates:
+                raise FileNotFoundError(f"No cluster model in {path}")
+            path = max(candidates, key=lambda p: int(MODEL_PATTERN.search(p).group(1)))
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cluster model format in {path}")
+        return cls(data['features'], data['scaler_mean'], data['scaler_scale'], data['centroids'],
+                   data['cluster_names'], data['version'], data['metadata'])
+
+
+def iter_batches(customers, batch_size=SCORING_BATCH_SIZE):
+    """Yield consecutive row slices of a customer table"""
+    for start in range(0, len(customers), batch_size):
+        yield customers.iloc[start:start + batch_size]
+
+
+def train_minibatch(batches, n_clusters, features=CLUSTERING_FEATURES, epochs=3, random_state=42,
+                    cluster_names=None):
+    """
+    Fit the scaler and a MiniBatchKMeans one batch at a time.
+
+    ``batches`` is a callable returning a fresh iterable of customer
+    DataFrames (e.g. ``lambda: iter_batches(df)`` or a chunked file reader);
+    it is consumed once for the scaler and once per epoch for the centroids.
+    """
+    scaler = StandardScaler()
+    for batch in batches():
+        scaler.partial_fit(batch[features].fillna(0).to_numpy(dtype=np.float64))
+
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=3)
+    for _ in range(epochs):
+        for batch in batches():
+            X = scaler.transform(batch[features].fillna(0).to_numpy(dtype=np.float64))
+            if len(X) >= n_clusters:
+                kmeans.partial_fit(X)
+
+    names = cluster_names or {cluster: f'Cluster_{cluster}' for cluster in range(n_clusters)}
+    return ClusterModel.from_fitted(scaler, kmeans.cluster_centers_, names, features,
+                                    training='minibatch', n_customers=int(scaler.n_samples_seen_))
+
+
+if __name__ == '__main__':
+    model = ClusterModel.load()
+    path = sys.argv[1] if len(sys.argv) > 1 else 'rfm_clean'
+    customers = load_artifact(path, columns=['Customer_ID'] + model.features)
+
+    start = time.perf_counter()
+    assigned = pd.concat([customers[['Customer_ID']], model.assign(customers)], axis=1)
+    print(f"✓ Scored {len(assigned):,} customers with cluster model v{model.version} "
+          f"in {time.perf_counter() - start:.3f}s")
+    print(assigned['Cluster_Name'].value_counts().to_string())
+    assigned.to_csv('cluster_assignments.csv', index=False)
+    print("✓ Saved cluster_assignments.csv")
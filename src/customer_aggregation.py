@@ -0,0 +1,150 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Single-pass, chunked per-customer aggregation of transactions
+
+Transactions are folded chunk by chunk into one per-customer accumulator
+(first/last purchase date, order count, revenue, items and category counts),
+so peak memory is bounded by the chunk size plus one row per customer rather
+than by the size of the transaction export.
+"""
+
+import os
+
+import pandas as pd
+
+from date_dimension import DATE_KEY, date_keys
+from product_categorizer import ProductCategorizer, UNKNOWN_PRODUCT
+
+DEFAULT_CHUNK_SIZE = 250_000
+
+DATE_AGGREGATES = {'First_Purchase_Date': 'min', 'Last_Purchase_Date': 'max'}
+ADDITIVE_MEASURES = ['Orders', 'Revenue', 'Items']
+
+
+def iter_transaction_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, columns=None):
+    """Yield a transaction file (Parquet or CSV) as DataFrames of at most chunk_size rows"""
+    path = os.fspath(path)
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunk_size, usecols=columns, parse_dates=['Date']):
+            yield chunk
+
+
+def prepare_transactions(trans_df, categorizer=None):
+    """Fill missing products, add the date key and product categories"""
+    categorizer = categorizer or ProductCategorizer()
+    trans_df = trans_df.copy()
+    trans_df['Product(s)'] = trans_df['Product(s)'].fillna(UNKNOWN_PRODUCT)
+
+    # Calendar attributes live in the date dimension, joined through this key
+    trans_df[DATE_KEY] = date_keys(trans_df['Date'])
+
+    trans_df['Product_Category'] = categorizer.categorize(trans_df['Product(s)'])
+    return trans_df
+
+
+class CustomerAccumulator:
+    """Fold transaction chunks into one row of running aggregates per customer"""
+
+    def __init__(self, category_col='Product_Category'):
+        self.category_col = category_col
+        self.state = None
+        self.rows_seen = 0
+
+    def _aggregate_chunk(self, chunk):
+        grouped = chunk.groupby('Customer_ID', sort=False)
+        part = grouped.agg(
+            First_Purchase_Date=('Date', 'min'),
+            Last_Purchase_Date=('Date', 'max'),
+            Orders=('Date', 'size'),
+            Revenue=('Revenue', 'sum'),
+            Items=('Items sold', 'sum'),
+        )
+        if self.category_col and self.category_col in chunk.columns:
+            counts = chunk.groupby(['Customer_ID', self.category_col], sort=False).size().unstack(fill_value=0)
+            counts.columns = [f'Category_{col}' for col in counts.columns]
+            part = part.join(counts)
+        return part
+
+    def update(self, chunk):
+        """Fold one chunk of transactions into the accumulator"""
+        if chunk.empty:
+            return self
+        part = self._aggregate_chunk(chunk)
+        self.rows_seen += len(chunk)
+
+        if self.state is None:
+            self.state = part
+            return self
+
+        # Only customers present in the chunk are touched; new ones are appended
+        state = self.state
+        for col in part.columns.difference(state.columns):
+            state[col] = 0
+        part = part.reindex(columns=state.columns)
+
+        existing = part.index.isin(state.index)
+        if existing.any():
+            seen = part[existing]
+            current = state.loc[seen.index]
+            additive = [col for col in state.columns if col not in DATE_AGGREGATES]
+            merged = current[additive].add(seen[additive].fillna(0))
+            merged['First_Purchase_Date'] = current['First_Purchase_Date'].where(
+                current['First_Purchase_Date'] <= seen['First_Purchase_Date'], seen['First_Purchase_Date'])
+            merged['Last_Purchase_Date'] = current['Last_Purchase_Date'].where(
+                current['Last_Purchase_Date'] >= seen['Last_Purchase_Date'], seen['Last_Purchase_Date'])
+            state.loc[seen.index, merged.columns] = merged
+
+        self.state = pd.concat([state, part[~existing]]) if not existing.all() else state
+        return self
+
+    @classmethod
+    def from_state(cls, state, category_col='Product_Category'):
+        """Resume accumulating from a previously persisted state table"""
+        accumulator = cls(category_col=category_col)
+        accumulator.state = state
+        return accumulator
+
+    @property
+    def max_date(self):
+        return None if self.state is None else self.state['Last_Purchase_Date'].max()
+
+    def finalize(self, current_date=None):
+        """Return the per-customer feature table, with Recency relative to current_date"""
+        if self.state is None:
+            return pd.DataFrame(columns=['Customer_ID', 'Recency', *DATE_AGGREGATES, *ADDITIVE_MEASURES])
+
+        current_date = self.max_date if current_date is None else current_date
+        result = self.state.copy()
+
+        category_cols = sorted(col for col in result.columns if col.startswith('Category_'))
+        result[category_cols] = result[category_cols].fillna(0).astype('int64')
+        result['Orders'] = result['Orders'].astype('int64')
+        result['Recency'] = (current_date - result['Last_Purchase_Date']).dt.days
+
+        result.index.name = 'Customer_ID'
+        result = result.reset_index()
+        return result[['Customer_ID', 'Recency', *DATE_AGGREGATES, *ADDITIVE_MEASURES, *category_cols]]
+
+
+def aggregate_customers(source, chunk_size=DEFAULT_CHUNK_SIZE, categorize=None, current_date=None):
+    """
+    Aggregate a transaction file or DataFrame per customer in a single pass.
+
+    ``categorize`` maps a chunk's ``Product(s)`` column to product categories
+    when the source does not already carry a ``Product_Category`` column.
+    """
+    accumulator = CustomerAccumulator()
+    chunks = iter_transaction_chunks(source, chunk_size) if isinstance(source, (str, os.PathLike)) else [source]
+
+    for chunk in chunks:
+        if categorize is not None and 'Product_Category' not in chunk.columns:
+            chunk = chunk.assign(Product_Category=categorize(chunk['Product(s)']))
+        accumulator.update(chunk)
+
+    return accumulator.finalize(current_date)
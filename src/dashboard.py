@@ -25,6 +25,10 @@ from datetime import datetime
 import warnings
 import io
 import base64
+from schema import drop_unused_categories
+from analytics_store import customer_profile, query_table
+from date_dimension import month_starts
+from kpi_engine import get_kpis
 warnings.filterwarnings('ignore')
 
 # Page configuration
@@ -93,21 +97,19 @@ st.markdown("""
 @st.cache_data
 def load_data():
     try:
-        rfm_data = pd.read_csv('../data/processed/rfm_with_predictions.csv')
-        transactions = pd.read_csv('../data/processed/transactions_clean.csv')
-        recommendations = pd.read_csv('../data/processed/product_recommendations.csv')
-        
-        # Parse dates
-        transactions['Date'] = pd.to_datetime(transactions['Date'])
+        rfm_data = query_table('rfm_with_predictions')
+        # Calendar attributes come from the date dimension via Date_Key
+        transactions = query_table('transactions_clean', exclude=['Date'])
+        recommendations = query_table('product_recommendations')
         
         # Try to load optional files
         try:
-            cross_sell = pd.read_csv('../data/processed/cross_sell_opportunities.csv')
+            cross_sell = query_table('cross_sell_opportunities')
         except:
             cross_sell = None
 
         try:
-            high_risk = pd.read_csv('../data/processed/high_risk_customers.csv')
+            high_risk = query_table('high_risk_customers')
         except:
             high_risk = None
 
@@ -116,11 +118,25 @@ def load_data():
         st.error(f"Error loading data: {e}")
         return None, None, None
 
+@st.cache_data
+def load_date_dimension():
+    return query_table('date_dimension')
+
+@st.cache_data
+def load_customer(customer_id):
+    """Indexed lookup of one customer's profile row and recommendations"""
+    profile = customer_profile(customer_id)
+    return profile['rfm_with_predictions'], profile['product_recommendations']
+
 # Load data
 rfm_data, transactions, recommendations, cross_sell, high_risk = load_data()
+date_dim = load_date_dimension()
 
 if rfm_data is not None:
-    
+
+    # Headline metrics, recomputed only when the data changes
+    kpis = get_kpis(rfm_data, transactions)
+
     # Sidebar
     st.sidebar.image("https://via.placeholder.com/200x80/2E86AB/FFFFFF?text=AFRIMASH", use_container_width=True)
     st.sidebar.title("🌾 Navigation")
@@ -134,8 +150,8 @@ if rfm_data is not None:
     st.sidebar.markdown("---")
     st.sidebar.info(f"""
     **Data Overview**
-    - Total Customers: {len(rfm_data):,}
-    - Total Revenue: ₦{rfm_data['Monetary'].sum():,.0f}
+    - Total Customers: {kpis['total_customers']:,}
+    - Total Revenue: ₦{kpis['total_revenue']:,.0f}
     - Analysis Date: {datetime.now().strftime('%Y-%m-%d')}
     """)
     
@@ -144,19 +160,18 @@ if rfm_data is not None:
         st.markdown('<h1 class="main-header">AFRIMASH CUSTOMER INTELLIGENCE DASHBOARD</h1>', unsafe_allow_html=True)
 
         # Transaction Period Info
-        trans_min_date = transactions['Date'].min()
-        trans_max_date = transactions['Date'].max()
+        trans_min_date = date_dim['Date'].min()
+        trans_max_date = date_dim['Date'].max()
         data_span_days = (trans_max_date - trans_min_date).days
         data_span_years = data_span_days / 365.25
 
         # Customer Type Breakdown
-        customer_type_counts = rfm_data['Customer_Type'].value_counts()
-        new_customers = customer_type_counts.get('new', 0)
-        returning_customers = customer_type_counts.get('returning', 0)
+        new_customers = kpis['new_customers']
+        returning_customers = kpis['returning_customers']
 
         st.markdown(f"""
         ### Real-time insights for data-driven decisions
-        **{len(transactions):,} transactions** | **Period:** {trans_min_date.strftime('%Y-%m-%d')} to {trans_max_date.strftime('%Y-%m-%d')} |
+        **{kpis['total_transactions']:,} transactions** | **Period:** {trans_min_date.strftime('%Y-%m-%d')} to {trans_max_date.strftime('%Y-%m-%d')} |
         **Data Span:** {data_span_days:,} days ({data_span_years:.1f} years) |
         **New Customers:** {new_customers:,} | **Returning Customers:** {returning_customers:,}
         """)
@@ -167,31 +182,31 @@ if rfm_data is not None:
         with col1:
             st.metric(
                 "Total Customers",
-                f"{len(rfm_data):,}",
-                delta=f"{len(rfm_data[rfm_data['Recency'] <= 30])} Active"
+                f"{kpis['total_customers']:,}",
+                delta=f"{kpis['active_customers']} Active"
             )
         
         with col2:
-            total_revenue = rfm_data['Monetary'].sum()
+            total_revenue = kpis['total_revenue']
             st.metric(
                 "Total Revenue",
                 f"₦{total_revenue/1e9:.2f}B",
-                delta=f"₦{rfm_data['Predicted_CLV'].sum()/1e9:.2f}B Predicted"
+                delta=f"₦{kpis['predicted_clv_total']/1e9:.2f}B Predicted"
             )
         
         with col3:
-            churn_rate = (rfm_data['Is_Churned'].sum() / len(rfm_data)) * 100
+            churn_rate = kpis['churn_rate']
             st.metric(
                 "Churn Rate",
                 f"{churn_rate:.1f}%"
             )
         
         with col4:
-            avg_clv = rfm_data['Predicted_CLV'].mean()
+            avg_clv = kpis['average_clv']
             st.metric(
                 "Avg Customer CLV",
                 f"₦{avg_clv/1e6:.2f}M",
-                delta=f"{len(rfm_data[rfm_data['CLV_Category']=='Very High Value'])} VIP"
+                delta=f"{kpis['vip_customers']} VIP"
             )
 
         st.markdown("---")
@@ -385,8 +400,8 @@ if rfm_data is not None:
         
         # Monthly Revenue Trend
         st.markdown("#### 📅 Monthly Revenue Trend")
-        monthly_rev = transactions.groupby(transactions['Date'].dt.to_period('M'))['Revenue'].sum()
-        monthly_rev.index = monthly_rev.index.to_timestamp()
+        monthly_rev = kpis['monthly_revenue'].copy()
+        monthly_rev.index = month_starts(monthly_rev.index)
         
         fig_monthly = px.line(
             x=monthly_rev.index,
@@ -457,7 +472,7 @@ if rfm_data is not None:
         st.markdown("---")
         selected_segment = st.selectbox("Select Segment for Details", rfm_data[segment_col].unique())
         
-        segment_data = rfm_data[rfm_data[segment_col] == selected_segment]
+        segment_data = drop_unused_categories(rfm_data[rfm_data[segment_col] == selected_segment].copy())
         
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -596,8 +611,8 @@ if rfm_data is not None:
             customer_id = st.selectbox("Select Customer ID", sorted(rfm_data['Customer_ID'].unique()))
             
             if customer_id:
-                customer_recs = recommendations[recommendations['Customer_ID'] == customer_id]
-                customer_info = rfm_data[rfm_data['Customer_ID'] == customer_id].iloc[0]
+                customer_rows, customer_recs = load_customer(customer_id)
+                customer_info = customer_rows.iloc[0]
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -1227,8 +1242,8 @@ else:
             customer_id = st.selectbox("Select Customer ID", rfm_data['Customer_ID'].head(100))
             
             if customer_id:
-                customer_recs = recommendations[recommendations['Customer_ID'] == customer_id]
-                customer_info = rfm_data[rfm_data['Customer_ID'] == customer_id].iloc[0]
+                customer_rows, customer_recs = load_customer(customer_id)
+                customer_info = customer_rows.iloc[0]
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -1259,8 +1274,10 @@ else:
         if search_method == "Customer ID":
             customer_id = st.text_input("Enter Customer ID", "CUS000001")
             
-            if customer_id in rfm_data['Customer_ID'].values:
-                customer = rfm_data[rfm_data['Customer_ID'] == customer_id].iloc[0]
+            customer_rows, customer_recs = load_customer(customer_id)
+
+            if len(customer_rows) > 0:
+                customer = customer_rows.iloc[0]
                 
                 st.markdown(f"## Customer Profile: {customer_id}")
                 st.markdown("---")
@@ -1293,7 +1310,6 @@ else:
                 
                 # Recommendations
                 st.markdown("### Recommended Products")
-                customer_recs = recommendations[recommendations['Customer_ID'] == customer_id]
                 if len(customer_recs) > 0:
                     st.dataframe(customer_recs[['Recommended_Category', 'Reason', 'Confidence']], width='stretch')
                 else:
@@ -25,6 +25,10 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import warnings
+from analytics_store import customer_profile, query_table
+from date_dimension import DATE_KEY, MONTH_KEY, month_starts
+from kpi_engine import get_kpis
+from segment_cube import SegmentCube
 warnings.filterwarnings('ignore')
 
 # Initialize the Dash app
@@ -38,36 +42,42 @@ app = dash.Dash(
 @callback(Output('data-store', 'data'), Input('interval-component', 'n_intervals'))
 def load_data(n):
     try:
-        rfm_data = pd.read_csv('../data/processed/rfm_with_predictions.csv')
-        transactions = pd.read_csv('../data/processed/transactions_clean.csv')
-        recommendations = pd.read_csv('../data/processed/product_recommendations.csv')
-
-        # Parse dates
-        transactions['Date'] = pd.to_datetime(transactions['Date'])
+        rfm_data = query_table('rfm_with_predictions')
+        # Calendar attributes come from the date dimension via Date_Key
+        transactions = query_table('transactions_clean', exclude=['Date'])
+        recommendations = query_table('product_recommendations')
 
         # Try to load optional files
         try:
-            cross_sell = pd.read_csv('../data/processed/cross_sell_opportunities.csv')
+            cross_sell = query_table('cross_sell_opportunities')
         except:
             cross_sell = pd.DataFrame()
 
         try:
-            high_risk = pd.read_csv('../data/processed/high_risk_customers.csv')
+            high_risk = query_table('high_risk_customers')
         except:
             high_risk = pd.DataFrame()
 
         try:
-            action_priority = pd.read_csv('../data/processed/action_priority_list.csv')
+            action_priority = query_table('action_priority_list')
         except:
             action_priority = pd.DataFrame()
 
+        # Segment views roll up these pre-aggregated cells, not customer rows
+        try:
+            segment_cube = query_table('segment_cube')
+        except FileNotFoundError:
+            # Not built yet (03_predictive_modeling.py writes it)
+            segment_cube = SegmentCube.build(rfm_data).cells
+
         return {
             'rfm': rfm_data.to_dict('records'),
             'transactions': transactions.to_dict('records'),
             'recommendations': recommendations.to_dict('records'),
             'cross_sell': cross_sell.to_dict('records') if not cross_sell.empty else [],
             'high_risk': high_risk.to_dict('records') if not high_risk.empty else [],
-            'action_priority': action_priority.to_dict('records') if not action_priority.empty else []
+            'action_priority': action_priority.to_dict('records') if not action_priority.empty else [],
+            'segment_cube': segment_cube.to_dict('records')
         }
     except Exception as e:
         print(f"Error loading data: {e}")
@@ -155,18 +165,14 @@ def render_tab_content(active_tab, data):
 def render_executive_dashboard(rfm_df, transactions_df):
     """Executive Dashboard with KPIs and Critical Alerts"""
 
-    # Calculate KPIs
-    total_customers = len(rfm_df)
-    total_revenue = rfm_df['Monetary'].sum()
-    churn_rate = (rfm_df['Is_Churned'].sum() / len(rfm_df)) * 100 if 'Is_Churned' in rfm_df.columns else 0
-    avg_clv = rfm_df['Predicted_CLV'].mean() if 'Predicted_CLV' in rfm_df.columns else 0
-    active_customers = len(rfm_df[rfm_df['Recency'] <= 90]) if 'Recency' in rfm_df.columns else 0
-
-    # High-risk customers
-    if 'Churn_Risk_Level' in rfm_df.columns:
-        high_risk = len(rfm_df[rfm_df['Churn_Risk_Level'].isin(['High', 'Critical'])])
-    else:
-        high_risk = 0
+    # Calculate KPIs (one pass, cached per data version)
+    kpis = get_kpis(rfm_df, transactions_df if DATE_KEY in transactions_df.columns else None)
+    total_customers = kpis['total_customers']
+    total_revenue = kpis['total_revenue']
+    churn_rate = kpis.get('churn_rate', 0)
+    avg_clv = kpis.get('average_clv', 0)
+    active_customers = kpis['recent_customers']
+    high_risk = kpis.get('high_risk_customers', 0)
 
     # Create KPI cards
     kpi_cards = html.Div([
@@ -185,8 +191,8 @@ def render_executive_dashboard(rfm_df, transactions_df):
         html.H3('🚨 Critical Alerts', style={'color': '#dc3545', 'marginBottom': '15px'}),
         html.Div([
             create_alert('High Churn Rate', f'{churn_rate:.1f}% of customers have churned', 'danger'),
-            create_alert('Revenue at Risk', f'₦{(rfm_df[rfm_df["Churn_Risk_Level"].isin(["High", "Critical"])]["Monetary"].sum() if "Churn_Risk_Level" in rfm_df.columns else 0)/1e9:.2f}B from high-risk customers', 'warning') if 'Churn_Risk_Level' in rfm_df.columns else None,
-            create_alert('Low Activity', f'{(active_customers/total_customers)*100:.1f}% customer activity rate', 'warning'),
+            create_alert('Revenue at Risk', f'₦{kpis.get("high_risk_revenue", 0)/1e9:.2f}B from high-risk customers', 'warning') if 'Churn_Risk_Level' in rfm_df.columns else None,
+            create_alert('Low Activity', f'{kpis["recent_rate"]:.1f}% customer activity rate', 'warning'),
         ], style={'display': 'flex', 'flexDirection': 'column', 'gap': '10px'})
     ], style={'marginBottom': '30px'})
 
@@ -222,10 +228,9 @@ def render_executive_dashboard(rfm_df, transactions_df):
     ], style={'display': 'flex', 'gap': '20px', 'marginBottom': '20px'})
 
     # Monthly revenue trend
-    if 'Date' in transactions_df.columns:
-        transactions_df['Date'] = pd.to_datetime(transactions_df['Date'])
-        monthly_revenue = transactions_df.groupby(transactions_df['Date'].dt.to_period('M'))['Revenue'].sum().reset_index()
-        monthly_revenue['Date'] = monthly_revenue['Date'].astype(str)
+    if 'monthly_revenue' in kpis:
+        monthly_revenue = kpis['monthly_revenue'].reset_index()
+        monthly_revenue['Date'] = month_starts(monthly_revenue[MONTH_KEY])
 
         revenue_trend = html.Div([
             dcc.Graph(
@@ -503,14 +508,10 @@ def render_insights(rfm_df):
     """Business Insights and Action Plans"""
 
     # Calculate key insights
-    total_revenue = rfm_df['Monetary'].sum()
-
-    if 'Churn_Risk_Level' in rfm_df.columns:
-        high_risk_revenue = rfm_df[rfm_df['Churn_Risk_Level'].isin(['High', 'Critical'])]['Monetary'].sum()
-        high_risk_count = len(rfm_df[rfm_df['Churn_Risk_Level'].isin(['High', 'Critical'])])
-    else:
-        high_risk_revenue = 0
-        high_risk_count = 0
+    kpis = get_kpis(rfm_df)
+    total_revenue = kpis['total_revenue']
+    high_risk_revenue = kpis.get('high_risk_revenue', 0)
+    high_risk_count = kpis.get('high_risk_customers', 0)
 
     if 'RFM_Segment' in rfm_df.columns:
         champions = rfm_df[rfm_df['RFM_Segment'] == 'Champions']
@@ -524,7 +525,7 @@ def render_insights(rfm_df):
         html.Div([
             html.P([
                 html.Strong('Total Revenue: '),
-                f'₦{total_revenue/1e9:.2f}B across {len(rfm_df):,} customers'
+                f'₦{total_revenue/1e9:.2f}B across {kpis["total_customers"]:,} customers'
             ]),
             html.P([
                 html.Strong('Revenue at Risk: '),
@@ -587,9 +588,9 @@ def render_insights(rfm_df):
         dash_table.DataTable(
             data=[
                 {'Metric': 'Revenue', 'Current': f'₦{total_revenue/1e9:.2f}B', 'Target': f'₦{total_revenue*1.23/1e9:.2f}B', 'Improvement': '+23%'},
-                {'Metric': 'Active Customers', 'Current': f'{len(rfm_df[rfm_df["Recency"] <= 90]):,}', 'Target': '1,100+', 'Improvement': '+175%'},
-                {'Metric': 'Churn Rate', 'Current': f'{(rfm_df["Is_Churned"].sum() / len(rfm_df)) * 100:.1f}%', 'Target': '65%', 'Improvement': '-22.2%'},
-                {'Metric': 'Avg CLV', 'Current': f'₦{rfm_df["Predicted_CLV"].mean()/1e6:.2f}M', 'Target': f'₦{rfm_df["Predicted_CLV"].mean()*1.25/1e6:.2f}M', 'Improvement': '+25%'},
+                {'Metric': 'Active Customers', 'Current': f'{kpis["recent_customers"]:,}', 'Target': '1,100+', 'Improvement': '+175%'},
+                {'Metric': 'Churn Rate', 'Current': f'{kpis["churn_rate"]:.1f}%', 'Target': '65%', 'Improvement': '-22.2%'},
+                {'Metric': 'Avg CLV', 'Current': f'₦{kpis["average_clv"]/1e6:.2f}M', 'Target': f'₦{kpis["average_clv"]*1.25/1e6:.2f}M', 'Improvement': '+25%'},
             ],
             columns=[{'name': i, 'id': i} for i in ['Metric', 'Current', 'Target', 'Improvement']],
             style_cell={'textAlign': 'left', 'padding': '10px'},
@@ -1117,19 +1118,17 @@ def update_segment_analysis(segment_col, data):
     if data is None or not data:
         return html.Div("No data"), go.Figure(), go.Figure(), go.Figure(), go.Figure(), []
 
-    rfm_df = pd.DataFrame(data['rfm'])
+    cube = SegmentCube.from_cells(pd.DataFrame(data.get('segment_cube', [])))
 
-    if segment_col not in rfm_df.columns:
+    if segment_col not in cube.dimensions:
         return html.Div(f"Column {segment_col} not found"), go.Figure(), go.Figure(), go.Figure(), go.Figure(), []
 
+    # Table, bars and heatmap are one roll-up of the segment cube
+    profile = cube.summary(segment_col).set_index(segment_col)
+
     # Segment summary table
-    segment_summary = rfm_df.groupby(segment_col).agg({
-        'Customer_ID': 'count',
-        'Monetary': ['sum', 'mean'],
-        'Frequency': 'mean',
-        'Recency': 'mean',
-        'Predicted_CLV': 'mean' if 'Predicted_CLV' in rfm_df.columns else 'count'
-    }).round(2)
+    segment_summary = profile[['Customers', 'Monetary_sum', 'Monetary_mean', 'Frequency_mean', 'Recency_mean',
+                               'CLV_mean' if 'CLV_mean' in profile.columns else 'Customers']].round(2)
 
     segment_summary.columns = ['Customers', 'Total Revenue', 'Avg Revenue', 'Avg Frequency', 'Avg Recency', 'Avg CLV']
     segment_summary = segment_summary.sort_values('Total Revenue', ascending=False)
@@ -1149,7 +1148,7 @@ def update_segment_analysis(segment_col, data):
     )
 
     # Count chart
-    segment_counts = rfm_df[segment_col].value_counts().sort_values(ascending=True)
+    segment_counts = profile['Customers'].sort_values(ascending=True)
     count_fig = go.Figure(go.Bar(
         x=segment_counts.values,
         y=segment_counts.index,
@@ -1164,7 +1163,7 @@ def update_segment_analysis(segment_col, data):
     )
 
     # Revenue chart
-    segment_revenue = rfm_df.groupby(segment_col)['Monetary'].sum().sort_values(ascending=True) / 1e6
+    segment_revenue = profile['Monetary_sum'].sort_values(ascending=True) / 1e6
     revenue_fig = go.Figure(go.Bar(
         x=segment_revenue.values,
         y=segment_revenue.index,
@@ -1179,7 +1178,8 @@ def update_segment_analysis(segment_col, data):
     )
 
     # RFM Heatmap
-    rfm_avg = rfm_df.groupby(segment_col)[['Recency', 'Frequency', 'Monetary']].mean()
+    rfm_avg = profile[['Recency_mean', 'Frequency_mean', 'Monetary_mean']]
+    rfm_avg.columns = ['Recency', 'Frequency', 'Monetary']
     heatmap_fig = go.Figure(go.Heatmap(
         z=rfm_avg.T.values,
         x=rfm_avg.index,
@@ -1196,7 +1196,8 @@ def update_segment_analysis(segment_col, data):
         template='plotly_white'
     )
 
-    # CLV Box plot
+    # CLV Box plot: a distribution, so it is the one view drawn from customer values
+    rfm_df = pd.DataFrame(data['rfm'])
     if 'Predicted_CLV' in rfm_df.columns:
         clv_fig = px.box(
             rfm_df,
@@ -1211,7 +1212,7 @@ def update_segment_analysis(segment_col, data):
         clv_fig = go.Figure()
 
     # Dropdown options
-    dropdown_options = [{'label': seg, 'value': seg} for seg in rfm_df[segment_col].unique()]
+    dropdown_options = [{'label': seg, 'value': seg} for seg in cube.members(segment_col)]
 
     return summary_table, count_fig, revenue_fig, heatmap_fig, clv_fig, dropdown_options
 
@@ -1280,8 +1281,7 @@ def update_customer_recommendations(customer_id, data):
     if data is None or not data or customer_id is None:
         return html.Div("Select a customer to view recommendations")
 
-    recommendations_df = pd.DataFrame(data['recommendations'])
-    customer_recs = recommendations_df[recommendations_df['Customer_ID'] == customer_id]
+    customer_recs = query_table('product_recommendations', customer_ids=customer_id)
 
     if len(customer_recs) == 0:
         return html.Div(f"No recommendations found for Customer {customer_id}")
@@ -1312,16 +1312,15 @@ def search_customer(n_clicks, customer_id, data):
     if n_clicks == 0 or customer_id is None or data is None or not data:
         return html.Div("Enter a Customer ID and click Search")
 
-    rfm_df = pd.DataFrame(data['rfm'])
-    recommendations_df = pd.DataFrame(data['recommendations'])
-
-    customer = rfm_df[rfm_df['Customer_ID'] == customer_id]
+    # Indexed lookup instead of scanning the full tables in the data store
+    profile = customer_profile(customer_id)
+    customer = profile['rfm_with_predictions']
 
     if len(customer) == 0:
         return html.Div(f"Customer {customer_id} not found", style={'color': '#dc3545', 'fontWeight': 'bold'})
 
     customer = customer.iloc[0]
-    customer_recs = recommendations_df[recommendations_df['Customer_ID'] == customer_id]
+    customer_recs = profile['product_recommendations']
 
     # Customer profile
     profile = html.Div([
@@ -31,6 +31,14 @@ import warnings
 import io
 import base64
 import json
+from schema import drop_unused_categories
+from analytics_store import query_table
+from transaction_partitions import load_transactions
+from date_dimension import DATE_KEY, MONTH_KEY, DAY_ORDER, MONTH_ORDER, month_starts, rollup
+from kpi_engine import get_kpis
+from segment_cube import SegmentCube
+from score_histogram import ScoreHistogram
+from rfm_segments import SCORE_LEVELS, SCORES, RFMSegmenter, edit_rule
 warnings.filterwarnings('ignore')
 
 # Page configuration
@@ -171,21 +179,19 @@ st.markdown("""
 @st.cache_data(ttl=3600)
 def load_data():
     try:
-        rfm_data = pd.read_csv('../data/processed/rfm_with_predictions.csv')
-        transactions = pd.read_csv('../data/processed/transactions_clean.csv')
-        recommendations = pd.read_csv('../data/processed/product_recommendations.csv')
-
-        # Parse dates
-        transactions['Date'] = pd.to_datetime(transactions['Date'])
+        rfm_data = query_table('rfm_with_predictions')
+        # Calendar attributes come from the date dimension via Date_Key
+        transactions = query_table('transactions_clean', exclude=['Date'])
+        recommendations = query_table('product_recommendations')
 
         # Load optional files
         try:
-            cross_sell = pd.read_csv('../data/processed/cross_sell_opportunities.csv')
+            cross_sell = query_table('cross_sell_opportunities')
         except:
             cross_sell = None
 
         try:
-            high_risk = pd.read_csv('../data/processed/high_risk_customers.csv')
+            high_risk = query_table('high_risk_customers')
         except:
             high_risk = None
 
@@ -213,8 +219,41 @@ def call_llm_api(endpoint, data=None, method="GET"):
     except Exception as e:
         return False, f"Error: {str(e)}"
 
+@st.cache_data(ttl=3600)
+def load_date_dimension():
+    return query_table('date_dimension')
+
+@st.cache_data(ttl=3600)
+def load_segment_cube():
+    """Pre-aggregated segment cells; segment charts roll these up instead of customer rows"""
+    try:
+        return query_table('segment_cube')
+    except FileNotFoundError:
+        # Not built yet (03_predictive_modeling.py writes it)
+        return SegmentCube.build(query_table('rfm_with_predictions')).cells
+
+@st.cache_data(ttl=3600)
+def load_score_histogram():
+    """125 (R, F, M) score cells; what-if segment sizes are computed from these instead of customer rows"""
+    try:
+        return query_table('rfm_score_histogram')
+    except FileNotFoundError:
+        # Not built yet (02_customer_segmentation.py writes it)
+        return ScoreHistogram.from_customers(query_table('rfm_with_predictions')).to_frame()
+
+@st.cache_data(ttl=3600)
+def load_transaction_range(start_date, end_date):
+    """Transactions between two dates; only the overlapping monthly partitions are read"""
+    return load_transactions(exclude=['Date'], date_range=(start_date, end_date))
+
+@st.cache_data(ttl=3600)
+def load_recent_transactions(days):
+    """The last `days` days of transactions (three or four monthly partitions)"""
+    return load_transactions(exclude=['Date'], last_days=days)
+
 # Load data
 rfm_data, transactions, recommendations, cross_sell, high_risk = load_data()
+date_dim = load_date_dimension()
 
 if rfm_data is not None:
 
@@ -252,17 +291,28 @@ if rfm_data is not None:
 
     # Date range filter
     if len(transactions) > 0:
-        min_date = transactions['Date'].min().date()
-        max_date = transactions['Date'].max().date()
+        min_date = date_dim['Date'].min().date()
+        max_date = date_dim['Date'].max().date()
+
+        recent_only = st.sidebar.checkbox("Last 90 days only", key="recent_filter")
 
+        # The 90-day view replaces the picked range, so the picker is disabled
         date_range = st.sidebar.date_input(
             "Date Range",
             value=(min_date, max_date),
             min_value=min_date,
             max_value=max_date,
+            disabled=recent_only,
+            help="Disabled while 'Last 90 days only' is ticked",
             key="date_range_filter"
         )
 
+        # Only a narrowed range needs a new (partition-pruned) read
+        if recent_only:
+            transactions = load_recent_transactions(90)
+        elif len(date_range) == 2 and tuple(date_range) != (min_date, max_date):
+            transactions = load_transaction_range(*date_range)
+
     # Segment filter
     selected_segments = st.sidebar.multiselect(
         "RFM Segments",
@@ -280,19 +330,25 @@ if rfm_data is not None:
     )
 
     # Apply filters
-    filtered_rfm = rfm_data[
+    filtered_rfm = drop_unused_categories(rfm_data[
         (rfm_data['RFM_Segment'].isin(selected_segments)) &
         (rfm_data['Churn_Risk_Level'].isin(selected_risks))
-    ]
+    ].copy())
+
+    segment_cube = SegmentCube.from_cells(load_segment_cube())
+    filtered_cube = segment_cube.slice(RFM_Segment=selected_segments, Churn_Risk_Level=selected_risks)
+
+    # Headline metrics for the current filter, cached per filtered data version
+    kpis = get_kpis(filtered_rfm, transactions)
 
     # Data Overview
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 📊 Data Overview")
     st.sidebar.info(f"""
     **Filtered Data:**
-    - Customers: {len(filtered_rfm):,}
-    - Revenue: GH₵{filtered_rfm['Monetary'].sum()/1e9:.2f}B
-    - Avg CLV: GH₵{filtered_rfm['Predicted_CLV'].mean()/1e6:.2f}M
+    - Customers: {kpis['total_customers']:,}
+    - Revenue: GH₵{kpis['total_revenue']/1e9:.2f}B
+    - Avg CLV: GH₵{kpis['average_clv']/1e6:.2f}M
 
     **Analysis Date:** {datetime.now().strftime('%Y-%m-%d')}
     """)
@@ -327,8 +383,8 @@ if rfm_data is not None:
         col1, col2, col3, col4, col5 = st.columns(5)
 
         with col1:
-            total_customers = len(filtered_rfm)
-            active_customers = len(filtered_rfm[filtered_rfm['Recency'] <= 90])
+            total_customers = kpis['total_customers']
+            active_customers = kpis['recent_customers']
             st.metric(
                 "👥 Total Customers",
                 f"{total_customers:,}",
@@ -337,8 +393,8 @@ if rfm_data is not None:
             )
 
         with col2:
-            total_revenue = filtered_rfm['Monetary'].sum()
-            predicted_clv = filtered_rfm['Predicted_CLV'].sum()
+            total_revenue = kpis['total_revenue']
+            predicted_clv = kpis['predicted_clv_total']
             st.metric(
                 "💰 Total Revenue",
                 f"GH₵{total_revenue/1e9:.2f}B",
@@ -347,7 +403,7 @@ if rfm_data is not None:
             )
 
         with col3:
-            churn_rate = (filtered_rfm['Is_Churned'].sum() / len(filtered_rfm)) * 100
+            churn_rate = kpis['churn_rate']
             st.metric(
                 "📉 Churn Rate",
                 f"{churn_rate:.1f}%",
@@ -356,8 +412,8 @@ if rfm_data is not None:
             )
 
         with col4:
-            avg_clv = filtered_rfm['Predicted_CLV'].mean()
-            high_value = len(filtered_rfm[filtered_rfm['CLV_Category'] == 'Very High Value'])
+            avg_clv = kpis['average_clv']
+            high_value = kpis['vip_customers']
             st.metric(
                 "💎 Avg CLV",
                 f"GH₵{avg_clv/1e6:.2f}M",
@@ -366,8 +422,8 @@ if rfm_data is not None:
             )
 
         with col5:
-            high_risk_count = len(filtered_rfm[filtered_rfm['Churn_Risk_Level'].isin(['High', 'Critical'])])
-            risk_revenue = filtered_rfm[filtered_rfm['Churn_Risk_Level'].isin(['High', 'Critical'])]['Monetary'].sum()
+            high_risk_count = kpis['high_risk_customers']
+            risk_revenue = kpis['high_risk_revenue']
             st.metric(
                 "🚨 At Risk",
                 f"{high_risk_count:,}",
@@ -419,10 +475,14 @@ if rfm_data is not None:
         with col1:
             st.markdown("#### 🎯 Customer Segment Sunburst")
 
-            # Create hierarchical sunburst chart
+            # Create hierarchical sunburst chart from the cube rolled up to
+            # its path; leaf colour is the revenue-weighted churn probability
+            sunburst_path = ['RFM_Segment', 'Churn_Risk_Level', 'CLV_Category']
+            sunburst_data = filtered_cube.summary(sunburst_path).rename(
+                columns={'Monetary_sum': 'Monetary', 'Churn_Probability_weighted_mean': 'Churn_Probability'})
             fig = px.sunburst(
-                filtered_rfm,
-                path=['RFM_Segment', 'Churn_Risk_Level', 'CLV_Category'],
+                sunburst_data,
+                path=sunburst_path,
                 values='Monetary',
                 color='Churn_Probability',
                 color_continuous_scale='RdYlGn_r',
@@ -439,8 +499,8 @@ if rfm_data is not None:
                         data={
                             "chart_type": "sunburst_hierarchy",
                             "data": {
-                                "segments": filtered_rfm['RFM_Segment'].value_counts().to_dict(),
-                                "risk_levels": filtered_rfm['Churn_Risk_Level'].value_counts().to_dict()
+                                "segments": filtered_cube.rollup('RFM_Segment').set_index('RFM_Segment')['Customers'].to_dict(),
+                                "risk_levels": filtered_cube.rollup('Churn_Risk_Level').set_index('Churn_Risk_Level')['Customers'].to_dict()
                             }
                         },
                         method="POST"
@@ -525,8 +585,8 @@ if rfm_data is not None:
         # Monthly Trend with Forecasting
         st.markdown("#### 📈 Revenue Trend & Forecast")
 
-        monthly_rev = transactions.groupby(transactions['Date'].dt.to_period('M'))['Revenue'].sum().reset_index()
-        monthly_rev['Date'] = monthly_rev['Date'].dt.to_timestamp()
+        monthly_rev = kpis['monthly_revenue'].reset_index()
+        monthly_rev['Date'] = month_starts(monthly_rev[MONTH_KEY])
 
         # Create figure with multiple traces
         fig = go.Figure()
@@ -599,7 +659,7 @@ if rfm_data is not None:
 
             with col1:
                 # Customer Growth
-                daily_customers = transactions.groupby(transactions['Date'].dt.date)['Customer_ID'].nunique()
+                daily_customers = transactions.groupby(DATE_KEY)['Customer_ID'].nunique()
                 fig = go.Figure()
                 fig.add_trace(go.Scatter(
                     x=list(range(len(daily_customers))),
@@ -617,11 +677,11 @@ if rfm_data is not None:
                 )
                 st.markdown("**Active Customers Trend**")
                 st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
-                st.metric("Current Active", f"{len(filtered_rfm[filtered_rfm['Recency'] <= 30]):,}")
+                st.metric("Current Active", f"{kpis['active_customers']:,}")
 
             with col2:
                 # Revenue trend sparkline
-                monthly_revenue = transactions.groupby(transactions['Date'].dt.to_period('M'))['Revenue'].sum()
+                monthly_revenue = kpis['monthly_revenue']
                 fig = go.Figure()
                 fig.add_trace(go.Scatter(
                     x=list(range(len(monthly_revenue))),
@@ -639,11 +699,11 @@ if rfm_data is not None:
                 )
                 st.markdown("**Revenue Trend**")
                 st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
-                st.metric("Total Revenue", f"GH₵{filtered_rfm['Monetary'].sum()/1e9:.2f}B")
+                st.metric("Total Revenue", f"GH₵{kpis['total_revenue']/1e9:.2f}B")
 
             with col3:
                 # Churn trend
-                current_churn_rate = (filtered_rfm['Is_Churned'].sum() / len(filtered_rfm)) * 100
+                current_churn_rate = kpis['churn_rate']
 
                 if 'Date' in filtered_rfm.columns:
                     churn_trend = filtered_rfm.groupby(pd.Grouper(key='Date', freq='M'))['Is_Churned'].mean() * 100
@@ -667,7 +727,7 @@ if rfm_data is not None:
                 )
                 st.markdown("**Churn Rate Trend**")
                 st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
-                st.metric("Current Churn", f"{(filtered_rfm['Is_Churned'].sum() / len(filtered_rfm)) * 100:.1f}%")
+                st.metric("Current Churn", f"{kpis['churn_rate']:.1f}%")
 
             with col4:
                 # CLV trend
@@ -939,10 +999,8 @@ if rfm_data is not None:
 
             with col1:
                 # Revenue by day of week
-                if 'Date' in transactions.columns:
-                    transactions['DayOfWeek'] = transactions['Date'].dt.day_name()
-                    dow_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                    dow_revenue = transactions.groupby('DayOfWeek')['Revenue'].sum().reindex(dow_order)
+                if DATE_KEY in transactions.columns:
+                    dow_revenue = rollup(transactions, date_dim, 'DayName', 'Revenue').reindex(DAY_ORDER)
 
                     fig = px.bar(
                         x=dow_revenue.index,
@@ -956,11 +1014,9 @@ if rfm_data is not None:
 
             with col2:
                 # Revenue by month
-                if 'Date' in transactions.columns:
-                    transactions['Month'] = transactions['Date'].dt.month_name()
-                    month_order = ['January', 'February', 'March', 'April', 'May', 'June',
-                                 'July', 'August', 'September', 'October', 'November', 'December']
-                    month_revenue = transactions.groupby('Month')['Revenue'].sum().reindex([m for m in month_order if m in transactions['Month'].unique()])
+                if DATE_KEY in transactions.columns:
+                    month_revenue = rollup(transactions, date_dim, 'MonthName', 'Revenue')
+                    month_revenue = month_revenue.reindex([m for m in MONTH_ORDER if m in month_revenue.index])
 
                     fig = px.line(
                         x=month_revenue.index,
@@ -978,10 +1034,71 @@ if rfm_data is not None:
     elif page == "👥 Customer Segments":
         st.title("👥 Customer Segmentation Analysis")
 
-        # (Add segment analysis similar to original but enhanced)
-        # ... [Implementation continues]
+        # What-if segment rules: every rule depends only on (R, F, M), so the
+        # sizes under edited rules come from the 125 score cells saved by the
+        # segmentation stage, recomputed instantly on every slider change
+        st.markdown("### 🧪 What-If Segment Rules")
+        st.caption("Rules are checked in order and the first match wins. Sizes cover all customers "
+                   "and are computed from the R/F/M score histogram, not customer rows.")
+
+        score_histogram = ScoreHistogram.from_frame(load_score_histogram())
+        segmenter = RFMSegmenter.load()
+
+        what_if_rules = segmenter.rules
+        for rule in segmenter.rules:
+            with st.expander(f"📐 {rule['segment']}"):
+                slider_cols = st.columns(len(SCORES))
+                ranges = {}
+                for col, score in zip(slider_cols, SCORES):
+                    low, high = rule.get(score, (1, SCORE_LEVELS))
+                    with col:
+                        ranges[score] = st.slider(f"{score} Score", 1, SCORE_LEVELS, (int(low), int(high)),
+                                                  key=f"what_if_{rule['segment']}_{score}")
+                what_if_rules = edit_rule(what_if_rules, rule['segment'], **ranges)
+
+        what_if = score_histogram.what_if(what_if_rules, baseline=segmenter)
+        moved, moved_revenue = score_histogram.moved(segmenter, RFMSegmenter(what_if_rules, segmenter.default))
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Customers Re-segmented", f"{moved:,}",
+                      f"{moved / max(what_if['Customers'].sum(), 1) * 100:.1f}% of base")
+        with col2:
+            st.metric("Revenue Re-segmented", f"GH₵{moved_revenue/1e9:.2f}B")
+        with col3:
+            st.metric("Segments Changed", f"{(what_if['Customers_Change'] != 0).sum()}")
 
-        st.info("Enhanced segment analysis page - Full implementation available")
+        col1, col2 = st.columns(2)
+        for col, measure, title in [(col1, 'Customers', 'Customers per Segment'),
+                                    (col2, 'Monetary', 'Revenue per Segment (GH₵)')]:
+            with col:
+                fig = go.Figure()
+                fig.add_trace(go.Bar(x=what_if['RFM_Segment'], y=what_if[measure],
+                                     name='Current Rules', marker_color='#667eea'))
+                fig.add_trace(go.Bar(x=what_if['RFM_Segment'], y=what_if[f'{measure}_What_If'],
+                                     name='What-If Rules', marker_color='#fd7e14'))
+                fig.update_layout(title=title, barmode='group', height=450)
+                st.plotly_chart(fig, use_container_width=True)
+
+        st.dataframe(
+            what_if.style.format({
+                'Customers': '{:,}',
+                'Customers_What_If': '{:,}',
+                'Customers_Change': '{:+,}',
+                'Monetary': 'GH₵{:,.0f}',
+                'Monetary_What_If': 'GH₵{:,.0f}',
+                'Monetary_Change': 'GH₵{:+,.0f}'
+            }),
+            use_container_width=True
+        )
+
+        st.download_button(
+            label="📐 Download What-If Rules (JSON)",
+            data=json.dumps({'rules': what_if_rules, 'default': segmenter.default}, indent=2),
+            file_name="rfm_segment_rules.json",
+            mime="application/json",
+            key="download_what_if_rules"
+        )
 
     elif page == "🤖 AI Insights":
         st.title("🤖 AI-Powered Insights Engine")
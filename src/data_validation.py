@@ -0,0 +1,127 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Vectorized data-quality validation with a quarantine file
+
+Each rule is a vectorized check that returns a boolean mask of failing rows,
+plus an action: 'drop' rows are removed from the batch, 'keep' rows stay in
+(refunds, fillable gaps) but are still flagged. Every failing row is appended
+to a quarantine CSV with the names of the rules it broke, and processing
+carries on, so one bad row never forces a reprocess of the batch.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Orders before the platform's first export are treated as data-entry errors
+MIN_VALID_DATE = pd.Timestamp('2015-01-01')
+
+# Rule name -> (action, check(df, context) -> mask of failing rows)
+TRANSACTION_RULES = {
+    'missing_customer_id': ('drop', lambda df, ctx: df['Customer_ID'].isna().to_numpy()),
+    'date_out_of_range': ('drop', lambda df, ctx: ~df['Date'].between(ctx['min_date'], ctx['max_date']).to_numpy()),
+    'missing_product': ('keep', lambda df, ctx: df['Product(s)'].isna().to_numpy()),
+    'negative_revenue': ('keep', lambda df, ctx: (df['Revenue'] < 0).to_numpy()),
+    'revenue_below_net_sales': ('keep', lambda df, ctx: (df['Revenue'] < df['Net_Sales']).to_numpy()),
+    'orphan_customer': ('keep', lambda df, ctx: ctx['customer_ids'] is not None
+                        and ~df['Customer_ID'].isin(ctx['customer_ids']).to_numpy()),
+}
+
+CUSTOMER_RULES = {
+    'missing_customer_id': ('drop', lambda df, ctx: df['Customer_ID'].isna().to_numpy()),
+    'duplicate_customer_id': ('drop', lambda df, ctx: df['Customer_ID'].duplicated().to_numpy()),
+    'negative_monetary': ('keep', lambda df, ctx: (df['Monetary'] < 0).to_numpy()),
+}
+
+# Quarantine bookkeeping columns
+FAILED_RULES_COL = 'Failed_Rules'
+ACTION_COL = 'Quarantine_Action'
+
+
+def _evaluate(df, rules, context):
+    """Rule name -> failing-row mask, skipping rules whose columns are absent"""
+    masks = {}
+    for name, (_, check) in rules.items():
+        try:
+            mask = check(df, context)
+        except KeyError:
+            continue
+        if isinstance(mask, (bool, np.bool_)):
+            mask = np.full(len(df), mask)
+        masks[name] = np.asarray(mask, dtype=bool)
+    return masks
+
+
+class Validator:
+    """Apply a rule set batch by batch, quarantining failing rows"""
+
+    def __init__(self, rules, quarantine_path=None, **context):
+        self.rules = rules
+        self.quarantine_path = quarantine_path
+        self.context = context
+        self.counts = dict.fromkeys(rules, 0)
+        self.rows_seen = 0
+        self.rows_dropped = 0
+        self._quarantine_started = False
+        if quarantine_path and os.path.exists(quarantine_path):
+            # Each run starts a fresh quarantine file
+            os.remove(quarantine_path)
+
+    def validate(self, df):
+        """Return the batch without 'drop' failures; quarantine all failures"""
+        masks = _evaluate(df, self.rules, self.context)
+        self.rows_seen += len(df)
+        if not masks:
+            return df
+
+        names = list(masks)
+        failed = np.vstack([masks[name] for name in names])
+        for name, row in zip(names, failed):
+            self.counts[name] += int(row.sum())
+
+        dropping = np.array([self.rules[name][0] == 'drop' for name in names])
+        any_failed = failed.any(axis=0)
+        drop = failed[dropping].any(axis=0) if dropping.any() else np.zeros(len(df), dtype=bool)
+        self.rows_dropped += int(drop.sum())
+
+        if any_failed.any():
+            self._quarantine(df, names, failed, any_failed, drop)
+        return df[~drop] if drop.any() else df
+
+    def _quarantine(self, df, names, failed, any_failed, drop):
+        bad = df[any_failed].copy()
+        labels = pd.Series('', index=bad.index)
+        for name, row in zip(names, failed[:, any_failed]):
+            labels[row] += name + ';'
+        bad[FAILED_RULES_COL] = labels.str.rstrip(';').to_numpy()
+        bad[ACTION_COL] = np.where(drop[any_failed], 'dropped', 'kept')
+
+        if self.quarantine_path:
+            bad.to_csv(self.quarantine_path, index=False,
+                       mode='a' if self._quarantine_started else 'w',
+                       header=not self._quarantine_started)
+            self._quarantine_started = True
+
+    def summary(self):
+        """Failing rows per rule over every batch validated so far"""
+        return pd.DataFrame({
+            'Rule': list(self.rules),
+            'Action': [action for action, _ in self.rules.values()],
+            'Rows': [self.counts[name] for name in self.rules],
+        })
+
+
+def transaction_validator(quarantine_path=None, customer_ids=None,
+                          min_date=MIN_VALID_DATE, max_date=None):
+    """Validator for transaction batches (orphans are checked against customer_ids)"""
+    if customer_ids is not None:
+        customer_ids = pd.Index(pd.unique(np.asarray(customer_ids, dtype=object)))
+    return Validator(TRANSACTION_RULES, quarantine_path, customer_ids=customer_ids,
+                     min_date=min_date, max_date=max_date or pd.Timestamp.now())
+
+
+def customer_validator(quarantine_path=None):
+    """Validator for the RFM customer table"""
+    return Validator(CUSTOMER_RULES, quarantine_path)
+
@@ -0,0 +1,96 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Date dimension shared by the transaction table, the EDA and the dashboards
+
+Transactions carry a single int32 Date_Key (YYYYMMDD) instead of per-row
+Year/Month/Quarter/DayName/MonthName columns. Calendar attributes are computed
+once per distinct date in a small dimension table, and time rollups aggregate
+by the integer key first and only then join the few hundred calendar rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+DATE_KEY = 'Date_Key'
+MONTH_KEY = 'Month_Key'
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_ORDER = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+
+def date_keys(dates):
+    """Integer YYYYMMDD keys for a sequence of timestamps"""
+    days = pd.to_datetime(pd.Series(dates)).to_numpy().astype('datetime64[D]')
+
+    # Calendar arithmetic only runs on the distinct days
+    codes, unique_days = pd.factorize(days)
+    unique_days = pd.DatetimeIndex(unique_days)
+    unique_keys = (unique_days.year * 10000 + unique_days.month * 100 + unique_days.day).to_numpy()
+    return unique_keys.astype(np.int32)[codes]
+
+
+def to_date_key(value):
+    """YYYYMMDD key for one date-like value; ints are taken as keys, None passes through"""
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    return int(date_keys([pd.Timestamp(value)])[0])
+
+
+def keys_to_dates(keys):
+    """Timestamps for YYYYMMDD keys"""
+    return pd.to_datetime(pd.Series(keys).astype(str), format='%Y%m%d')
+
+
+def month_starts(month_keys):
+    """First day of the month for YYYYMM keys, e.g. for chart axes"""
+    return pd.to_datetime(pd.Series(month_keys).astype(str), format='%Y%m').to_numpy()
+
+
+def build_date_dimension(keys):
+    """One row of calendar attributes per distinct Date_Key"""
+    keys = np.unique(np.asarray(keys, dtype=np.int32))
+    dates = keys_to_dates(keys)
+    return pd.DataFrame({
+        DATE_KEY: keys,
+        'Date': dates,
+        'Year': dates.dt.year.astype('int16'),
+        'Month': dates.dt.month.astype('int8'),
+        'Quarter': dates.dt.quarter.astype('int8'),
+        'DayOfWeek': dates.dt.dayofweek.astype('int8'),
+        'DayName': dates.dt.day_name(),
+        'MonthName': dates.dt.month_name(),
+        MONTH_KEY: (keys // 100).astype(np.int32),
+    })
+
+
+def extend_date_dimension(dimension, keys):
+    """Add rows for keys that aren't in the dimension yet"""
+    known = dimension[DATE_KEY].to_numpy()
+    return build_date_dimension(np.union1d(known, np.asarray(keys, dtype=np.int32)))
+
+
+def date_attributes(keys, dimension, columns):
+    """Look up calendar attributes for each key (row-aligned with keys)"""
+    positions = pd.Index(dimension[DATE_KEY]).get_indexer(np.asarray(keys))
+    if (positions < 0).any():
+        raise KeyError("Date keys missing from the date dimension")
+    return dimension[columns].iloc[positions].reset_index(drop=True)
+
+
+def rollup(transactions, dimension, by, value_col=None):
+    """
+    Count (or sum value_col over) transactions per calendar attribute(s).
+
+    Transactions are first reduced to one value per Date_Key, then the
+    per-day totals are grouped by the requested dimension columns.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    if value_col is None:
+        daily = transactions[DATE_KEY].value_counts()
+    else:
+        daily = transactions.groupby(DATE_KEY)[value_col].sum()
+
+    attributes = date_attributes(daily.index, dimension, by)
+    attributes.index = daily.index
+    return daily.groupby([attributes[col] for col in by], observed=True).sum()
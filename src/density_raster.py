@@ -0,0 +1,125 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Density rasterization for population-scale scatter plots
+
+A scatter plot draws one marker per customer, so render time and file size
+grow with the population. DensityGrid instead bins the points into a fixed
+2-D grid (per category, in log10 space for log-scaled axes) with a single
+np.bincount, and composites the counts into an RGBA image: each cell gets the
+count-weighted mix of its categories' colours, or the colormapped mean of a
+value, and an opacity that rises with log density. Drawing that image costs
+the same for 3k or 10M customers.
+
+report_figures draws through a DensityGrid when a plot has more than
+DENSITY_MIN_POINTS points, or always with report_stage.py --scatter density.
+This module only needs numpy/pandas; colours and colormaps are passed in.
+"""
+
+import numpy as np
+import pandas as pd
+
+GRID_SIZE = (240, 180)  # (x bins, y bins)
+DENSITY_MIN_POINTS = 50_000
+MIN_ALPHA = 0.3
+
+
+def _coordinates(values, log):
+    """Bin coordinates (log10 on log axes) and the mask of plottable points"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.isfinite(values)
+    if log:
+        # Non-positive values cannot be shown on a log axis
+        valid &= values > 0
+        values = np.log10(np.where(valid, values, 1.0))
+    return values, valid
+
+
+def _bins(values, n_bins):
+    """Bin index per value and the n_bins + 1 edges spanning the values"""
+    low, high = (values.min(), values.max()) if len(values) else (0.0, 1.0)
+    if high <= low:
+        low, high = low - 0.5, high + 0.5
+    index = ((values - low) * (n_bins / (high - low))).astype(np.int64)
+    return np.minimum(index, n_bins - 1), np.linspace(low, high, n_bins + 1)
+
+
+class DensityGrid:
+    """Point counts (and optional value sums) per category on a fixed 2-D grid"""
+
+    def __init__(self, counts, x_edges, y_edges, labels=None, value_sums=None, value_range=None):
+        self.counts = counts
+        self.x_edges = x_edges
+        self.y_edges = y_edges
+        self.labels = list(labels) if labels is not None else [None]
+        self.value_sums = value_sums
+        self.value_range = value_range
+
+    @classmethod
+    def from_points(cls, x, y, categories=None, values=None, grid_size=GRID_SIZE, x_log=False, y_log=False):
+        """
+        Bin points into grid_size cells.
+
+        ``categories`` gives one layer per distinct value (in order of first
+        appearance, like iterating ``Series.unique()``); ``values`` are summed
+        per cell for a colormapped mean instead. Edges are returned in data
+        units, evenly spaced in log10 space on log axes.
+        """
+        x, x_valid = _coordinates(x, x_log)
+        y, y_valid = _coordinates(y, y_log)
+        valid = x_valid & y_valid
+
+        if categories is not None:
+            codes, labels = pd.factorize(pd.Series(categories).to_numpy())
+            valid &= codes >= 0
+            codes = codes[valid]
+        else:
+            codes, labels = np.zeros(valid.sum(), dtype=np.int64), None
+        n_layers = len(labels) if labels is not None else 1
+
+        columns, rows = grid_size
+        ix, x_edges = _bins(x[valid], columns)
+        iy, y_edges = _bins(y[valid], rows)
+        cell = (codes * rows + iy) * columns + ix
+        counts = np.bincount(cell, minlength=n_layers * rows * columns).reshape(n_layers, rows, columns)
+
+        value_sums = value_range = None
+        if values is not None:
+            values = np.asarray(values, dtype=np.float64)[valid]
+            value_sums = np.bincount(cell, weights=values, minlength=rows * columns).reshape(rows, columns)
+            value_range = (values.min(), values.max()) if len(values) else (0.0, 1.0)
+
+        if x_log:
+            x_edges = 10 ** x_edges
+        if y_log:
+            y_edges = 10 ** y_edges
+        return cls(counts, x_edges, y_edges, labels, value_sums, value_range)
+
+    @property
+    def total(self):
+        """Points per cell over all categories"""
+        return self.counts.sum(axis=0)
+
+    def rgba(self, colors=None, cmap=None):
+        """
+        RGBA image (y bins x x bins x 4).
+
+        Pass ``colors`` (one RGB tuple per category) for category layers, or
+        ``cmap`` (a callable mapping [0, 1] to RGBA, e.g. a matplotlib
+        colormap) for grids built with values.
+        """
+        total = self.total
+        filled = total > 0
+        image = np.zeros(total.shape + (4,))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if self.value_sums is not None:
+                low, high = self.value_range
+                mean = self.value_sums / total
+                scaled = np.clip((mean - low) / (high - low) if high > low else 0.5, 0, 1)
+                image[..., :3] = cmap(np.nan_to_num(scaled))[..., :3]
+            else:
+                colors = np.asarray(colors, dtype=np.float64)[:, :3]
+                image[..., :3] = np.einsum('lrc,lk->rck', self.counts, colors) / total[..., None]
+            density = np.log1p(total) / np.log1p(total.max() if filled.any() else 1)
+        image[..., :3] = np.nan_to_num(image[..., :3])
+        image[..., 3] = np.where(filled, MIN_ALPHA + (1 - MIN_ALPHA) * density, 0.0)
+        return image
@@ -0,0 +1,135 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Columnar ingestion cache for the raw Excel exports
+
+Each workbook is parsed once and stored as a typed Parquet file keyed by the
+SHA-256 of its contents. Later runs read the Parquet copy instead of
+re-parsing the Excel file, and only re-parse when the source changes.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+DEFAULT_CACHE_DIR = '../data/cache'
+HASH_CHUNK_SIZE = 1 << 20
+# Bounded row groups let streaming readers decode the cache a slice at a time
+ROW_GROUP_SIZE = 100_000
+
+
+def file_digest(path, chunk_size=HASH_CHUNK_SIZE):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_stem(path):
+    """Filesystem-safe stem used to name the cached copies of a workbook"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in stem)
+
+
+def _coerce_for_parquet(df):
+    """Make object columns Parquet-safe (Excel often mixes ints and strings)"""
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        values = df[col].dropna()
+        if values.map(type).nunique() > 1:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def _read_manifest(manifest_path):
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_manifest(manifest_path, manifest):
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def _remove_stale_copies(cache_dir, stem, digest):
+    """Delete cached copies of the same workbook built from older contents"""
+    current = (f'{stem}-{digest}.parquet', f'{stem}-{digest}.json')
+    for name in os.listdir(cache_dir):
+        if name.startswith(f'{stem}-') and name.endswith(('.parquet', '.json')) and name not in current:
+            os.remove(os.path.join(cache_dir, name))
+
+
+def load_excel_cached(path, cache_dir=DEFAULT_CACHE_DIR, verbose=True, **read_kwargs):
+    """
+    Load an Excel workbook through the Parquet cache.
+
+    The cache entry is keyed by the workbook's content hash, so renaming or
+    touching the file does not trigger a re-parse but any edit does. Extra
+    keyword arguments are passed to ``pd.read_excel`` on a cache miss.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+
+    stem = _cache_stem(path)
+    digest = file_digest(path)[:16]
+    parquet_name = f'{stem}-{digest}.parquet'
+    parquet_path = os.path.join(cache_dir, parquet_name)
+    manifest_path = os.path.join(cache_dir, f'{stem}-{digest}.json')
+    manifest = _read_manifest(manifest_path)
+
+    if os.path.exists(parquet_path) and 'parse_seconds' in manifest:
+        start = time.perf_counter()
+        df = pd.read_parquet(parquet_path)
+        load_seconds = time.perf_counter() - start
+        saved = max(manifest['parse_seconds'] - load_seconds, 0.0)
+
+        manifest['hits'] = manifest.get('hits', 0) + 1
+        manifest['total_seconds_saved'] = manifest.get('total_seconds_saved', 0.0) + saved
+        _write_manifest(manifest_path, manifest)
+
+        if verbose:
+            print(f"  ↳ cache hit for {os.path.basename(path)}: loaded in {load_seconds:.2f}s, "
+                  f"saved {saved:.2f}s (total saved: {manifest['total_seconds_saved']:.1f}s)")
+        return df
+
+    start = time.perf_counter()
+    df = pd.read_excel(path, **read_kwargs)
+    parse_seconds = time.perf_counter() - start
+
+    df = _coerce_for_parquet(df)
+    df.to_parquet(parquet_path, index=False, row_group_size=ROW_GROUP_SIZE)
+    _write_manifest(manifest_path, {
+        'source': os.path.abspath(path),
+        'sha256_prefix': digest,
+        'rows': int(len(df)),
+        'parse_seconds': parse_seconds,
+        'hits': 0,
+        'total_seconds_saved': 0.0,
+    })
+    _remove_stale_copies(cache_dir, stem, digest)
+
+    if verbose:
+        print(f"  ↳ cache miss for {os.path.basename(path)}: parsed in {parse_seconds:.2f}s, "
+              f"cached to {parquet_name}")
+    return df
+
+
+def cached_parquet_path(path, cache_dir=DEFAULT_CACHE_DIR, verbose=True, **read_kwargs):
+    """
+    Return the path of the Parquet copy of a workbook, building it if needed.
+
+    Used by streaming readers that want to iterate the cached file in chunks
+    rather than load it whole.
+    """
+    digest = file_digest(path)[:16]
+    parquet_path = os.path.join(cache_dir, f'{_cache_stem(path)}-{digest}.parquet')
+    if not os.path.exists(parquet_path):
+        load_excel_cached(path, cache_dir=cache_dir, verbose=verbose, **read_kwargs)
+    return parquet_path
@@ -0,0 +1,162 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Parallel, cached K sweep for the K-Means segmentation
+
+Each candidate K is fitted in its own worker process. The silhouette score is
+O(n^2), so it is estimated on a fixed stratified sample (the full matrix when
+it is small enough), and the sweep stops collecting results once its time
+budget runs out. Results are written to a report keyed by a digest of the
+feature matrix and the sweep settings, so rerunning on unchanged data reads
+the report instead of refitting; K values skipped by the budget are fitted
+on the next run.
+
+Usage (from src/):
+    python k_sweep.py                  # sweep rfm_segmented features, K = 2..10
+    python k_sweep.py 60               # with a 60-second budget
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.metrics import silhouette_score
+from sklearn.model_selection import train_test_split
+
+from process_pool import pool_context
+
+DEFAULT_K_RANGE = range(2, 11)
+SILHOUETTE_SAMPLE_SIZE = 10_000
+REPORT_PATH = 'k_sweep_report.json'
+
+
+def silhouette_sample(n_rows, sample_size=SILHOUETTE_SAMPLE_SIZE, strata=None, random_state=42):
+    """Row positions for the silhouette estimate (all rows when n_rows <= sample_size)"""
+    positions = np.arange(n_rows)
+    if n_rows <= sample_size:
+        return positions
+    if strata is not None:
+        # Strata too small to split fall back to a plain random sample
+        counts = pd.Series(np.asarray(strata)).value_counts()
+        if counts.min() < 2:
+            strata = None
+    sample, _ = train_test_split(positions, train_size=sample_size, random_state=random_state,
+                                 stratify=None if strata is None else np.asarray(strata))
+    return np.sort(sample)
+
+
+def _fit_one(X, k, sample, n_init, random_state):
+    """Worker: fit one K and score it"""
+    from threadpoolctl import threadpool_limits
+
+    start = time.perf_counter()
+    # One BLAS/OpenMP thread per worker so parallel fits don't oversubscribe
+    with threadpool_limits(limits=1):
+        model = KMeans(n_clusters=k, random_state=random_state, n_init=n_init).fit(X)
+        silhouette = silhouette_score(X[sample], model.labels_[sample])
+    return {'K': k, 'Inertia': float(model.inertia_), 'Silhouette': float(silhouette),
+            'Seconds': round(time.perf_counter() - start, 2)}
+
+
+def sweep_digest(X, sample, n_init, random_state):
+    """Digest of everything that determines the sweep results"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(sample).tobytes())
+    digest.update(f'{n_init}:{random_state}'.encode())
+    return digest.hexdigest()
+
+
+def _read_report(report_path):
+    try:
+        with open(report_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def sweep_k(X, k_range=DEFAULT_K_RANGE, strata=None, sample_size=SILHOUETTE_SAMPLE_SIZE,
+            time_budget=None, workers=None, n_init=10, random_state=42, report_path=REPORT_PATH):
+    """
+    Inertia and (sampled) silhouette for every K in k_range.
+
+    ``strata`` (e.g. RFM segments) stratifies the silhouette sample.
+    ``time_budget`` is in seconds; K values still running when it expires are
+    reported as 'skipped'. Returns one row per K with its status
+    (fitted / cached / skipped).
+    """
+    X = np.asarray(X, dtype=np.float64)
+    sample = silhouette_sample(len(X), sample_size, strata, random_state)
+    digest = sweep_digest(X, sample, n_init, random_state)
+
+    report = _read_report(report_path) if report_path else {}
+    cached = report.get('results', {}) if report.get('digest') == digest else {}
+
+    rows, pending = [], []
+    for k in k_range:
+        if str(k) in cached:
+            rows.append({**cached[str(k)], 'Status': 'cached'})
+        else:
+            pending.append(k)
+
+    fitted = {}
+    if pending:
+        start = time.perf_counter()
+        workers = workers or min(len(pending), os.cpu_count() or 1)
+        # Not forked: the caller may already have OpenMP threads running
+        pool = pool_context().Pool(processes=workers)
+        try:
+            # Smallest K first: cheapest fits land first under a tight budget
+            jobs = {k: pool.apply_async(_fit_one, (X, k, sample, n_init, random_state))
+                    for k in sorted(pending)}
+            for k, job in jobs.items():
+                remaining = None if time_budget is None else time_budget - (time.perf_counter() - start)
+                if remaining is not None and remaining <= 0:
+                    break
+                try:
+                    fitted[k] = job.get(timeout=remaining)
+                except multiprocessing.TimeoutError:
+                    break
+            # Keep anything else that finished before the deadline
+            fitted.update({k: job.get() for k, job in jobs.items() if k not in fitted and job.ready()})
+        finally:
+            # Fits still running past the budget are abandoned
+            pool.terminate()
+            pool.join()
+
+    for k in pending:
+        if k in fitted:
+            rows.append({**fitted[k], 'Status': 'fitted'})
+        else:
+            rows.append({'K': k, 'Inertia': np.nan, 'Silhouette': np.nan, 'Seconds': np.nan,
+                         'Status': 'skipped'})
+
+    if report_path and fitted:
+        results = {**cached, **{str(k): result for k, result in fitted.items()}}
+        with open(report_path, 'w') as f:
+            json.dump({'digest': digest, 'rows': len(X), 'sample_rows': len(sample),
+                       'results': dict(sorted(results.items(), key=lambda item: int(item[0])))},
+                      f, indent=2)
+
+    return pd.DataFrame(rows, columns=['K', 'Inertia', 'Silhouette', 'Seconds', 'Status']) \
+        .sort_values('K').reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    from sklearn.preprocessing import StandardScaler
+    from schema import load_artifact
+
+    features = ['Recency', 'Frequency', 'Monetary', 'Avg_Order_Value', 'Customer_Age_Days', 'Purchase_Rate']
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else None
+    rfm_df = load_artifact('rfm_segmented', columns=features + ['RFM_Segment'])
+    X_scaled = StandardScaler().fit_transform(rfm_df[features].fillna(0))
+
+    start = time.perf_counter()
+    report = sweep_k(X_scaled, strata=rfm_df['RFM_Segment'], time_budget=budget)
+    print(report.to_string(index=False))
+    print(f"\n✓ K sweep finished in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,190 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+One-pass KPI engine shared by the EDA summary and the dashboards
+
+The customer table is bucketed once by recency (np.digitize + np.bincount) and
+the transactions are grouped once by (month, category); every headline metric
+is derived from those two small results instead of repeated boolean filters.
+Results are cached by a content hash of the columns they depend on, so a
+dashboard rerun on unchanged (or identically filtered) data is a dict lookup.
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from date_dimension import DATE_KEY
+
+ACTIVE_DAYS = 30
+AT_RISK_DAYS = 90
+HIGH_RISK_LEVELS = ['High', 'Critical']
+VIP_CATEGORY = 'Very High Value'
+
+# Columns the KPIs depend on; only these feed the cache key
+CUSTOMER_COLUMNS = ['Recency', 'Frequency', 'Monetary', 'Customer_Type', 'Is_Churned',
+                    'Predicted_CLV', 'CLV_Category', 'Churn_Risk_Level']
+TRANSACTION_COLUMNS = ['Revenue', 'Net_Sales', 'Product_Category', DATE_KEY]
+
+# Share of all customers (in %) -> the count it is derived from
+RATES = {
+    'active_rate': 'active_customers',
+    'recent_rate': 'recent_customers',
+    'at_risk_rate': 'at_risk_customers',
+    'one_time_rate': 'one_time_buyers',
+    'returning_rate': 'returning_customers',
+    'churn_rate': 'churned_customers',
+}
+
+MAX_CACHED_VERSIONS = 32
+_kpi_cache = {}
+
+
+def data_version(*frames):
+    """Content hash of the KPI-relevant columns of each frame"""
+    digest = hashlib.sha256()
+    for frame, columns in frames:
+        if frame is None:
+            digest.update(b'none')
+            continue
+        present = [col for col in columns if col in frame.columns]
+        digest.update(','.join(present).encode())
+        digest.update(pd.util.hash_pandas_object(frame[present], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _customer_kpis(rfm_df):
+    n = len(rfm_df)
+    recency = rfm_df['Recency'].to_numpy(dtype=float)
+    frequency = rfm_df['Frequency'].to_numpy()
+    monetary = rfm_df['Monetary'].to_numpy(dtype=float)
+
+    # Bucket 0: active (<=30 days), 1: recent (31-90), 2: at risk (>90).
+    # Customers without a Recency fall in none of them (np.digitize would put
+    # NaN in the last bucket), as with the original boolean filters
+    known = ~np.isnan(recency)
+    bucket = np.digitize(recency[known], [ACTIVE_DAYS, AT_RISK_DAYS], right=True)
+    bucket_counts = np.bincount(bucket, minlength=3)
+    bucket_revenue = np.bincount(bucket, weights=monetary[known], minlength=3)
+
+    kpis = {
+        'total_customers': n,
+        'total_revenue': float(monetary.sum()),
+        'average_customer_value': float(monetary.mean()) if n else 0.0,
+        'median_frequency': float(np.median(frequency)) if n else 0.0,
+        'average_frequency': float(frequency.mean()) if n else 0.0,
+        'median_recency': float(np.median(recency[known])) if known.any() else 0.0,
+        'active_customers': int(bucket_counts[0]),
+        'recent_customers': int(bucket_counts[0] + bucket_counts[1]),
+        'at_risk_customers': int(bucket_counts[2]),
+        'at_risk_revenue': float(bucket_revenue[2]),
+        'one_time_buyers': int(np.count_nonzero(frequency == 1)),
+    }
+
+    if 'Customer_Type' in rfm_df.columns:
+        types = rfm_df['Customer_Type'].value_counts()
+        kpis['new_customers'] = int(types.get('new', 0))
+        kpis['returning_customers'] = int(types.get('returning', 0))
+    if 'Is_Churned' in rfm_df.columns:
+        kpis['churned_customers'] = int(rfm_df['Is_Churned'].sum())
+    if 'Predicted_CLV' in rfm_df.columns:
+        kpis['predicted_clv_total'] = float(rfm_df['Predicted_CLV'].sum())
+        kpis['average_clv'] = float(rfm_df['Predicted_CLV'].mean()) if n else 0.0
+    if 'CLV_Category' in rfm_df.columns:
+        kpis['vip_customers'] = int((rfm_df['CLV_Category'] == VIP_CATEGORY).sum())
+    if 'Churn_Risk_Level' in rfm_df.columns:
+        high_risk = rfm_df['Churn_Risk_Level'].isin(HIGH_RISK_LEVELS).to_numpy()
+        kpis['high_risk_customers'] = int(high_risk.sum())
+        kpis['high_risk_revenue'] = float(monetary[high_risk].sum())
+
+    for rate, count in RATES.items():
+        if count in kpis:
+            kpis[rate] = kpis[count] / n * 100 if n else 0.0
+    return kpis
+
+
+def _transaction_kpis(transactions):
+    revenue = transactions['Revenue']
+    kpis = {
+        'total_transactions': len(transactions),
+        'transaction_revenue': float(revenue.sum()),
+        'average_transaction_value': float(revenue.mean()) if len(transactions) else 0.0,
+    }
+    if 'Net_Sales' in transactions.columns:
+        kpis['total_net_sales'] = float(transactions['Net_Sales'].sum())
+
+    # One grouped pass by (month, category); both rollups come from it
+    keys = [transactions[DATE_KEY].to_numpy() // 100, transactions['Product_Category'].astype(str).to_numpy()]
+    cube = revenue.groupby(keys).agg(['size', 'sum'])
+    cube.index.names = ['Month_Key', 'Product_Category']
+
+    by_category = cube.groupby(level='Product_Category').sum()
+    kpis['transactions_by_category'] = by_category['size'].sort_values(ascending=False).rename('Transactions')
+    kpis['revenue_by_category'] = by_category['sum'].sort_values(ascending=False).rename('Revenue')
+    # Ties go to the alphabetically first category, as with Series.mode()
+    kpis['top_category'] = by_category['size'].idxmax() if len(by_category) else None
+    kpis['monthly_revenue'] = cube['sum'].groupby(level='Month_Key').sum().rename('Revenue')
+    kpis['monthly_transactions'] = cube['size'].groupby(level='Month_Key').sum().rename('Transactions')
+    return kpis
+
+
+def compute_kpis(rfm_df, transactions=None):
+    """Compute the full KPI set (uncached)"""
+    kpis = _customer_kpis(rfm_df)
+    if transactions is not None:
+        kpis.update(_transaction_kpis(transactions))
+    return kpis
+
+
+def get_kpis(rfm_df, transactions=None):
+    """
+    KPI set for the given data, reused while the data version is unchanged.
+
+    The returned dict is shared between callers and must not be modified.
+    """
+    version = data_version((rfm_df, CUSTOMER_COLUMNS), (transactions, TRANSACTION_COLUMNS))
+    if version not in _kpi_cache:
+        if len(_kpi_cache) >= MAX_CACHED_VERSIONS:
+            _kpi_cache.pop(next(iter(_kpi_cache)))
+        kpis = compute_kpis(rfm_df, transactions)
+        kpis['data_version'] = version
+        _kpi_cache[version] = kpis
+    return _kpi_cache[version]
+
+
+def summary_table(kpis):
+    """The summary_statistics.csv table of the data prep script"""
+    return pd.DataFrame({
+        'Metric': [
+            'Total Customers',
+            'Total Transactions',
+            'Total Revenue',
+            'Total Net Sales',
+            'Average Customer Value',
+            'Average Transaction Value',
+            'Median Frequency',
+            'Median Recency (days)',
+            'Active Customers (0-30 days)',
+            'At Risk Customers (>90 days)',
+            'One-time Buyers',
+            'Returning Customers Rate',
+            'Average Purchase Frequency',
+            'Most Popular Category'
+        ],
+        'Value': [
+            f"{kpis['total_customers']:,}",
+            f"{kpis['total_transactions']:,}",
+            f"₦{kpis['transaction_revenue']:,.2f}",
+            f"₦{kpis['total_net_sales']:,.2f}",
+            f"₦{kpis['average_customer_value']:,.2f}",
+            f"₦{kpis['average_transaction_value']:,.2f}",
+            f"{kpis['median_frequency']:.0f}",
+            f"{kpis['median_recency']:.0f}",
+            f"{kpis['active_customers']:,} ({kpis['active_rate']:.1f}%)",
+            f"{kpis['at_risk_customers']:,} ({kpis['at_risk_rate']:.1f}%)",
+            f"{kpis['one_time_buyers']:,} ({kpis['one_time_rate']:.1f}%)",
+            f"{kpis['returning_rate']:.1f}%",
+            f"{kpis['average_frequency']:.2f}",
+            kpis['top_category']
+        ]
+    })
@@ -20,6 +20,7 @@ import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 import json
+from analytics_store import query_table
 
 # Initialize FastAPI
 app = FastAPI(
@@ -65,19 +66,19 @@ def setup_gemini():
             detail=f"Failed to initialize Gemini model: {str(e)}"
         )
 
+# Customer columns the endpoints below actually use
+RFM_COLUMNS = ['Customer_ID', 'Monetary', 'Recency', 'Predicted_CLV', 'Is_Churned', 'RFM_Segment',
+               'Churn_Risk_Level', 'CLV_Category', 'Purchase_Timing_Status']
+
 # Load customer data
 def load_data():
-    """Load all data files"""
+    """Load the columns the endpoints use from the analytics store"""
     try:
-        rfm_data = pd.read_csv('../data/processed/rfm_with_predictions.csv')
-        transactions = pd.read_csv('../data/processed/transactions_clean.csv')
-        recommendations = pd.read_csv('../data/processed/product_recommendations.csv')
-
-        transactions['Date'] = pd.to_datetime(transactions['Date'])
+        rfm_data = query_table('rfm_with_predictions', columns=RFM_COLUMNS)
+        recommendations = query_table('product_recommendations', columns=['Customer_ID'])
 
         return {
             'rfm_data': rfm_data,
-            'transactions': transactions,
             'recommendations': recommendations
         }
     except Exception as e:
@@ -0,0 +1,79 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Persistent index of already-ingested order numbers
+
+Overlapping daily exports re-introduce orders that were loaded before. The
+index keeps every ingested ``Order #`` as one sorted int64 array on disk, so a
+new batch is checked with a single vectorized binary search (np.searchsorted)
+instead of reprocessing history. At 8 bytes per order, tens of millions of
+orders fit in a few hundred MB and a lookup stays well under a second.
+"""
+
+import os
+
+import numpy as np
+
+DEFAULT_INDEX_PATH = '../data/processed/seen_orders.npy'
+
+
+class SeenOrderIndex:
+    """Sorted, de-duplicated array of order numbers already ingested"""
+
+    def __init__(self, orders=None, path=None):
+        orders = np.asarray([] if orders is None else orders, dtype=np.int64)
+        self.orders = np.unique(orders)
+        self.path = path
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        """Load the index from disk, or start an empty one if it doesn't exist yet"""
+        index = cls(path=path)
+        if os.path.exists(path):
+            # Saved arrays are already sorted and unique
+            index.orders = np.load(path)
+        return index
+
+    def save(self, path=None):
+        path = path or self.path or DEFAULT_INDEX_PATH
+        np.save(path, self.orders)
+        self.path = path
+        return path
+
+    def __len__(self):
+        return len(self.orders)
+
+    def contains(self, order_ids):
+        """Boolean mask: True where the order was already ingested"""
+        order_ids = np.asarray(order_ids, dtype=np.int64)
+        if len(self.orders) == 0:
+            return np.zeros(len(order_ids), dtype=bool)
+
+        # Searching in sorted order keeps the binary searches cache-friendly
+        order = np.argsort(order_ids, kind='stable')
+        sorted_ids = order_ids[order]
+        positions = np.searchsorted(self.orders, sorted_ids)
+        positions[positions == len(self.orders)] = 0
+
+        mask = np.empty(len(order_ids), dtype=bool)
+        mask[order] = self.orders[positions] == sorted_ids
+        return mask
+
+    def add(self, order_ids):
+        """Record orders as ingested"""
+        order_ids = np.unique(np.asarray(order_ids, dtype=np.int64))
+        new = order_ids[~self.contains(order_ids)]
+        if len(new):
+            # Both sides are sorted, so insert in place of a full re-sort
+            self.orders = np.insert(self.orders, np.searchsorted(self.orders, new), new)
+        return self
+
+    def filter_new(self, transactions, order_col='Order #'):
+        """
+        Drop already-ingested orders (and repeats within the batch), then
+        record the remaining ones in the index.
+        """
+        transactions = transactions.drop_duplicates(subset=[order_col], keep='first')
+        is_new = ~self.contains(transactions[order_col].to_numpy())
+        transactions = transactions[is_new]
+        self.add(transactions[order_col].to_numpy())
+        return transactions
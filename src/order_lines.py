@@ -0,0 +1,119 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Order-line parser for the packed Product(s) column
+
+A Product(s) value such as
+    "3× Agrited Broilers, 1× Poultry Drug Combo - Mini | Free Shipping"
+is exploded into one (order_id, product_id, quantity) row per line item.
+Product names are interned into a dictionary so the line-item table is three
+compact int32 arrays that item-level analytics can use without re-parsing.
+"""
+
+import numpy as np
+import pandas as pd
+
+from product_categorizer import UNKNOWN_PRODUCT
+
+# A new line item starts after a comma followed by "<qty>×"
+LINE_SEPARATOR = r',\s*(?=\d+\s*[×x]\s)'
+LINE_PATTERN = r'^\s*(?:(?P<quantity>\d+)\s*[×x]\s+)?(?P<product>.*?)\s*$'
+SHIPPING_NOTE = r'\s*(?:[|\-–]\s*)?\(?\s*free\s+shipping\s*\)?\s*'
+
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def normalize_product_names(names):
+    """Strip shipping notes and collapse whitespace in product names"""
+    return (names.str.replace(SHIPPING_NOTE, ' ', regex=True, case=False)
+                 .str.replace(r'\s+', ' ', regex=True)
+                 .str.strip(' -|–'))
+
+
+def parse_order_lines(transactions, order_col='Order #', product_col='Product(s)'):
+    """
+    Explode transactions into one row per line item.
+
+    Returns a DataFrame with the order id, normalized product name and
+    quantity. Orders with no product information are skipped.
+    """
+    products = transactions[product_col]
+    has_product = products.notna() & (products != UNKNOWN_PRODUCT)
+
+    lines = products[has_product].str.split(LINE_SEPARATOR, regex=True)
+    order_ids = transactions.loc[has_product, order_col].to_numpy()
+    lengths = lines.str.len().to_numpy()
+
+    exploded = lines.explode()
+    parts = exploded.str.extract(LINE_PATTERN)
+
+    result = pd.DataFrame({
+        'order_id': np.repeat(order_ids, lengths),
+        'product': normalize_product_names(parts['product']).to_numpy(),
+        'quantity': pd.to_numeric(parts['quantity']).fillna(1).to_numpy(),
+    })
+    return result[result['product'] != ''].reset_index(drop=True)
+
+
+class LineItems:
+    """Integer-coded line-item table with an interned product dictionary"""
+
+    def __init__(self, order_id=None, product_id=None, quantity=None, products=None):
+        self.order_id = np.asarray([] if order_id is None else order_id, dtype=np.int32)
+        self.product_id = np.asarray([] if product_id is None else product_id, dtype=np.int32)
+        self.quantity = np.asarray([] if quantity is None else quantity, dtype=np.int32)
+        self.products = pd.Index([] if products is None else products, dtype=object)
+
+    def __len__(self):
+        return len(self.order_id)
+
+    def intern(self, names):
+        """Map product names to ids, appending unseen names to the dictionary"""
+        ids = self.products.get_indexer(names)
+        unseen = ids < 0
+        if unseen.any():
+            new_names = pd.unique(np.asarray(names)[unseen])
+            self.products = self.products.append(pd.Index(new_names, dtype=object))
+            ids[unseen] = self.products.get_indexer(np.asarray(names)[unseen])
+        return ids.astype(np.int32)
+
+    def append(self, transactions, **parse_kwargs):
+        """Parse a batch of transactions and append its line items"""
+        lines = parse_order_lines(transactions, **parse_kwargs)
+        if len(lines) and (lines['order_id'].max() > INT32_MAX or lines['quantity'].max() > INT32_MAX):
+            raise ValueError("Order ids and quantities must fit in int32 for the line-item table")
+
+        self.order_id = np.concatenate([self.order_id, lines['order_id'].to_numpy(dtype=np.int32)])
+        self.product_id = np.concatenate([self.product_id, self.intern(lines['product'])])
+        self.quantity = np.concatenate([self.quantity, lines['quantity'].to_numpy(dtype=np.int32)])
+        return self
+
+    def canonicalize(self, catalog):
+        """Line items re-keyed by canonical product, merging spellings of one SKU"""
+        codes, canonical = pd.factorize(catalog.canonical(self.products))
+        product_id = codes.astype(np.int32)[self.product_id] if len(self.product_id) else self.product_id
+        return LineItems(self.order_id, product_id, self.quantity, canonical)
+
+    def product_counts(self):
+        """Line items per product id"""
+        return np.bincount(self.product_id, minlength=len(self.products))
+
+    def to_frame(self, with_names=False):
+        """Return the line items as a DataFrame (optionally with product names)"""
+        frame = pd.DataFrame({
+            'order_id': self.order_id,
+            'product_id': self.product_id,
+            'quantity': self.quantity,
+        })
+        if with_names:
+            frame['product'] = self.products.to_numpy()[self.product_id]
+        return frame
+
+    def save(self, path):
+        """Save the arrays and product dictionary to a compressed .npz file"""
+        np.savez_compressed(path, order_id=self.order_id, product_id=self.product_id,
+                            quantity=self.quantity, products=self.products.to_numpy(dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['order_id'], data['product_id'], data['quantity'], data['products'])
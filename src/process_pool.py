@@ -0,0 +1,19 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Start method for the worker pools
+
+Stage scripts fit KMeans (and other OpenMP/BLAS code) before and between
+their parallel steps. Forking a process whose OpenMP thread pool is already
+running can deadlock the children, so worker pools are started with
+forkserver (spawn where it is unavailable). Both re-import the calling
+script in every worker, so scripts that use a pool keep their top-level
+code behind ``if __name__ == '__main__':``.
+"""
+
+import multiprocessing
+
+
+def pool_context():
+    """multiprocessing context for worker pools: forkserver, else spawn (never fork)"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
@@ -0,0 +1,253 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Canonical product catalog from fuzzy-matched product names
+
+The same SKU reaches the export under several spellings
+("AMO Broiler Chicks | Day-Old Birds" vs "AMO Broiler Chicks - Day Old").
+Names are reduced to a normalized key, then candidate pairs are blocked
+through a character n-gram inverted index: two names are only compared when
+they share an n-gram that is rare enough to be informative, so the job never
+scores all pairs. Candidates are scored by TF-IDF cosine similarity. A pair
+above the threshold is linked only when its numbers agree ("Ross 308" never
+merges with "Cobb 500") and one name's words contain the other's, so a
+re-spelling or an extra descriptor merges but a different variation
+("Half Carton" vs "Full Carton") does not. Each connected group becomes one
+canonical product named after its most frequent spelling.
+
+The data prep stage builds the catalog from the run's own product names
+before categorizing (catalog_from_batches), persists it as
+product_catalog.csv, and the incremental refresh and item-level analytics
+(LineItems.canonicalize) reuse it.
+
+Usage (from src/):
+    python product_catalog.py          # build from transactions_clean
+"""
+
+import html
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from order_lines import LINE_PATTERN, normalize_product_names, parse_order_lines
+from schema import PROCESSED_DIR, artifact_path, artifact_source, load_artifact, save_artifact
+
+CATALOG_PATH = artifact_path('product_catalog')
+
+NGRAM_SIZE = 3
+SIMILARITY_THRESHOLD = 0.75
+# N-grams shared by more names than this are too common to block on
+MAX_BLOCK_SIZE = 500
+CHUNK_ROWS = 500
+# Listing artifacts that never distinguish two products
+NOISE_WORDS = r'\b(?:copy|promo)\b'
+
+
+def canonical_key(names):
+    """Lower-case, punctuation-free, whitespace-collapsed form of product names"""
+    names = normalize_product_names(pd.Series(names, dtype=object).fillna('').map(html.unescape))
+    return (names.str.lower()
+                 .str.replace(NOISE_WORDS, ' ', regex=True)
+                 .str.replace(r'[^0-9a-z]+', ' ', regex=True)
+                 .str.strip())
+
+
+def _word_set(key):
+    """Words of a key with plural 's' dropped (seedlings == seedling)"""
+    return frozenset(word[:-1] if len(word) > 3 and word.endswith('s') else word
+                     for word in key.split())
+
+
+def _nested(left_words, right_words):
+    return left_words <= right_words or right_words <= left_words
+
+
+def variation_key(names):
+    """Normalized variation suffix ("Parent - Half Carton" -> 'half carton'), or ''"""
+    names = pd.Series(names, dtype=object).fillna('').map(html.unescape)
+    suffix = names.str.extract(r'\s[-–]\s((?:(?!\s[-–]\s).)+)$', expand=False).fillna('')
+    return canonical_key(suffix)
+
+
+def _similar_pairs(vectors, threshold, max_block_size, chunk_rows):
+    """
+    (i, j) pairs with i < j whose similarity reaches the threshold.
+
+    Candidates come from the blocking n-grams only and are scored chunk by
+    chunk, so memory holds one chunk of candidates at a time.
+    """
+    present = (vectors > 0).astype(np.float32).tocsc()
+    block_sizes = np.diff(present.indptr)
+    blocking = present[:, block_sizes <= max_block_size].tocsr()
+    blocking_t = blocking.T.tocsr()
+
+    rows, cols = [], []
+    for start in range(0, blocking.shape[0], chunk_rows):
+        shared = (blocking[start:start + chunk_rows] @ blocking_t).tocoo()
+        keep = shared.row + start < shared.col
+        left, right = shared.row[keep] + start, shared.col[keep]
+
+        # Score only the candidate pairs: row-wise dot products of unit vectors
+        similarity = np.asarray(vectors[left].multiply(vectors[right]).sum(axis=1)).ravel()
+        above = similarity >= threshold
+        rows.append(left[above])
+        cols.append(right[above])
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def match_products(keys, variations=None, threshold=SIMILARITY_THRESHOLD, ngram_size=NGRAM_SIZE,
+                   max_block_size=MAX_BLOCK_SIZE, chunk_rows=CHUNK_ROWS):
+    """
+    Group distinct normalized product keys into canonical products.
+
+    ``variations`` (from variation_key) keeps two names with different
+    variation suffixes apart. Returns one integer group label per key.
+    """
+    keys = pd.Series(keys, dtype=object).reset_index(drop=True)
+    if len(keys) < 2:
+        return np.zeros(len(keys), dtype=np.int64)
+
+    vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(ngram_size, ngram_size),
+                                 lowercase=False, dtype=np.float32)
+    vectors = vectorizer.fit_transform(keys)
+    left, right = _similar_pairs(vectors, threshold, max_block_size, chunk_rows)
+    numbers = keys.str.findall(r'\d+').str.join(' ').to_numpy()
+    linked = numbers[left] == numbers[right]
+
+    # Only the few pairs that pass get the word-containment check
+    words = keys.map(_word_set).to_numpy()
+    variations = pd.Series('' if variations is None else list(variations), index=keys.index, dtype=object)
+    suffixes = variations.map(_word_set).to_numpy()
+    passing = np.flatnonzero(linked)
+    linked[passing] = [_nested(words[i], words[j])
+                       and (not suffixes[i] or not suffixes[j] or _nested(suffixes[i], suffixes[j]))
+                       for i, j in zip(left[passing], right[passing])]
+
+    graph = sparse.coo_matrix((np.ones(linked.sum(), dtype=np.int8), (left[linked], right[linked])),
+                              shape=(len(keys), len(keys)))
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+
+def build_catalog(names, counts=None, **match_kwargs):
+    """
+    Map product names to canonical products.
+
+    ``counts`` (rows per name) decides which spelling names each group;
+    without it the shortest spelling wins. Returns a DataFrame with
+    Product, Canonical_Product and Product_ID.
+    """
+    names = pd.Series(names, dtype=object).dropna().reset_index(drop=True)
+    counts = pd.Series(1 if counts is None else counts, index=names.index, dtype=np.int64)
+    frame = pd.DataFrame({'Product': names, 'Count': counts})
+    frame = frame.groupby('Product', sort=False, as_index=False)['Count'].sum()
+    frame['Key'] = canonical_key(frame['Product']).to_numpy()
+    frame['Variation'] = variation_key(frame['Product']).to_numpy()
+
+    # Exact key duplicates collapse for free; fuzzy matching runs on distinct keys
+    key_codes, keys = pd.factorize(frame['Key'])
+    variations = frame.groupby(key_codes)['Variation'].first().to_numpy()
+    frame['Group'] = match_products(keys, variations, **match_kwargs)[key_codes]
+
+    frame['Length'] = frame['Product'].str.len()
+    ranked = frame.sort_values(['Group', 'Count', 'Length', 'Product'],
+                               ascending=[True, False, True, True])
+    canonical = ranked.drop_duplicates('Group').set_index('Group')['Product']
+    frame['Canonical_Product'] = frame['Group'].map(canonical)
+    frame['Product_ID'] = pd.factorize(frame['Canonical_Product'], sort=True)[0].astype(np.int32)
+    return frame[['Product', 'Canonical_Product', 'Product_ID']].sort_values('Product').reset_index(drop=True)
+
+
+class ProductCatalog:
+    """Persisted product name -> canonical product mapping"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._canonical = pd.Series(catalog['Canonical_Product'].to_numpy(dtype=object),
+                                    index=catalog['Product'].to_numpy(dtype=object))
+        self._ids = pd.Series(catalog['Product_ID'].to_numpy(),
+                              index=catalog['Canonical_Product'].to_numpy(dtype=object))
+        self._ids = self._ids[~self._ids.index.duplicated()]
+
+    def __len__(self):
+        return len(self.catalog)
+
+    @property
+    def products(self):
+        """Canonical product names, indexed by Product_ID"""
+        return pd.Index(self._ids.sort_values().index, dtype=object)
+
+    def canonical(self, names):
+        """
+        Canonical name for each product name; unknown names pass through.
+
+        A packed single-item string ("2× Name | Free Shipping") is looked up by
+        its parsed line name.
+        """
+        names = pd.Series(names, dtype=object)
+        result = names.map(self._canonical)
+        missing = result.isna() & names.notna()
+        if missing.any():
+            lines = normalize_product_names(names[missing].str.extract(LINE_PATTERN)['product'])
+            result[missing] = lines.map(self._canonical)
+        return result.fillna(names)
+
+    def variants(self, name):
+        """Every catalogued spelling of name's canonical product (or just name)"""
+        product_id = self.product_ids([name]).iloc[0]
+        if product_id < 0:
+            return [name]
+        return self.catalog.loc[self.catalog['Product_ID'] == product_id, 'Product'].tolist()
+
+    def product_ids(self, names):
+        """Product_ID for each name (-1 when not in the catalog)"""
+        return self.canonical(names).map(self._ids).fillna(-1).astype(np.int32)
+
+    def save(self, path=CATALOG_PATH):
+        save_artifact(self.catalog, path)
+
+    @classmethod
+    def load(cls, path=CATALOG_PATH):
+        return cls(load_artifact(path))
+
+    @classmethod
+    def load_if_exists(cls, path=CATALOG_PATH):
+        """The persisted catalog, or None before the first build"""
+        return cls.load(path) if os.path.exists(artifact_source(path)) else None
+
+
+def catalog_from_line_items(line_items, **match_kwargs):
+    """Build the catalog over a LineItems product dictionary, weighted by usage"""
+    return ProductCatalog(build_catalog(line_items.products, line_items.product_counts(), **match_kwargs))
+
+
+def catalog_from_batches(batches, **match_kwargs):
+    """
+    Build the catalog over every line-item name in an iterable of transaction
+    batches (only Order # and Product(s) are read), weighted by usage.
+    """
+    counts = pd.Series(dtype=np.int64)
+    for batch in batches:
+        counts = counts.add(parse_order_lines(batch)['product'].value_counts(), fill_value=0)
+    return ProductCatalog(build_catalog(counts.index, counts.to_numpy(dtype=np.int64), **match_kwargs))
+
+
+def catalog_from_transactions(transactions, **match_kwargs):
+    """Build the catalog over every line-item name in a transaction frame"""
+    return catalog_from_batches([transactions], **match_kwargs)
+
+
+if __name__ == '__main__':
+    directory = sys.argv[1] if len(sys.argv) > 1 else PROCESSED_DIR
+    start = time.perf_counter()
+    transactions = load_artifact('transactions_clean', processed_dir=directory,
+                                 columns=['Order #', 'Product(s)'])
+    catalog = catalog_from_transactions(transactions)
+    catalog.save(os.path.join(directory, os.path.basename(CATALOG_PATH)))
+    print(f"✓ {len(catalog):,} product names -> {len(catalog.products):,} canonical products "
+          f"in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,188 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Vectorized, memoized product categorizer
+
+Product strings repeat heavily, so each distinct string is categorized once
+with a single compiled multi-keyword pattern and the result is broadcast back
+to every row through integer codes. With a product catalog (product_catalog.py)
+every spelling of a product gets the same category: the keyword rule is
+applied across all the spellings of its canonical product.
+
+Run this file directly to benchmark against the row-by-row categorizer
+(100,000 rows by default; the reference runs on at most REFERENCE_SAMPLE_SIZE
+rows and its time is extrapolated):
+    python product_categorizer.py 1000000 10000000
+"""
+
+import json
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Checked in order: the first category with any matching keyword wins
+DEFAULT_CATEGORY_KEYWORDS = {
+    'Poultry': ['chick', 'pullet', 'broiler', 'poultry', 'bird'],
+    'Seeds': ['seed', 'maize', 'corn', 'soybean', 'rice'],
+    'Feed': ['feed', 'concentrate', 'premix'],
+    'Fertilizer': ['fertilizer', 'npk', 'urea'],
+    'Agrochemicals': ['pesticide', 'herbicide', 'insecticide', 'fungicide'],
+    'Equipment': ['tractor', 'machine', 'equipment', 'processing', 'pump'],
+    'Vegetables': ['vegetable', 'tomato', 'pepper', 'cucumber', 'carrot'],
+    'Fruits': ['fruit', 'papaya', 'mango', 'watermelon'],
+}
+
+UNKNOWN_PRODUCT = 'Unknown Product'
+UNKNOWN_CATEGORY = 'Unknown'
+DEFAULT_CATEGORY = 'Other'
+
+# Default benchmark size; the row-by-row reference is timed on a sample
+BENCHMARK_SIZES = (100_000,)
+REFERENCE_SAMPLE_SIZE = 100_000
+
+
+def extract_product_category(product_text, keywords=DEFAULT_CATEGORY_KEYWORDS, catalog=None):
+    """Categorize a single product string (row-by-row reference implementation)"""
+    if pd.isna(product_text) or product_text == UNKNOWN_PRODUCT:
+        return UNKNOWN_CATEGORY
+
+    texts = catalog.variants(product_text) if catalog is not None else [product_text]
+    product_lower = ' | '.join(str(text) for text in texts).lower()
+    for category, words in keywords.items():
+        if any(word in product_lower for word in words):
+            return category
+    return DEFAULT_CATEGORY
+
+
+class ProductCategorizer:
+    """Categorize product strings by keyword, once per distinct string"""
+
+    def __init__(self, keywords=None, catalog=None):
+        self.keywords = dict(keywords or DEFAULT_CATEGORY_KEYWORDS)
+        self.catalog = catalog
+        self.categories = list(self.keywords)
+
+        # Keyword -> priority of its category (lower wins)
+        self._priority = {}
+        for priority, words in enumerate(self.keywords.values()):
+            for word in words:
+                self._priority.setdefault(word.lower(), priority)
+
+        # A lookahead finds every keyword occurrence, including overlapping
+        # ones; alternatives are in priority order so ties at a position go
+        # to the higher-priority category
+        alternatives = '|'.join(re.escape(word) for word in self._priority)
+        self.pattern = re.compile(f'(?=({alternatives}))')
+
+        # Distinct strings already categorized, reused across batches
+        self._memo = {}
+        self._product_labels = None
+
+    @classmethod
+    def from_json(cls, path):
+        """Build a categorizer from a JSON file mapping category -> keyword list"""
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def categorize_unique(self, products):
+        """Categorize an array of distinct, non-null product strings"""
+        labels = np.array(self.categories + [DEFAULT_CATEGORY], dtype=object)
+        if len(products) == 0:
+            return labels[:0]
+
+        lowered = pd.Series(products, dtype=object).str.lower()
+        matches = lowered.str.extractall(self.pattern)[0]
+        best = np.full(len(products), len(self.categories), dtype=np.int16)
+        if len(matches):
+            priority = matches.map(self._priority).groupby(level=0).min()
+            best[priority.index.to_numpy()] = priority.to_numpy()
+        return labels[best]
+
+    def product_labels(self):
+        """Product_ID -> category over all spellings in the catalog (first category wins)"""
+        if self._product_labels is None:
+            variants = self.catalog.catalog
+            labels = pd.Series(self.categorize_unique(variants['Product'].to_numpy(dtype=object)))
+            order = {label: rank for rank, label in enumerate(self.categories + [DEFAULT_CATEGORY])}
+            best = labels.map(order).groupby(variants['Product_ID'].to_numpy()).min()
+            self._product_labels = best.map(dict(enumerate(order)))
+        return self._product_labels
+
+    def categorize_pending(self, pending):
+        """Categorize distinct strings, by canonical product when a catalog is set"""
+        labels = pd.Series(self.categorize_unique(pending), dtype=object)
+        if self.catalog is not None and len(pending):
+            ids = self.catalog.product_ids(pending)
+            in_catalog = (ids >= 0).to_numpy()
+            labels[in_catalog] = ids[in_catalog].map(self.product_labels()).to_numpy()
+        return labels.to_numpy()
+
+    def categorize(self, products):
+        """Categorize a Series of product strings, returning a Series aligned to it"""
+        codes, uniques = pd.factorize(products, use_na_sentinel=True)
+        uniques = np.asarray(uniques, dtype=object)
+
+        known = uniques != UNKNOWN_PRODUCT
+        pending = np.array([p for p in uniques[known] if p not in self._memo], dtype=object)
+        if len(pending):
+            self._memo.update(zip(pending, self.categorize_pending(pending)))
+
+        unique_labels = np.full(len(uniques), UNKNOWN_CATEGORY, dtype=object)
+        unique_labels[known] = [self._memo[p] for p in uniques[known]]
+
+        # Missing products (code -1) map to the trailing Unknown label
+        lookup = np.append(unique_labels, UNKNOWN_CATEGORY)
+        index = products.index if isinstance(products, pd.Series) else None
+        return pd.Series(lookup[codes], index=index, name='Product_Category')
+
+
+def benchmark(products, sizes=BENCHMARK_SIZES, run_reference=True, seed=42,
+              reference_sample_size=REFERENCE_SAMPLE_SIZE):
+    """
+    Time ProductCategorizer against the row-by-row categorizer.
+
+    Rows are sampled with replacement from ``products`` so the benchmark keeps
+    the same repetition pattern as the real export. The row-by-row reference
+    only runs on the first ``reference_sample_size`` rows (it is checked
+    against the vectorized result there) and its time is scaled up linearly.
+    """
+    rng = np.random.default_rng(seed)
+    products = np.asarray(products, dtype=object)
+    results = []
+
+    for size in sizes:
+        # A fresh categorizer per size so the memo from earlier runs doesn't help
+        categorizer = ProductCategorizer()
+        sample = pd.Series(products[rng.integers(0, len(products), size)])
+
+        start = time.perf_counter()
+        fast = categorizer.categorize(sample)
+        fast_seconds = time.perf_counter() - start
+
+        reference_seconds = np.nan
+        reference_rows = min(size, reference_sample_size) if run_reference else 0
+        if reference_rows:
+            start = time.perf_counter()
+            reference = sample.iloc[:reference_rows].apply(extract_product_category)
+            reference_seconds = (time.perf_counter() - start) * size / reference_rows
+            if not (fast.to_numpy()[:reference_rows] == reference.to_numpy()).all():
+                raise AssertionError(f'Categorizer disagrees with reference at {size:,} rows')
+
+        results.append({
+            'Rows': size,
+            'Distinct_Products': sample.nunique(),
+            'Vectorized_Seconds': round(fast_seconds, 3),
+            'Reference_Rows': reference_rows,
+            'Row_By_Row_Seconds': round(reference_seconds, 3),
+            'Speedup': round(reference_seconds / fast_seconds, 1),
+        })
+
+    return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    sizes = tuple(int(arg) for arg in sys.argv[1:]) or BENCHMARK_SIZES
+    transactions = pd.read_csv('../data/processed/transactions_clean.csv', usecols=['Product(s)'])
+    print(benchmark(transactions['Product(s)'], sizes=sizes).to_string(index=False))
@@ -0,0 +1,716 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Figure renderers for the report stage
+
+Each renderer takes the data bundle staged by a pipeline script (see
+report_stage.stage_figure) and returns a matplotlib Figure. This is the only
+module that imports matplotlib/seaborn; it is loaded inside the report
+worker processes, never by the numeric pipeline.
+
+Customer-level scatter plots go through scatter_by_category /
+scatter_by_value, which switch to a rasterized density image
+(density_raster.py) for large populations so render time stays flat.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize, to_rgb
+
+from density_raster import DENSITY_MIN_POINTS, DensityGrid
+
+sns.set_style("whitegrid")
+plt.rcParams['figure.figsize'] = (16, 10)
+
+# 'auto' rasterizes scatter plots with more than DENSITY_MIN_POINTS points;
+# 'points' or 'density' force one mode (report_stage.py --scatter)
+SCATTER_MODE = 'auto'
+
+
+def _rasterize(n_points):
+    return SCATTER_MODE == 'density' or (SCATTER_MODE == 'auto' and n_points > DENSITY_MIN_POINTS)
+
+
+def _draw_density(ax, grid, image):
+    """
+    Show a density image. Its bins are evenly spaced on the final (linear or
+    log) axis, so it is drawn in axes coordinates with the limits pinned to
+    the grid edges; an image also stays out of the legend's 'best' search.
+    """
+    ax.imshow(image, origin='lower', extent=(0, 1, 0, 1), transform=ax.transAxes, aspect='auto',
+              interpolation='nearest', zorder=1)
+    ax.set_xlim(grid.x_edges[0], grid.x_edges[-1])
+    ax.set_ylim(grid.y_edges[0], grid.y_edges[-1])
+
+
+def scatter_by_category(ax, df, x, y, by, label_by=None, x_log=False, y_log=False, **scatter_kwargs):
+    """
+    One colour per category of ``by`` (legend labels from ``label_by``):
+    a scatter call per category, or one density image for large populations.
+    """
+    # First row per category only, so a string label column is never grouped in full
+    labels = df.drop_duplicates(by).set_index(by)[label_by] if label_by else None
+    if not _rasterize(len(df)):
+        for category in df[by].unique():
+            subset = df[df[by] == category]
+            ax.scatter(subset[x], subset[y], label=labels[category] if label_by else category, **scatter_kwargs)
+        return
+
+    grid = DensityGrid.from_points(df[x], df[y], categories=df[by], x_log=x_log, y_log=y_log)
+    cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    colors = [to_rgb(cycle[i % len(cycle)]) for i in range(len(grid.labels))]
+    _draw_density(ax, grid, grid.rgba(colors=colors))
+    # Empty scatters keep the legend the same as in points mode
+    for category, color in zip(grid.labels, colors):
+        ax.scatter([], [], color=color, s=scatter_kwargs.get('s'),
+                   label=labels[category] if label_by else category)
+
+
+def scatter_by_value(ax, x, y, values, cmap, x_log=False, y_log=False, **scatter_kwargs):
+    """
+    Points coloured by a value, or a density image of the mean value per
+    cell for large populations. Returns the mappable for a colorbar.
+    """
+    if not _rasterize(len(values)):
+        return ax.scatter(x, y, c=values, cmap=cmap, **scatter_kwargs)
+
+    cmap = plt.get_cmap(cmap)
+    grid = DensityGrid.from_points(x, y, values=values, x_log=x_log, y_log=y_log)
+    _draw_density(ax, grid, grid.rgba(cmap=cmap))
+    return ScalarMappable(norm=Normalize(*grid.value_range), cmap=cmap)
+
+
+# ============================================================================
+# 01 - DATA PREPARATION & EDA
+# ============================================================================
+
+def render_eda_dashboard(data):
+    rfm_df = data['rfm']
+    fig, axes = plt.subplots(3, 3, figsize=(20, 15))
+    fig.suptitle('AFRIMASH CUSTOMER INTELLIGENCE - EXPLORATORY DATA ANALYSIS', fontsize=20, fontweight='bold')
+
+    # Frequency Distribution
+    axes[0, 0].hist(rfm_df['Frequency'], bins=50, color='skyblue', edgecolor='black')
+    axes[0, 0].set_title('Frequency Distribution', fontsize=14, fontweight='bold')
+    axes[0, 0].set_xlabel('Number of Purchases')
+    axes[0, 0].set_ylabel('Number of Customers')
+    axes[0, 0].axvline(rfm_df['Frequency'].median(), color='red', linestyle='--', label=f'Median: {rfm_df["Frequency"].median():.0f}')
+    axes[0, 0].legend()
+
+    # Monetary Distribution (log scale)
+    axes[0, 1].hist(np.log10(rfm_df['Monetary'][rfm_df['Monetary'] > 0]), bins=50, color='lightgreen', edgecolor='black')
+    axes[0, 1].set_title('Monetary Value Distribution (Log Scale)', fontsize=14, fontweight='bold')
+    axes[0, 1].set_xlabel('Log10(Total Spent)')
+    axes[0, 1].set_ylabel('Number of Customers')
+
+    # Recency Distribution
+    axes[0, 2].hist(rfm_df['Recency'], bins=50, color='lightcoral', edgecolor='black')
+    axes[0, 2].set_title('Recency Distribution', fontsize=14, fontweight='bold')
+    axes[0, 2].set_xlabel('Days Since Last Purchase')
+    axes[0, 2].set_ylabel('Number of Customers')
+    axes[0, 2].axvline(90, color='red', linestyle='--', label='90 days (Churn threshold)')
+    axes[0, 2].legend()
+
+    # Customer Type
+    customer_type_counts = rfm_df['Customer_Type'].value_counts()
+    axes[1, 0].pie(customer_type_counts, labels=customer_type_counts.index, autopct='%1.1f%%',
+                   colors=['#ff9999', '#66b3ff'], startangle=90)
+    axes[1, 0].set_title('Customer Type Distribution', fontsize=14, fontweight='bold')
+
+    # Frequency Category
+    freq_cat = rfm_df['Frequency_Category'].value_counts()
+    axes[1, 1].bar(freq_cat.index, freq_cat.values, color='purple', alpha=0.7)
+    axes[1, 1].set_title('Frequency Categories', fontsize=14, fontweight='bold')
+    axes[1, 1].set_xlabel('Category')
+    axes[1, 1].set_ylabel('Number of Customers')
+    axes[1, 1].tick_params(axis='x', rotation=45)
+
+    # Recency Category
+    rec_cat = rfm_df['Recency_Category'].value_counts()
+    axes[1, 2].barh(rec_cat.index, rec_cat.values, color='orange', alpha=0.7)
+    axes[1, 2].set_title('Recency Categories', fontsize=14, fontweight='bold')
+    axes[1, 2].set_xlabel('Number of Customers')
+
+    # Product Categories
+    prod_cat = data['product_categories']
+    axes[2, 0].bar(prod_cat.index, prod_cat.values, color='teal', alpha=0.7)
+    axes[2, 0].set_title('Top Product Categories', fontsize=14, fontweight='bold')
+    axes[2, 0].set_xlabel('Category')
+    axes[2, 0].set_ylabel('Number of Transactions')
+    axes[2, 0].tick_params(axis='x', rotation=45)
+
+    # Monthly Revenue Trend
+    recent_months = data['monthly_revenue'].tail(24)
+    axes[2, 1].plot(range(len(recent_months)), recent_months.values, marker='o', color='green', linewidth=2)
+    axes[2, 1].set_title('Monthly Revenue Trend (Last 24 Months)', fontsize=14, fontweight='bold')
+    axes[2, 1].set_xlabel('Month')
+    axes[2, 1].set_ylabel('Revenue (₦)')
+    axes[2, 1].tick_params(axis='x', rotation=45)
+    axes[2, 1].grid(True, alpha=0.3)
+
+    # Revenue by Customer Type
+    customer_type_revenue = rfm_df.groupby('Customer_Type')['Monetary'].sum()
+    axes[2, 2].bar(customer_type_revenue.index, customer_type_revenue.values, color=['#ff9999', '#66b3ff'])
+    axes[2, 2].set_title('Total Revenue by Customer Type', fontsize=14, fontweight='bold')
+    axes[2, 2].set_xlabel('Customer Type')
+    axes[2, 2].set_ylabel('Total Revenue (₦)')
+
+    fig.tight_layout()
+    return fig
+
+
+def render_deep_dive_analysis(data):
+    rfm_df = data['rfm']
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    fig.suptitle('AFRIMASH DEEP DIVE ANALYSIS', fontsize=18, fontweight='bold')
+
+    # RFM Scatter Plot
+    scatter = scatter_by_value(axes[0, 0], rfm_df['Recency'], rfm_df['Frequency'],
+                               rfm_df['Monetary'], 'viridis', alpha=0.6, s=50)
+    axes[0, 0].set_title('RFM Analysis: Recency vs Frequency', fontsize=14, fontweight='bold')
+    axes[0, 0].set_xlabel('Recency (Days)')
+    axes[0, 0].set_ylabel('Frequency (Purchases)')
+    axes[0, 0].axvline(90, color='red', linestyle='--', alpha=0.5, label='90-day threshold')
+    axes[0, 0].legend()
+    fig.colorbar(scatter, ax=axes[0, 0], label='Monetary Value (₦)')
+
+    # Top 10 Revenue Products Category
+    cat_rev = data['category_revenue']
+    axes[0, 1].barh(cat_rev.index, cat_rev.values, color='coral')
+    axes[0, 1].set_title('Revenue by Product Category (Top 10)', fontsize=14, fontweight='bold')
+    axes[0, 1].set_xlabel('Total Revenue (₦)')
+
+    # Customer Lifetime Distribution
+    axes[1, 0].hist(rfm_df['Customer_Age_Days'], bins=50, color='mediumpurple', edgecolor='black')
+    axes[1, 0].set_title('Customer Lifetime Distribution', fontsize=14, fontweight='bold')
+    axes[1, 0].set_xlabel('Days Since First Purchase')
+    axes[1, 0].set_ylabel('Number of Customers')
+    axes[1, 0].axvline(rfm_df['Customer_Age_Days'].median(), color='red',
+                       linestyle='--', label=f'Median: {rfm_df["Customer_Age_Days"].median():.0f} days')
+    axes[1, 0].legend()
+
+    # Day of Week Analysis
+    day_trans = data['day_of_week']
+    axes[1, 1].bar(day_trans.index, day_trans.values, color='steelblue', alpha=0.7)
+    axes[1, 1].set_title('Transactions by Day of Week', fontsize=14, fontweight='bold')
+    axes[1, 1].set_xlabel('Day')
+    axes[1, 1].set_ylabel('Number of Transactions')
+    axes[1, 1].tick_params(axis='x', rotation=45)
+
+    fig.tight_layout()
+    return fig
+
+
+# ============================================================================
+# 02 - CUSTOMER SEGMENTATION
+# ============================================================================
+
+def render_rfm_segmentation(data):
+    rfm_df = data['rfm']
+    fig, axes = plt.subplots(3, 2, figsize=(20, 18))
+    fig.suptitle('AFRIMASH CUSTOMER SEGMENTATION ANALYSIS', fontsize=20, fontweight='bold', y=0.995)
+
+    # RFM Segment Distribution
+    ax = axes[0, 0]
+    segment_counts = rfm_df['RFM_Segment'].value_counts()
+    colors = plt.cm.Set3(range(len(segment_counts)))
+    segment_counts.plot(kind='barh', ax=ax, color=colors)
+    ax.set_title('Customer Distribution by RFM Segment', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Number of Customers')
+    ax.set_ylabel('Segment')
+    for i, v in enumerate(segment_counts.values):
+        ax.text(v, i, f' {v:,}', va='center')
+
+    # Revenue by RFM Segment
+    ax = axes[0, 1]
+    segment_revenue = rfm_df.groupby('RFM_Segment')['Monetary'].sum().sort_values(ascending=False)
+    segment_revenue_billions = segment_revenue / 1e9
+    colors = plt.cm.Set3(range(len(segment_revenue)))
+    segment_revenue_billions.plot(kind='barh', ax=ax, color=colors)
+    ax.set_title('Total Revenue by RFM Segment (₵ Billions)', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Revenue (₵B)')
+    ax.set_ylabel('Segment')
+    for i, v in enumerate(segment_revenue_billions.values):
+        ax.text(v, i, f' ₵{v:.2f}B', va='center')
+
+    # K-Means Cluster Distribution
+    ax = axes[1, 0]
+    cluster_counts = rfm_df['Cluster_Name'].value_counts()
+    colors = plt.cm.Pastel1(range(len(cluster_counts)))
+    cluster_counts.plot(kind='barh', ax=ax, color=colors)
+    ax.set_title('Customer Distribution by K-Means Cluster', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Number of Customers')
+    ax.set_ylabel('Cluster')
+    for i, v in enumerate(cluster_counts.values):
+        ax.text(v, i, f' {v:,}', va='center')
+
+    # Revenue by Cluster
+    ax = axes[1, 1]
+    cluster_revenue = rfm_df.groupby('Cluster_Name')['Monetary'].sum().sort_values(ascending=False)
+    cluster_revenue_billions = cluster_revenue / 1e9
+    colors = plt.cm.Pastel1(range(len(cluster_revenue)))
+    cluster_revenue_billions.plot(kind='barh', ax=ax, color=colors)
+    ax.set_title('Total Revenue by Cluster (₵ Billions)', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Revenue (₵B)')
+    ax.set_ylabel('Cluster')
+    for i, v in enumerate(cluster_revenue_billions.values):
+        ax.text(v, i, f' ₵{v:.2f}B', va='center')
+
+    # RFM Score Distribution
+    ax = axes[2, 0]
+    rfm_df['RFM_Score'].hist(bins=range(3, 16), ax=ax, color='skyblue', edgecolor='black')
+    ax.set_title('RFM Score Distribution', fontsize=14, fontweight='bold')
+    ax.set_xlabel('RFM Score')
+    ax.set_ylabel('Number of Customers')
+    ax.axvline(rfm_df['RFM_Score'].mean(), color='red', linestyle='--', linewidth=2, label=f'Mean: {rfm_df["RFM_Score"].mean():.1f}')
+    ax.legend()
+
+    # Scatter: Recency vs Monetary by Segment
+    ax = axes[2, 1]
+    scatter_by_category(ax, rfm_df, 'Recency', 'Monetary', 'RFM_Segment', y_log=True, alpha=0.6, s=50)
+    ax.set_title('Recency vs Monetary Value by RFM Segment', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Recency (Days)')
+    ax.set_ylabel('Monetary Value (₵)')
+    ax.set_yscale('log')
+    ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=8)
+    ax.grid(True, alpha=0.3)
+
+    fig.tight_layout()
+    return fig
+
+
+def render_kmeans_clustering(data):
+    rfm_df = data['rfm']
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    fig.suptitle('K-MEANS CLUSTERING ANALYSIS', fontsize=18, fontweight='bold')
+
+    # Scatter plots for different feature combinations
+    feature_pairs = [
+        ('Recency', 'Frequency'),
+        ('Recency', 'Monetary'),
+        ('Frequency', 'Monetary'),
+        ('Avg_Order_Value', 'Purchase_Rate')
+    ]
+
+    for idx, (feat1, feat2) in enumerate(feature_pairs):
+        ax = axes[idx // 2, idx % 2]
+        scatter_by_category(ax, rfm_df, feat1, feat2, 'Cluster', label_by='Cluster_Name',
+                            y_log=feat2 == 'Monetary', alpha=0.6, s=30)
+
+        ax.set_xlabel(feat1, fontsize=11)
+        ax.set_ylabel(feat2, fontsize=11)
+        ax.set_title(f'{feat1} vs {feat2}', fontsize=12, fontweight='bold')
+        ax.legend(fontsize=8)
+        ax.grid(True, alpha=0.3)
+
+        if feat2 == 'Monetary':
+            ax.set_yscale('log')
+
+    fig.tight_layout()
+    return fig
+
+
+def render_segment_comparison(data):
+    rfm_df = data['rfm']
+    fig, axes = plt.subplots(2, 2, figsize=(18, 12))
+    fig.suptitle('SEGMENT COMPARISON: RFM vs K-MEANS', fontsize=18, fontweight='bold')
+
+    # Compare key metrics
+    metrics = ['Recency', 'Frequency', 'Monetary', 'Avg_Order_Value']
+
+    for idx, metric in enumerate(metrics):
+        ax = axes[idx // 2, idx % 2]
+
+        # RFM segments
+        rfm_means = rfm_df.groupby('RFM_Segment')[metric].mean().sort_values()
+
+        rfm_means.plot(kind='barh', ax=ax, color='steelblue', alpha=0.7)
+        ax.set_title(f'Average {metric} by RFM Segment', fontsize=12, fontweight='bold')
+        ax.set_xlabel(f'Average {metric}')
+
+        if metric == 'Monetary':
+            ax.set_xlabel(f'Average {metric} (₵)')
+
+    fig.tight_layout()
+    return fig
+
+
+# ============================================================================
+# 03 - PREDICTIVE MODELING
+# ============================================================================
+
+def render_churn_prediction_analysis(data):
+    rfm_df = data['rfm']
+    fig, axes = plt.subplots(2, 3, figsize=(20, 12))
+    fig.suptitle('CHURN PREDICTION ANALYSIS', fontsize=20, fontweight='bold')
+
+    # Churn Distribution
+    ax = axes[0, 0]
+    churn_dist = rfm_df['Is_Churned'].value_counts()
+    colors = ['#28a745', '#dc3545']
+    ax.pie(churn_dist.values, labels=['Active', 'Churned'], autopct='%1.1f%%',
+           colors=colors, startangle=90)
+    ax.set_title('Churn Distribution', fontsize=14, fontweight='bold')
+
+    # ROC Curve
+    ax = axes[0, 1]
+    ax.plot(data['fpr'], data['tpr'], color='darkorange', lw=2, label=f'ROC curve (AUC = {data["auc_roc"]:.3f})')
+    ax.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--', label='Random')
+    ax.set_xlabel('False Positive Rate')
+    ax.set_ylabel('True Positive Rate')
+    ax.set_title('ROC Curve - Churn Prediction', fontsize=14, fontweight='bold')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    # Feature Importance - Churn
+    ax = axes[0, 2]
+    feature_importance_churn = data['feature_importance']
+    ax.barh(range(len(feature_importance_churn)), feature_importance_churn['Importance'])
+    ax.set_yticks(range(len(feature_importance_churn)))
+    ax.set_yticklabels(feature_importance_churn['Feature'])
+    ax.set_xlabel('Importance')
+    ax.set_title('Top 10 Features - Churn Prediction', fontsize=14, fontweight='bold')
+    ax.invert_yaxis()
+
+    # Churn Risk Distribution
+    ax = axes[1, 0]
+    risk_counts = rfm_df['Churn_Risk_Level'].value_counts()
+    risk_order = ['Low', 'Medium', 'High', 'Critical']
+    risk_counts = risk_counts.reindex(risk_order, fill_value=0)
+    risk_colors = {'Low': '#28a745', 'Medium': '#ffc107', 'High': '#fd7e14', 'Critical': '#dc3545'}
+    colors = [risk_colors[x] for x in risk_order]
+    ax.bar(risk_order, risk_counts.values, color=colors)
+    ax.set_title('Churn Risk Level Distribution', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Number of Customers')
+    for i, v in enumerate(risk_counts.values):
+        ax.text(i, v, f'{v:,}', ha='center', va='bottom')
+
+    # Churn Probability Distribution
+    ax = axes[1, 1]
+    ax.hist(rfm_df['Churn_Probability'], bins=50, color='steelblue', edgecolor='black', alpha=0.7)
+    ax.axvline(0.5, color='red', linestyle='--', linewidth=2, label='50% Threshold')
+    ax.set_xlabel('Churn Probability')
+    ax.set_ylabel('Number of Customers')
+    ax.set_title('Churn Probability Distribution', fontsize=14, fontweight='bold')
+    ax.legend()
+
+    # Confusion Matrix
+    ax = axes[1, 2]
+    sns.heatmap(data['confusion_matrix'], annot=True, fmt='d', cmap='Blues', ax=ax, cbar=False)
+    ax.set_xlabel('Predicted')
+    ax.set_ylabel('Actual')
+    ax.set_title('Confusion Matrix', fontsize=14, fontweight='bold')
+
+    fig.tight_layout()
+    return fig
+
+
+def render_clv_prediction_analysis(data):
+    rfm_df = data['rfm']
+    y_test_clv, y_pred_clv = data['y_test'], data['y_pred']
+    fig, axes = plt.subplots(2, 3, figsize=(20, 12))
+    fig.suptitle('CLV PREDICTION ANALYSIS', fontsize=20, fontweight='bold')
+
+    # CLV Category Distribution
+    ax = axes[0, 0]
+    clv_counts = rfm_df['CLV_Category'].value_counts()
+    colors = plt.cm.RdYlGn(np.linspace(0.2, 0.8, len(clv_counts)))
+    clv_counts.plot(kind='bar', ax=ax, color=colors)
+    ax.set_title('CLV Category Distribution', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Number of Customers')
+    ax.set_xlabel('CLV Category')
+    plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+    for i, v in enumerate(clv_counts.values):
+        ax.text(i, v, f'{v:,}', ha='center', va='bottom')
+
+    # Actual vs Predicted CLV
+    ax = axes[0, 1]
+    sample_indices = np.random.choice(len(y_test_clv), min(1000, len(y_test_clv)), replace=False)
+    ax.scatter(y_test_clv[sample_indices], y_pred_clv[sample_indices],
+               alpha=0.5, s=20, color='steelblue')
+    ax.plot([y_test_clv.min(), y_test_clv.max()],
+            [y_test_clv.min(), y_test_clv.max()],
+            'r--', lw=2, label='Perfect Prediction')
+    ax.set_xlabel('Actual CLV (₵)')
+    ax.set_ylabel('Predicted CLV (₵)')
+    ax.set_title(f'Actual vs Predicted CLV (R² = {data["r2"]:.3f})', fontsize=14, fontweight='bold')
+    ax.legend()
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.grid(True, alpha=0.3)
+
+    # Feature Importance - CLV
+    ax = axes[0, 2]
+    feature_importance_clv = data['feature_importance']
+    ax.barh(range(len(feature_importance_clv)), feature_importance_clv['Importance'], color='green', alpha=0.7)
+    ax.set_yticks(range(len(feature_importance_clv)))
+    ax.set_yticklabels(feature_importance_clv['Feature'])
+    ax.set_xlabel('Importance')
+    ax.set_title('Top 10 Features - CLV Prediction', fontsize=14, fontweight='bold')
+    ax.invert_yaxis()
+
+    # CLV Distribution
+    ax = axes[1, 0]
+    ax.hist(rfm_df['Predicted_CLV'], bins=50, color='green', edgecolor='black', alpha=0.7)
+    ax.set_xlabel('Predicted CLV (₵)')
+    ax.set_ylabel('Number of Customers')
+    ax.set_title('Predicted CLV Distribution', fontsize=14, fontweight='bold')
+    ax.set_xscale('log')
+    ax.axvline(rfm_df['Predicted_CLV'].median(), color='red', linestyle='--',
+               linewidth=2, label=f'Median: ₵{rfm_df["Predicted_CLV"].median()/1e6:.2f}M')
+    ax.legend()
+
+    # CLV vs Churn Matrix
+    ax = axes[1, 1]
+    scatter = scatter_by_value(ax, rfm_df['Churn_Probability'], rfm_df['Predicted_CLV'],
+                               rfm_df['Customer_Value_Score'], 'RdYlGn_r', y_log=True, alpha=0.6, s=30)
+    ax.set_xlabel('Churn Probability')
+    ax.set_ylabel('Predicted CLV (₵)')
+    ax.set_title('CLV vs Churn Risk Matrix', fontsize=14, fontweight='bold')
+    ax.set_yscale('log')
+    ax.axvline(0.5, color='red', linestyle='--', linewidth=1, alpha=0.5)
+    ax.axhline(rfm_df['Predicted_CLV'].median(), color='blue', linestyle='--', linewidth=1, alpha=0.5)
+    fig.colorbar(scatter, ax=ax, label='Priority Score')
+    ax.grid(True, alpha=0.3)
+
+    # Purchase Timing Status
+    ax = axes[1, 2]
+    timing_counts = rfm_df['Purchase_Timing_Status'].value_counts()
+    colors = plt.cm.Spectral(np.linspace(0, 1, len(timing_counts)))
+    timing_counts.plot(kind='barh', ax=ax, color=colors)
+    ax.set_title('Purchase Timing Status', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Number of Customers')
+    for i, v in enumerate(timing_counts.values):
+        ax.text(v, i, f' {v:,}', va='center')
+
+    fig.tight_layout()
+    return fig
+
+
+def render_customer_priority_matrix(data):
+    rfm_df = data['rfm']
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    fig.suptitle('CUSTOMER PRIORITY MATRIX', fontsize=18, fontweight='bold')
+
+    # Priority Distribution
+    ax = axes[0, 0]
+    priority_counts = rfm_df['Customer_Priority'].value_counts()
+    colors = {'CRITICAL': '#dc3545', 'High': '#fd7e14', 'Medium': '#ffc107', 'Low': '#28a745'}
+    priority_colors = [colors.get(p, '#6c757d') for p in priority_counts.index]
+    priority_counts.plot(kind='bar', ax=ax, color=priority_colors)
+    ax.set_title('Customer Priority Distribution', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Number of Customers')
+    plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+    for i, v in enumerate(priority_counts.values):
+        ax.text(i, v, f'{v:,}', ha='center', va='bottom')
+
+    # Priority by Revenue
+    ax = axes[0, 1]
+    priority_revenue = rfm_df.groupby('Customer_Priority')['Monetary'].sum() / 1e9
+    priority_revenue.plot(kind='bar', ax=ax, color=priority_colors)
+    ax.set_title('Total Revenue by Priority (₵ Billions)', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Revenue (₵B)')
+    plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+    for i, v in enumerate(priority_revenue.values):
+        ax.text(i, v, f'₵{v:.2f}B', ha='center', va='bottom')
+
+    # Top 20 High Priority Customers
+    ax = axes[1, 0]
+    top_priority = rfm_df.nlargest(20, 'Customer_Value_Score')[['Customer_ID', 'Customer_Value_Score']]
+    ax.barh(range(len(top_priority)), top_priority['Customer_Value_Score'], color='darkred', alpha=0.7)
+    ax.set_yticks(range(len(top_priority)))
+    ax.set_yticklabels(top_priority['Customer_ID'].values)
+    ax.set_xlabel('Priority Score')
+    ax.set_title('Top 20 Highest Priority Customers', fontsize=14, fontweight='bold')
+    ax.invert_yaxis()
+
+    # Quadrant Analysis
+    ax = axes[1, 1]
+    high_clv_threshold = rfm_df['Predicted_CLV'].quantile(0.75)
+    high_churn_threshold = 0.5
+
+    scatter_by_category(ax, rfm_df, 'Churn_Probability', 'Predicted_CLV', 'Customer_Priority',
+                        y_log=True, alpha=0.6, s=30)
+
+    ax.axvline(high_churn_threshold, color='red', linestyle='--', linewidth=1, alpha=0.5)
+    ax.axhline(high_clv_threshold, color='blue', linestyle='--', linewidth=1, alpha=0.5)
+    ax.set_xlabel('Churn Probability')
+    ax.set_ylabel('Predicted CLV (₵)')
+    ax.set_title('Customer Segmentation Quadrant', fontsize=14, fontweight='bold')
+    ax.set_yscale('log')
+    ax.legend(fontsize=8)
+    ax.grid(True, alpha=0.3)
+
+    # Add quadrant labels
+    ax.text(0.25, high_clv_threshold*2, 'Protect\n(High Value, Low Churn)',
+            ha='center', va='center', fontsize=10, bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.5))
+    ax.text(0.75, high_clv_threshold*2, 'CRITICAL\n(High Value, High Churn)',
+            ha='center', va='center', fontsize=10, bbox=dict(boxstyle='round', facecolor='lightcoral', alpha=0.5))
+
+    fig.tight_layout()
+    return fig
+
+
+# ============================================================================
+# 04 - RECOMMENDATION ENGINE
+# ============================================================================
+
+def render_recommendation_analysis(data):
+    recommendations_df = data['recommendations']
+    association_rules = data['association_rules']
+    cross_sell_df = data['cross_sell']
+    rfm_df = data['rfm']
+    fig, axes = plt.subplots(2, 3, figsize=(20, 12))
+    fig.suptitle('PRODUCT RECOMMENDATION ANALYSIS', fontsize=20, fontweight='bold')
+
+    # Top Recommended Categories
+    ax = axes[0, 0]
+    if len(recommendations_df) > 0:
+        top_categories = recommendations_df['Recommended_Category'].value_counts().head(10)
+        colors = plt.cm.Set3(range(len(top_categories)))
+        top_categories.plot(kind='barh', ax=ax, color=colors)
+        ax.set_title('Top 10 Recommended Categories', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Recommendations')
+        for i, v in enumerate(top_categories.values):
+            ax.text(v, i, f' {v:,}', va='center')
+
+    # Recommendation Method Distribution
+    ax = axes[0, 1]
+    if len(recommendations_df) > 0:
+        method_dist = recommendations_df['Reason'].value_counts()
+        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1']
+        ax.pie(method_dist.values, labels=method_dist.index, autopct='%1.1f%%',
+               colors=colors[:len(method_dist)], startangle=90)
+        ax.set_title('Recommendation Method Distribution', fontsize=14, fontweight='bold')
+
+    # Confidence Distribution
+    ax = axes[0, 2]
+    if len(recommendations_df) > 0:
+        ax.hist(recommendations_df['Confidence'], bins=30, color='steelblue', edgecolor='black', alpha=0.7)
+        ax.axvline(0.7, color='red', linestyle='--', linewidth=2, label='High Confidence (0.7)')
+        ax.set_xlabel('Confidence Score')
+        ax.set_ylabel('Number of Recommendations')
+        ax.set_title('Recommendation Confidence Distribution', fontsize=14, fontweight='bold')
+        ax.legend()
+
+    # Association Rules - Top Pairs
+    ax = axes[1, 0]
+    if len(association_rules) > 0:
+        top_rules = association_rules.nlargest(10, 'Lift')
+        rule_labels = [f"{row['Antecedent']}\n→ {row['Consequent']}" for _, row in top_rules.iterrows()]
+        y_pos = range(len(rule_labels))
+        ax.barh(y_pos, top_rules['Lift'].values, color='green', alpha=0.7)
+        ax.set_yticks(y_pos)
+        ax.set_yticklabels(rule_labels, fontsize=9)
+        ax.set_xlabel('Lift')
+        ax.set_title('Top 10 Product Associations (by Lift)', fontsize=14, fontweight='bold')
+        ax.invert_yaxis()
+
+    # Cross-sell Potential by Segment
+    ax = axes[1, 1]
+    if len(cross_sell_df) > 0 and 'RFM_Segment' in cross_sell_df.columns:
+        segment_potential = cross_sell_df.groupby('RFM_Segment')['Potential_Value'].sum() / 1e9
+        segment_potential = segment_potential.sort_values(ascending=False)
+        colors = plt.cm.Pastel1(range(len(segment_potential)))
+        segment_potential.plot(kind='bar', ax=ax, color=colors)
+        ax.set_title('Cross-sell Potential by Segment (₵B)', fontsize=14, fontweight='bold')
+        ax.set_ylabel('Potential Revenue (₵B)')
+        ax.set_xlabel('Segment')
+        plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+        for i, v in enumerate(segment_potential.values):
+            ax.text(i, v, f'₵{v:.2f}B', ha='center', va='bottom')
+
+    # Recommendations by Customer CLV
+    ax = axes[1, 2]
+    if len(recommendations_df) > 0:
+        # Merge with customer CLV
+        recs_with_clv = recommendations_df.merge(
+            rfm_df[['Customer_ID', 'Predicted_CLV', 'CLV_Category']],
+            on='Customer_ID',
+            how='left'
+        )
+
+        if 'CLV_Category' in recs_with_clv.columns:
+            clv_recs = recs_with_clv['CLV_Category'].value_counts()
+            colors = plt.cm.RdYlGn(np.linspace(0.2, 0.8, len(clv_recs)))
+            clv_recs.plot(kind='bar', ax=ax, color=colors)
+            ax.set_title('Recommendations by Customer CLV Category', fontsize=14, fontweight='bold')
+            ax.set_ylabel('Number of Recommendations')
+            ax.set_xlabel('CLV Category')
+            plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+
+    fig.tight_layout()
+    return fig
+
+
+def render_cross_sell_opportunities(data):
+    cross_sell_df = data['cross_sell']
+    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    fig.suptitle('CROSS-SELL OPPORTUNITIES ANALYSIS', fontsize=18, fontweight='bold')
+
+    # Top Cross-sell Opportunities
+    ax = axes[0, 0]
+    if len(cross_sell_df) > 0:
+        top_cross_sell = cross_sell_df.nlargest(20, 'Potential_Value')
+        ax.barh(range(len(top_cross_sell)), top_cross_sell['Potential_Value']/1e6, color='darkgreen', alpha=0.7)
+        ax.set_yticks(range(len(top_cross_sell)))
+        ax.set_yticklabels(top_cross_sell['Customer_ID'].values, fontsize=8)
+        ax.set_xlabel('Potential Value (₵M)')
+        ax.set_title('Top 20 Cross-sell Opportunities', fontsize=14, fontweight='bold')
+        ax.invert_yaxis()
+
+    # Cross-sell by Current Categories
+    ax = axes[0, 1]
+    if len(cross_sell_df) > 0:
+        category_dist = cross_sell_df['Current_Categories'].value_counts().sort_index()
+        ax.bar(category_dist.index, category_dist.values, color='teal', alpha=0.7)
+        ax.set_xlabel('Number of Current Categories')
+        ax.set_ylabel('Number of Customers')
+        ax.set_title('Cross-sell Customers by Current Category Count', fontsize=14, fontweight='bold')
+        for i, v in enumerate(category_dist.values):
+            ax.text(category_dist.index[i], v, f'{v:,}', ha='center', va='bottom')
+
+    # Recommended Categories for Cross-sell
+    ax = axes[1, 0]
+    if len(cross_sell_df) > 0:
+        rec_categories = cross_sell_df['Recommended_Category'].value_counts().head(10)
+        colors = plt.cm.Paired(range(len(rec_categories)))
+        rec_categories.plot(kind='barh', ax=ax, color=colors)
+        ax.set_title('Top Categories for Cross-sell', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Number of Opportunities')
+        for i, v in enumerate(rec_categories.values):
+            ax.text(v, i, f' {v:,}', va='center')
+
+    # CLV vs Cross-sell Confidence
+    ax = axes[1, 1]
+    if len(cross_sell_df) > 0:
+        scatter = scatter_by_value(ax, cross_sell_df['Confidence'], cross_sell_df['Predicted_CLV'],
+                                   cross_sell_df['Potential_Value'], 'viridis', y_log=True, alpha=0.6, s=50)
+        ax.set_xlabel('Recommendation Confidence')
+        ax.set_ylabel('Predicted CLV (₵)')
+        ax.set_title('CLV vs Recommendation Confidence', fontsize=14, fontweight='bold')
+        ax.set_yscale('log')
+        fig.colorbar(scatter, ax=ax, label='Potential Value (₵)')
+        ax.grid(True, alpha=0.3)
+
+    fig.tight_layout()
+    return fig
+
+
+# Figure name (as passed to stage_figure) -> renderer
+FIGURES = {
+    'eda_dashboard': render_eda_dashboard,
+    'deep_dive_analysis': render_deep_dive_analysis,
+    'rfm_segmentation': render_rfm_segmentation,
+    'kmeans_clustering': render_kmeans_clustering,
+    'segment_comparison': render_segment_comparison,
+    'churn_prediction_analysis': render_churn_prediction_analysis,
+    'clv_prediction_analysis': render_clv_prediction_analysis,
+    'customer_priority_matrix': render_customer_priority_matrix,
+    'recommendation_analysis': render_recommendation_analysis,
+    'cross_sell_opportunities': render_cross_sell_opportunities,
+}
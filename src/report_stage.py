@@ -0,0 +1,175 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Parallel, cached report rendering stage
+
+The numeric scripts (01-04) no longer draw anything. They stage each figure's
+(already aggregated) input data as a small pickle next to its output, and this
+stage renders the PNGs in a process pool. A figure is only redrawn when its
+staged data, the renderer code or the DPI changed since the last render, and
+--preview writes quick low-DPI copies for iterating on the numbers.
+--scatter picks point markers or density images for customer scatter plots
+(default: density images above report_figures' point threshold).
+
+matplotlib is imported only by the worker processes (via report_figures).
+
+Usage (from src/):
+    python report_stage.py                      # figure_data/ (scripts 02-04)
+    python report_stage.py /home/claude/figure_data --preview
+    python report_stage.py --scatter density    # rasterize every customer scatter
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from ingestion_cache import file_digest
+
+FIGURE_DATA_DIR = 'figure_data'
+MANIFEST_NAME = 'render_manifest.json'
+# Renderer code: a change to either file re-renders every figure
+RENDERER_PATHS = [os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+                  for name in ('report_figures.py', 'density_raster.py')]
+
+FULL_DPI = 300
+PREVIEW_DPI = 72
+SCATTER_MODES = ('auto', 'points', 'density')
+
+
+def stage_figure(name, output, data, figure_dir=FIGURE_DATA_DIR):
+    """
+    Save the input data of one figure for the report stage.
+
+    output is where the full-resolution PNG goes; data is the dict the
+    matching renderer in report_figures.FIGURES expects. The bundle is only
+    rewritten when its contents changed.
+    """
+    os.makedirs(figure_dir, exist_ok=True)
+    bundle = pickle.dumps({'name': name, 'output': os.path.abspath(output), 'data': data},
+                          protocol=pickle.HIGHEST_PROTOCOL)
+    path = os.path.join(figure_dir, f'{name}.pkl')
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == bundle:
+                return path
+    with open(path, 'wb') as f:
+        f.write(bundle)
+    return path
+
+
+def preview_path(output):
+    stem, ext = os.path.splitext(output)
+    return f'{stem}_preview{ext}'
+
+
+def _read_manifest(manifest_path):
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_manifest(manifest_path, manifest):
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def _render_one(bundle_path, output, dpi, scatter_mode='auto'):
+    """Worker: draw one staged figure and save it"""
+    import matplotlib.pyplot as plt
+    import report_figures
+    from report_figures import FIGURES
+
+    report_figures.SCATTER_MODE = scatter_mode
+    start = time.perf_counter()
+    with open(bundle_path, 'rb') as f:
+        bundle = pickle.load(f)
+    fig = FIGURES[bundle['name']](bundle['data'])
+    fig.savefig(output, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return time.perf_counter() - start
+
+
+def render_figures(figure_dir=FIGURE_DATA_DIR, preview=False, workers=None, force=False, names=None,
+                   scatter_mode='auto'):
+    """
+    Render every staged figure in figure_dir whose inputs changed.
+
+    Returns one row per figure with its status (rendered / cached) and time.
+    """
+    dpi = PREVIEW_DPI if preview else FULL_DPI
+    mode = 'preview' if preview else 'full'
+    renderer_digest = ''.join(file_digest(path) for path in RENDERER_PATHS)
+    manifest_path = os.path.join(figure_dir, MANIFEST_NAME)
+    manifest = _read_manifest(manifest_path)
+
+    pending, rows = [], []
+    for entry in sorted(os.listdir(figure_dir)):
+        if not entry.endswith('.pkl'):
+            continue
+        name = entry[:-len('.pkl')]
+        if names and name not in names:
+            continue
+        bundle_path = os.path.join(figure_dir, entry)
+        with open(bundle_path, 'rb') as f:
+            output = pickle.load(f)['output']
+        if preview:
+            output = preview_path(output)
+
+        digest = hashlib.sha256()
+        digest.update(renderer_digest.encode())
+        digest.update(f'{dpi}:{scatter_mode}'.encode())
+        digest.update(file_digest(bundle_path).encode())
+        digest = digest.hexdigest()
+
+        key = f'{name}:{mode}'
+        cached = manifest.get(key, {})
+        if not force and cached.get('digest') == digest and os.path.exists(output):
+            rows.append({'Figure': name, 'Output': output, 'Status': 'cached', 'Seconds': 0.0})
+        else:
+            pending.append((key, name, bundle_path, output, digest))
+
+    if pending:
+        workers = workers or min(len(pending), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_render_one, bundle_path, output, dpi, scatter_mode)
+                       for _, _, bundle_path, output, _ in pending]
+            for (key, name, _, output, digest), future in zip(pending, futures):
+                seconds = future.result()
+                manifest[key] = {'digest': digest, 'output': output}
+                rows.append({'Figure': name, 'Output': output, 'Status': 'rendered',
+                             'Seconds': round(seconds, 2)})
+        _write_manifest(manifest_path, manifest)
+
+    return pd.DataFrame(rows, columns=['Figure', 'Output', 'Status', 'Seconds'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render the staged report figures')
+    parser.add_argument('figure_dirs', nargs='*', default=[FIGURE_DATA_DIR],
+                        help='directories written by stage_figure')
+    parser.add_argument('--preview', action='store_true', help=f'render at {PREVIEW_DPI} dpi')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--force', action='store_true', help='re-render unchanged figures')
+    parser.add_argument('--scatter', choices=SCATTER_MODES, default='auto',
+                        help='customer scatter plots as points, density images, or by size (auto)')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("AFRIMASH REPORT RENDERING")
+    print("="*80)
+
+    start = time.perf_counter()
+    for figure_dir in args.figure_dirs:
+        summary = render_figures(figure_dir, preview=args.preview, workers=args.workers, force=args.force,
+                                 scatter_mode=args.scatter)
+        for _, row in summary.iterrows():
+            mark = '✓' if row['Status'] == 'rendered' else '•'
+            print(f"{mark} {row['Status']:<8} {os.path.basename(row['Output'])} ({row['Seconds']:.2f}s)")
+    print(f"\n✓ Report stage finished in {time.perf_counter() - start:.2f}s")
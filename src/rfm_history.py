@@ -0,0 +1,240 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Month-end RFM snapshot history and segment transitions
+
+rfm_segmented.csv only holds the latest run. This module rebuilds each
+customer's R/F/M scores, RFM segment and K-Means cluster as of every month
+end from the order history. It scores with the current run's frozen
+breakpoints, segment rules and cluster model, so snapshots are comparable.
+
+Orders are sorted by customer and date once and turned into running
+per-customer sums (orders, net sales); a snapshot then finds every
+customer's last order before the cutoff with one np.searchsorted. Only rows
+whose scores, segment or cluster changed since the customer's previous
+snapshot are stored, as int-coded columns in rfm_history.npz, sorted by
+customer and snapshot. A customer's state at a snapshot is the last of
+their rows at or before it, found with a few boolean passes over the rows.
+
+Usage (from src/):
+    python rfm_history.py                   # build from transactions_clean, show the last transition
+    python rfm_history.py 2024-06 2024-12   # transition matrix between two month ends
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from schema import CUSTOMER_KEY, customer_keys, load_artifact
+
+HISTORY_PATH = 'rfm_history.npz'
+STATE_COLUMNS = ['R_Score', 'F_Score', 'M_Score', 'Segment', 'Cluster']
+NEW_CUSTOMER = 'New'
+
+
+class RFMHistory:
+    """Changed-rows-only month-end history of R/F/M scores, segment and cluster codes"""
+
+    def __init__(self, months, customers, segments, cluster_names, snapshot, customer, state, metadata=None):
+        self.months = pd.PeriodIndex(months, freq='M')
+        self.customers = pd.Index(customers, dtype=object)
+        self.segments = list(segments)
+        self.cluster_names = list(cluster_names)
+        self.snapshot = np.asarray(snapshot, dtype=np.int16)
+        self.customer = np.asarray(customer, dtype=np.int32)
+        self.state = np.asarray(state, dtype=np.int8).reshape(-1, len(STATE_COLUMNS))
+        self.metadata = dict(metadata or {})
+        # Rows are sorted by customer, then snapshot: flag rows followed by
+        # another row of the same customer
+        self._continues = np.append(self.customer[1:] == self.customer[:-1], False)
+
+    def __len__(self):
+        return len(self.customer)
+
+    @classmethod
+    def build(cls, transactions, breakpoints, segmenter, cluster_model=None):
+        """
+        Snapshot every month end from the first to the last order's month.
+
+        ``transactions`` needs Customer_ID, Order #, Date and Net_Sales;
+        ``breakpoints`` is an RFMBreakpoints, ``segmenter`` an RFMSegmenter
+        and ``cluster_model`` an optional ClusterModel (cluster codes are -1
+        without one).
+        """
+        orders = transactions.drop_duplicates('Order #')
+        customer_codes, customers = pd.factorize(orders['Customer_ID'], sort=True)
+        dates = orders['Date'].to_numpy(dtype='datetime64[ns]')
+        order = np.lexsort((dates, customer_codes))
+        customer_codes, dates = customer_codes[order], dates[order]
+        net_sales = orders['Net_Sales'].to_numpy(dtype=np.float64)[order]
+        n_customers = len(customers)
+        # Frequency ties are broken by customer key; parse the IDs once
+        keys = customer_keys(pd.Series(customers))
+
+        # Running per-customer sums over the sorted orders
+        starts = np.searchsorted(customer_codes, np.arange(n_customers))
+        cumulative_orders = np.arange(len(order)) - starts[customer_codes] + 1
+        cumulative_sales = pd.Series(net_sales).groupby(customer_codes, sort=False).cumsum().to_numpy()
+        first_dates = dates[starts]
+
+        months = pd.period_range(dates.min(), dates.max(), freq='M') if len(dates) else pd.PeriodIndex([], freq='M')
+        order_months = (dates.astype('datetime64[M]') - np.datetime64(months[0].start_time, 'M')).astype(np.int64) \
+            if len(dates) else np.empty(0, dtype=np.int64)
+        key = customer_codes.astype(np.int64) * len(months) + order_months
+        query = np.arange(n_customers, dtype=np.int64) * len(months)
+
+        current = np.full((n_customers, len(STATE_COLUMNS)), -1, dtype=np.int8)
+        snapshots, changed_customers, changed_states = [], [], []
+        for index, month in enumerate(months):
+            cutoff = np.datetime64(month.end_time, 'ns')
+            last = np.searchsorted(key, query + index, side='right') - 1
+            active = np.flatnonzero(last >= starts)
+            last = last[active]
+
+            frequency = cumulative_orders[last]
+            monetary = cumulative_sales[last]
+            age = (cutoff - first_dates[active]) // np.timedelta64(1, 'D')
+            customers_now = pd.DataFrame({
+                'Recency': (cutoff - dates[last]) // np.timedelta64(1, 'D'),
+                'Frequency': frequency,
+                'Monetary': monetary,
+                'Avg_Order_Value': monetary / frequency,
+                'Customer_Age_Days': age,
+                'Purchase_Rate': frequency / (age + 1),
+                CUSTOMER_KEY: keys[active],
+            })
+
+            scores = breakpoints.score(customers_now).to_numpy()
+            state = np.empty((len(active), len(STATE_COLUMNS)), dtype=np.int8)
+            state[:, :3] = scores
+            state[:, 3] = segmenter.codes(scores[:, 0], scores[:, 1], scores[:, 2])
+            state[:, 4] = cluster_model.predict(customers_now) if cluster_model is not None else -1
+
+            changed = (current[active] != state).any(axis=1)
+            current[active[changed]] = state[changed]
+            snapshots.append(np.full(changed.sum(), index, dtype=np.int16))
+            changed_customers.append(active[changed].astype(np.int32))
+            changed_states.append(state[changed])
+
+        snapshot = np.concatenate(snapshots) if snapshots else np.empty(0, dtype=np.int16)
+        customer = np.concatenate(changed_customers) if snapshots else np.empty(0, dtype=np.int32)
+        state = np.concatenate(changed_states) if snapshots else np.empty((0, len(STATE_COLUMNS)), dtype=np.int8)
+        rows = np.lexsort((snapshot, customer))
+
+        cluster_names = [] if cluster_model is None else \
+            [cluster_model.cluster_names.get(code, f'Cluster_{code}') for code in range(cluster_model.n_clusters)]
+        metadata = {'breakpoints_version': breakpoints.version,
+                    'cluster_model_version': None if cluster_model is None else cluster_model.version}
+        return cls(months, customers, segmenter.segments, cluster_names,
+                   snapshot[rows], customer[rows], state[rows], metadata)
+
+    def _snapshot_index(self, snapshot):
+        """Position of a snapshot given as a position, 'YYYY-MM' or a Period"""
+        if isinstance(snapshot, (int, np.integer)):
+            return int(snapshot) % len(self.months)
+        return self.months.get_loc(pd.Period(snapshot, freq='M'))
+
+    def _column(self, by):
+        if by not in ('segment', 'cluster'):
+            raise ValueError(f"by must be 'segment' or 'cluster', not {by!r}")
+        if by == 'cluster' and not self.cluster_names:
+            raise ValueError('History was built without a cluster model')
+        return STATE_COLUMNS.index('Segment' if by == 'segment' else 'Cluster')
+
+    def _last_rows(self, snapshot):
+        """Each customer's latest stored row at or before a snapshot"""
+        index = self._snapshot_index(snapshot)
+        # A customer's rows up to the snapshot are a prefix of their rows;
+        # the state is the last row of that prefix
+        upto = self.snapshot <= index
+        return np.flatnonzero(upto & ~(np.append(upto[1:], False) & self._continues))
+
+    def states_at(self, snapshot):
+        """State row per customer at a snapshot (-1 where the customer had not ordered yet)"""
+        last = self._last_rows(snapshot)
+        states = np.full((len(self.customers), len(STATE_COLUMNS)), -1, dtype=np.int8)
+        states[self.customer[last]] = self.state[last]
+        return states
+
+    def codes_at(self, snapshot, by='segment'):
+        """Segment or cluster code per customer at a snapshot (-1 before their first order)"""
+        column = self._column(by)
+        last = self._last_rows(snapshot)
+        codes = np.full(len(self.customers), -1, dtype=np.int8)
+        codes[self.customer[last]] = self.state[last, column]
+        return codes
+
+    def snapshot_frame(self, snapshot):
+        """Customers with orders by a snapshot, with their scores, segment and cluster"""
+        states = self.states_at(snapshot)
+        present = states[:, 0] >= 0
+        states = states[present]
+        frame = pd.DataFrame(states[:, :3], columns=STATE_COLUMNS[:3])
+        frame.insert(0, 'Customer_ID', self.customers.to_numpy()[present])
+        frame['RFM_Segment'] = np.array(self.segments, dtype=object)[states[:, 3]]
+        if self.cluster_names:
+            frame['Cluster_Name'] = np.array(self.cluster_names, dtype=object)[states[:, 4]]
+        return frame
+
+    def transition_matrix(self, start, end, by='segment', normalize=False):
+        """
+        Customers moving from each segment (or cluster) at ``start`` to each
+        one at ``end``. Customers whose first order falls between the two
+        snapshots are counted in the 'New' row; ``normalize`` gives row shares.
+        """
+        labels = self.segments if by == 'segment' else self.cluster_names
+        before = self.codes_at(start, by).astype(np.intp)
+        after = self.codes_at(end, by).astype(np.intp)
+        present = after >= 0
+        k = len(labels)
+        counts = np.bincount((before[present] + 1) * k + after[present], minlength=(k + 1) * k).reshape(k + 1, k)
+
+        matrix = pd.DataFrame(counts,
+                              index=pd.Index([NEW_CUSTOMER] + labels, name=str(self.months[self._snapshot_index(start)])),
+                              columns=pd.Index(labels, name=str(self.months[self._snapshot_index(end)])))
+        if normalize:
+            matrix = matrix.div(matrix.sum(axis=1).replace(0, np.nan), axis=0).fillna(0).round(4)
+        return matrix
+
+    def save(self, path=HISTORY_PATH):
+        """Save the arrays and dictionaries to a compressed .npz file"""
+        np.savez_compressed(path, months=self.months.astype(str).to_numpy(dtype=str),
+                            customers=self.customers.to_numpy(dtype=str),
+                            segments=np.array(self.segments, dtype=str),
+                            cluster_names=np.array(self.cluster_names, dtype=str),
+                            snapshot=self.snapshot, customer=self.customer, state=self.state,
+                            breakpoints_version=np.int64(self.metadata.get('breakpoints_version') or -1),
+                            cluster_model_version=np.int64(self.metadata.get('cluster_model_version') or -1))
+
+    @classmethod
+    def load(cls, path=HISTORY_PATH):
+        with np.load(path) as data:
+            metadata = {name: int(data[name]) if int(data[name]) >= 0 else None
+                        for name in ('breakpoints_version', 'cluster_model_version')}
+            return cls(data['months'], data['customers'], data['segments'], data['cluster_names'],
+                       data['snapshot'], data['customer'], data['state'], metadata)
+
+
+if __name__ == '__main__':
+    from cluster_model import ClusterModel
+    from rfm_scoring import RFMBreakpoints
+    from rfm_segments import RFMSegmenter
+
+    if len(sys.argv) > 2:
+        history = RFMHistory.load()
+        start_month, end_month = sys.argv[1], sys.argv[2]
+    else:
+        transactions = load_artifact('transactions_clean',
+                                     columns=['Customer_ID', 'Order #', 'Date', 'Net_Sales'])
+        start = time.perf_counter()
+        history = RFMHistory.build(transactions, RFMBreakpoints.load(), RFMSegmenter.load(), ClusterModel.load())
+        history.save()
+        print(f"✓ Built {len(history.months)} month-end snapshots for {len(history.customers):,} customers "
+              f"({len(history):,} changed rows) in {time.perf_counter() - start:.2f}s")
+        start_month, end_month = -2, -1
+
+    start = time.perf_counter()
+    matrix = history.transition_matrix(start_month, end_month)
+    print(f"✓ Transition matrix in {(time.perf_counter() - start) * 1000:.1f}ms")
+    print(matrix.to_string())
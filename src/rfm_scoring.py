@@ -0,0 +1,234 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Frozen quintile breakpoints for R/F/M scores
+
+pd.qcut over the whole population needs everyone's data to score one
+customer, and the scores drift every run. Here the quintile breakpoints of
+Recency, Frequency and Monetary are computed once per run and saved
+(rfm_breakpoints/rfm_breakpoints_vNNN.json); any customer is then scored
+with np.searchsorted against them.
+
+Breakpoints come from a mergeable quantile sketch (KLL-style compactors):
+chunks of customers, or partial sketches from several workers, are folded in
+without sorting the whole population. While the sketch still holds every
+value it is exact and the breakpoints equal pd.qcut's.
+
+Frequency is heavily tied (over 40% of customers have a single order), so
+value edges alone would leave an F level empty. Its ties are broken by the
+numeric Customer_ID key, added as a fraction below one order. This is the
+order qcut(Frequency.rank(method='first')) used on the ID-sorted export, so
+the five F levels stay populated and scores match the earlier quintiles,
+while any single customer still scores the same on its own.
+
+Usage (from src/):
+    python rfm_scoring.py                   # score rfm_clean with the latest breakpoints
+    python rfm_scoring.py customers.csv
+"""
+
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from schema import CUSTOMER_KEY, customer_keys, load_artifact
+
+SCORE_LEVELS = 5
+QUINTILES = np.linspace(0, 1, SCORE_LEVELS + 1)[1:-1]
+SKETCH_SIZE = 4096
+SCORED_COLUMNS = {'R_Score': 'Recency', 'F_Score': 'Frequency', 'M_Score': 'Monetary'}
+
+# Features whose ties are broken by customer key, scaled below one unit
+TIE_BREAK_FEATURES = ('Frequency',)
+TIE_BREAK_SCALE = 2.0 ** 31
+
+BREAKPOINT_DIR = 'rfm_breakpoints'
+BREAKPOINT_PATTERN = re.compile(r'rfm_breakpoints_v(\d+)\.json$')
+
+
+def score_values(customers, feature):
+    """
+    Values a feature's breakpoints are built on and compared against.
+
+    Tie-broken features need Customer_ID, or a precomputed Customer_Key
+    column (faster for repeated scoring of the same customers).
+    """
+    values = customers[feature].to_numpy(dtype=np.float64)
+    if feature in TIE_BREAK_FEATURES:
+        keys = customers[CUSTOMER_KEY].to_numpy() if CUSTOMER_KEY in customers.columns \
+            else customer_keys(customers['Customer_ID'])
+        values = values + np.clip(keys, 0, None) / TIE_BREAK_SCALE
+    return values
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch.
+
+    Level h holds items that each stand for 2**h values. A level over
+    capacity is sorted and every other item (random offset) is promoted to
+    the next level, so memory stays O(k log(n / k)).
+    """
+
+    def __init__(self, k=SKETCH_SIZE, seed=0):
+        self.k = k
+        self.levels = []
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _add(self, level, values):
+        while len(self.levels) <= level:
+            self.levels.append(np.empty(0, dtype=np.float64))
+        self.levels[level] = np.concatenate([self.levels[level], values])
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # An odd item out stays at this level
+                kept = items[len(items) - len(items) % 2:]
+                paired = items[:len(items) - len(kept)]
+                self._add(level + 1, paired[self._rng.integers(2)::2])
+                self.levels[level] = kept
+            level += 1
+
+    def update(self, values):
+        """Fold a chunk of values into the sketch (NaNs are ignored)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self._add(0, values)
+        self._compact()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch (e.g. from a different chunk or worker) into this one"""
+        for level, items in enumerate(other.levels):
+            self._add(level, items)
+        self.count += other.count
+        self._compact()
+        return self
+
+    @property
+    def exact(self):
+        """True while every value is still held at full weight"""
+        return len(self.levels) <= 1
+
+    def quantiles(self, qs):
+        """Values at the given quantiles (linear interpolation, as pandas, when exact)"""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+        if self.exact:
+            return np.quantile(self.levels[0], qs)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        return items[order][np.minimum(position, len(items) - 1)]
+
+
+class RFMBreakpoints:
+    """Inner quintile edges for Recency, Frequency and Monetary"""
+
+    def __init__(self, edges, count=None, exact=True, version=None, metadata=None):
+        self.edges = {feature: np.asarray(values, dtype=np.float64) for feature, values in edges.items()}
+        self.count = count
+        self.exact = exact
+        self.version = version
+        self.metadata = dict(metadata or {})
+
+    @classmethod
+    def from_sketches(cls, sketches):
+        """Breakpoints from one sketch per feature"""
+        edges = {feature: sketch.quantiles(QUINTILES) for feature, sketch in sketches.items()}
+        first = next(iter(sketches.values()))
+        return cls(edges, first.count, all(sketch.exact for sketch in sketches.values()))
+
+    @classmethod
+    def from_batches(cls, batches, k=SKETCH_SIZE):
+        """Build the sketches chunk by chunk from an iterable of customer DataFrames"""
+        sketches = {feature: QuantileSketch(k) for feature in SCORED_COLUMNS.values()}
+        for batch in batches:
+            for feature, sketch in sketches.items():
+                sketch.update(score_values(batch, feature))
+        return cls.from_sketches(sketches)
+
+    @classmethod
+    def from_frame(cls, customers, chunk_size=250_000, k=SKETCH_SIZE):
+        return cls.from_batches((customers.iloc[start:start + chunk_size]
+                                 for start in range(0, len(customers), chunk_size)), k)
+
+    def score(self, customers):
+        """
+        R/F/M scores (1-5) for any set of customers.
+
+        Bins are right-closed like pd.qcut: a value equal to an edge falls in
+        the lower quintile. Recency is reversed (recent = 5). Frequency ties
+        are broken by customer key (see score_values).
+        """
+        scores = {}
+        for score, feature in SCORED_COLUMNS.items():
+            position = np.searchsorted(self.edges[feature], score_values(customers, feature), side='left')
+            scores[score] = (SCORE_LEVELS - position if score == 'R_Score' else position + 1).astype(np.int8)
+        return pd.DataFrame(scores, index=customers.index)
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'count': self.count,
+            'exact': self.exact,
+            'edges': {feature: values.tolist() for feature, values in self.edges.items()},
+            'metadata': self.metadata,
+        }
+
+    def save(self, directory=BREAKPOINT_DIR):
+        """Write these breakpoints as the next run's version; returns the path"""
+        os.makedirs(directory, exist_ok=True)
+        versions = [int(match.group(1)) for match in
+                    map(BREAKPOINT_PATTERN.search, glob.glob(os.path.join(directory, '*.json'))) if match]
+        self.version = max(versions, default=0) + 1
+        self.metadata.setdefault('computed_at', pd.Timestamp.now().isoformat(timespec='seconds'))
+        path = os.path.join(directory, f'rfm_breakpoints_v{self.version:03d}.json')
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path=BREAKPOINT_DIR):
+        """Load a breakpoint file, or the latest version in a directory"""
+        if os.path.isdir(path):
+            candidates = [p for p in glob.glob(os.path.join(path, '*.json')) if BREAKPOINT_PATTERN.search(p)]
+            if not candidates:
+                raise FileNotFoundError(f"No RFM breakpoints in {path}")
+            path = max(candidates, key=lambda p: int(BREAKPOINT_PATTERN.search(p).group(1)))
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['edges'], data['count'], data['exact'], data['version'], data['metadata'])
+
+
+if __name__ == '__main__':
+    from rfm_segments import RFMSegmenter
+
+    breakpoints = RFMBreakpoints.load()
+    path = sys.argv[1] if len(sys.argv) > 1 else 'rfm_clean'
+    customers = load_artifact(path, columns=['Customer_ID', *SCORED_COLUMNS.values()])
+
+    start = time.perf_counter()
+    scores = breakpoints.score(customers)
+    scores['RFM_Score'] = scores.sum(axis=1)
+    scores['RFM_Segment'] = RFMSegmenter.load().assign(scores['R_Score'], scores['F_Score'], scores['M_Score'])
+    scored = pd.concat([customers[['Customer_ID']], scores], axis=1)
+    print(f"✓ Scored {len(scored):,} customers with breakpoints v{breakpoints.version} "
+          f"in {time.perf_counter() - start:.3f}s")
+    print(scored['RFM_Segment'].value_counts().to_string())
+    scored.to_csv('rfm_scores.csv', index=False)
+    print("✓ Saved rfm_scores.csv")
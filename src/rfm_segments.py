@@ -0,0 +1,154 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Lookup-table RFM segment assignment
+
+R, F and M scores are each 1-5, so there are only 125 possible score
+combinations. The segment rules (an ordered list: the first matching rule
+wins) are evaluated once per combination into a 5x5x5 lookup array, and
+customers are segmented by integer indexing into it.
+
+Rules are data: rfm_segment_rules.json next to this file holds the ordered
+list of {"segment", "R", "F", "M"} rules, where each score condition is an
+inclusive [min, max] range and a missing score matches anything.
+
+Run this file directly to benchmark against row-by-row rule evaluation:
+    python rfm_segments.py 1000000
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+SCORE_LEVELS = 5
+SCORES = ('R', 'F', 'M')
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rfm_segment_rules.json')
+
+# Checked in order: the first rule whose score ranges all match wins
+DEFAULT_SEGMENT_RULES = [
+    {'segment': 'Champions', 'R': [4, 5], 'F': [4, 5], 'M': [4, 5]},
+    {'segment': 'Loyal Customers', 'R': [3, 5], 'F': [4, 5]},
+    {'segment': 'Big Spenders', 'F': [1, 3], 'M': [4, 5]},
+    {'segment': 'Promising', 'R': [4, 5], 'F': [1, 2]},
+    {'segment': 'Needs Attention', 'R': [3, 5], 'F': [2, 5], 'M': [2, 5]},
+    {'segment': 'About to Sleep', 'R': [2, 3]},
+    {'segment': 'At Risk', 'R': [1, 2], 'F': [3, 5], 'M': [3, 5]},
+    {'segment': "Can't Lose Them", 'F': [4, 5], 'M': [4, 5]},
+    {'segment': 'Hibernating', 'R': [1, 2], 'F': [1, 2], 'M': [2, 5]},
+]
+DEFAULT_SEGMENT = 'Lost'
+
+
+def rule_matches(rule, r, f, m):
+    """True if the scores fall inside every range the rule sets"""
+    for name, score in zip(SCORES, (r, f, m)):
+        low, high = rule.get(name, (1, SCORE_LEVELS))
+        if not low <= score <= high:
+            return False
+    return True
+
+
+def segment_for_scores(r, f, m, rules=DEFAULT_SEGMENT_RULES, default=DEFAULT_SEGMENT):
+    """Segment for one (R, F, M) combination (row-by-row reference implementation)"""
+    for rule in rules:
+        if rule_matches(rule, r, f, m):
+            return rule['segment']
+    return default
+
+
+def edit_rule(rules, segment, **ranges):
+    """
+    Copy of ``rules`` with new score ranges for one segment's rule, e.g.
+    ``edit_rule(rules, 'Champions', R=[5, 5])``; a range of None drops the
+    condition. The rule keeps its place in the order.
+    """
+    edited = []
+    for rule in rules:
+        if rule['segment'] == segment:
+            rule = dict(rule)
+            for name, score_range in ranges.items():
+                if name not in SCORES:
+                    raise ValueError(f"Unknown score {name!r}; expected one of {SCORES}")
+                if score_range is None:
+                    rule.pop(name, None)
+                else:
+                    rule[name] = [int(score_range[0]), int(score_range[1])]
+        edited.append(rule)
+    return edited
+
+
+class RFMSegmenter:
+    """Assign RFM segments through a precomputed 5x5x5 lookup array"""
+
+    def __init__(self, rules=None, default=DEFAULT_SEGMENT):
+        self.rules = list(DEFAULT_SEGMENT_RULES if rules is None else rules)
+        self.default = default
+        self.segments = list(dict.fromkeys([rule['segment'] for rule in self.rules] + [default]))
+
+        codes = {segment: code for code, segment in enumerate(self.segments)}
+        self.lookup = np.empty((SCORE_LEVELS,) * 3, dtype=np.int8)
+        for r, f, m in np.ndindex(self.lookup.shape):
+            segment = segment_for_scores(r + 1, f + 1, m + 1, self.rules, default)
+            self.lookup[r, f, m] = codes[segment]
+
+    @classmethod
+    def from_json(cls, path=RULES_PATH):
+        """Build a segmenter from a JSON file with "rules" and an optional "default" """
+        with open(path) as f:
+            config = json.load(f)
+        return cls(config['rules'], config.get('default', DEFAULT_SEGMENT))
+
+    @classmethod
+    def load(cls, path=RULES_PATH):
+        """The rules file when it exists, otherwise the built-in rules"""
+        return cls.from_json(path) if os.path.exists(path) else cls()
+
+    def codes(self, r, f, m):
+        """Segment code per customer from 1-5 score arrays"""
+        r, f, m = (np.asarray(score, dtype=np.intp) - 1 for score in (r, f, m))
+        return self.lookup[r, f, m]
+
+    def assign(self, r, f, m):
+        """Segment name per customer, aligned to r when it is a Series"""
+        labels = np.array(self.segments, dtype=object)
+        index = r.index if isinstance(r, pd.Series) else None
+        return pd.Series(labels[self.codes(r, f, m)], index=index, name='RFM_Segment')
+
+    def to_frame(self):
+        """All 125 score combinations with their segment (for review)"""
+        r, f, m = np.indices(self.lookup.shape).reshape(3, -1) + 1
+        return pd.DataFrame({'R_Score': r, 'F_Score': f, 'M_Score': m,
+                             'RFM_Segment': np.array(self.segments, dtype=object)[self.lookup.ravel()]})
+
+
+def benchmark(size=1_000_000, seed=42):
+    """Time the lookup table against rule evaluation per row"""
+    rng = np.random.default_rng(seed)
+    scores = pd.DataFrame(rng.integers(1, SCORE_LEVELS + 1, (size, 3)), columns=['R_Score', 'F_Score', 'M_Score'])
+    segmenter = RFMSegmenter.load()
+
+    start = time.perf_counter()
+    fast = segmenter.assign(scores['R_Score'], scores['F_Score'], scores['M_Score'])
+    fast_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = scores.apply(lambda row: segment_for_scores(row['R_Score'], row['F_Score'], row['M_Score'],
+                                                            segmenter.rules, segmenter.default), axis=1)
+    reference_seconds = time.perf_counter() - start
+    if not (fast.to_numpy() == reference.to_numpy()).all():
+        raise AssertionError('Lookup table disagrees with the rules')
+
+    return pd.DataFrame([{
+        'Rows': size,
+        'Lookup_Seconds': round(fast_seconds, 3),
+        'Row_By_Row_Seconds': round(reference_seconds, 3),
+        'Speedup': round(reference_seconds / fast_seconds, 1),
+    }])
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(benchmark(size).to_string(index=False))
@@ -0,0 +1,300 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Shared typed schema for all pipeline artifacts
+
+Every stage and dashboard reads and writes the processed CSVs through
+load_artifact/save_artifact so they agree on dtypes: label columns become
+categoricals, counts and scores are downcast to the smallest safe integer
+type, ratios and probabilities use float32, and money stays float64.
+
+Next to each CSV, save_artifact writes an uncompressed Arrow IPC (Feather)
+copy. load_artifact prefers it whenever it is at least as new as the CSV:
+the file is memory-mapped and only the requested columns are converted, so
+stage-to-stage hand-offs skip CSV float formatting and date parsing.
+
+Run this file directly for a memory-footprint report of data/processed:
+    python schema.py
+"""
+
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+PROCESSED_DIR = '../data/processed'
+
+# Low-cardinality labels stored as pandas categoricals
+CATEGORICAL_COLUMNS = [
+    'Customer_ID', 'Customer_Type', 'Attribution', 'Status', 'DayName', 'MonthName',
+    'Product_Category', 'Frequency_Category', 'Monetary_Category', 'Recency_Category',
+    'RFM_Segment', 'Cluster_Name', 'Churn_Risk_Level', 'CLV_Category',
+    'Purchase_Timing_Status', 'Customer_Priority', 'Recommended_Category', 'Reason',
+    'Category', 'Category_1', 'Category_2', 'Action', 'Method',
+    'Shard', 'Shard_RFM_Segment', 'Shard_Cluster_Name',
+]
+
+# Integer columns are only downcast when every value fits the target type
+INTEGER_COLUMNS = {
+    'Order #': 'int32',
+    'Product_ID': 'int32',
+    'Date_Key': 'int32',
+    'Month_Key': 'int32',
+    'Frequency': 'int32',
+    'Total_Items_Sold': 'int32',
+    'Items sold': 'int32',
+    'Category_Popularity': 'int32',
+    'Recency': 'int16',
+    'Customer_Lifetime_Days': 'int16',
+    'Customer_Age_Days': 'int16',
+    'Days_Since_Last_Purchase': 'int16',
+    'Year': 'int16',
+    'Month': 'int8',
+    'Quarter': 'int8',
+    'DayOfWeek': 'int8',
+    'R_Score': 'int8',
+    'F_Score': 'int8',
+    'M_Score': 'int8',
+    'RFM_Score': 'int8',
+    'Cluster': 'int8',
+    'Shard_R_Score': 'int8',
+    'Shard_F_Score': 'int8',
+    'Shard_M_Score': 'int8',
+    'Shard_RFM_Score': 'int8',
+    'Shard_Cluster': 'int8',
+    'Is_Churned': 'int8',
+    'Customer_Type_Encoded': 'int8',
+}
+
+# Ratios, probabilities and day averages don't need float64 precision.
+# Model input features (Purchase_Rate, Days_Between_Purchases) are left out:
+# they stay float64 so storage never changes what the models are trained on
+FLOAT32_COLUMNS = [
+    'Expected_Days_to_Next_Purchase',
+    'Days_Overdue', 'Churn_Probability', 'Purchase_Probability_30_Days',
+    'Customer_Value_Score', 'Confidence', 'Support', 'Confidence_1_to_2',
+    'Confidence_2_to_1', 'Lift',
+]
+
+# Per-category purchase counts (Category_Poultry, Category_Seeds, ...)
+PREFIX_DTYPES = {'Category_': 'int32'}
+
+DATE_COLUMNS = ['Date', 'Last_Purchase_Date', 'First_Purchase_Date']
+
+# Artifact name -> file under PROCESSED_DIR
+ARTIFACTS = {
+    'rfm_clean': 'rfm_clean.csv',
+    'rfm_segmented': 'rfm_segmented.csv',
+    'rfm_with_predictions': 'rfm_with_predictions.csv',
+    'transactions_clean': 'transactions_clean.csv',
+    'date_dimension': 'date_dimension.csv',
+    'product_recommendations': 'product_recommendations.csv',
+    'top_recommendations_per_customer': 'top_recommendations_per_customer.csv',
+    'cross_sell_opportunities': 'cross_sell_opportunities.csv',
+    'product_association_rules': 'product_association_rules.csv',
+    'high_risk_customers': 'high_risk_customers.csv',
+    'high_value_opportunities': 'high_value_opportunities.csv',
+    'action_priority_list': 'action_priority_list.csv',
+    'product_catalog': 'product_catalog.csv',
+    'segment_cube': 'segment_cube.csv',
+    'rfm_sharded_segments': 'rfm_sharded_segments.csv',
+    'rfm_score_histogram': 'rfm_score_histogram.csv',
+}
+
+CUSTOMER_KEY = 'Customer_Key'
+
+# Stage-to-stage interchange copy of each artifact
+STAGE_EXTENSION = '.feather'
+# CSV exports are for people and external tools; AFRIMASH_EXPORT_CSV=0 skips them
+EXPORT_CSV = os.environ.get('AFRIMASH_EXPORT_CSV', '1') != '0'
+
+
+def declared_dtype(column):
+    """Return the declared dtype for a column name, or None if undeclared"""
+    if column in CATEGORICAL_COLUMNS:
+        return 'category'
+    if column in INTEGER_COLUMNS:
+        return INTEGER_COLUMNS[column]
+    if column in FLOAT32_COLUMNS:
+        return 'float32'
+    for prefix, dtype in PREFIX_DTYPES.items():
+        if column.startswith(prefix) and column not in CATEGORICAL_COLUMNS:
+            return dtype
+    return None
+
+
+def artifact_path(name_or_path, processed_dir=PROCESSED_DIR):
+    """Resolve an artifact name (e.g. 'rfm_clean') or a file path"""
+    if name_or_path in ARTIFACTS:
+        return os.path.join(processed_dir, ARTIFACTS[name_or_path])
+    return name_or_path
+
+
+def stage_path(path):
+    """Arrow IPC (Feather) copy that sits next to an artifact's CSV"""
+    return os.path.splitext(path)[0] + STAGE_EXTENSION
+
+
+def _fresh_stage_file(path):
+    """The Feather copy of path, unless it is missing or older than the CSV"""
+    arrow_path = stage_path(path)
+    if not os.path.exists(arrow_path):
+        return None
+    if os.path.exists(path) and os.path.getmtime(path) > os.path.getmtime(arrow_path):
+        return None
+    return arrow_path
+
+
+def artifact_source(name_or_path, processed_dir=PROCESSED_DIR):
+    """The file load_artifact reads for an artifact (Feather copy or CSV)"""
+    path = artifact_path(name_or_path, processed_dir)
+    return _fresh_stage_file(path) or path
+
+
+def customer_keys(customer_ids):
+    """
+    Integer surrogate keys for Customer_ID values like 'CUS000904' -> 904.
+
+    Keys are stable across artifacts because they come from the id itself.
+    Ids without a numeric suffix get -1.
+    """
+    ids = pd.Series(customer_ids).astype(str)
+    digits = ids.str.extract(r'(\d+)$', expand=False)
+    return pd.to_numeric(digits, errors='coerce').fillna(-1).astype('int32').to_numpy()
+
+
+def _fits(series, dtype):
+    """True if an integer-valued series can be cast to dtype without loss"""
+    if series.isna().any() or not pd.api.types.is_numeric_dtype(series):
+        return False
+    if len(series) == 0:
+        return True
+    values = series.to_numpy()
+    if not np.array_equal(values, np.round(values)):
+        return False
+    info = np.iinfo(dtype)
+    return info.min <= values.min() and values.max() <= info.max
+
+
+def enforce_schema(df):
+    """Cast declared columns to their schema dtypes, in place where safe"""
+    for col in df.columns:
+        dtype = declared_dtype(col)
+        if dtype is None or str(df[col].dtype) == dtype:
+            continue
+        if dtype == 'category':
+            df[col] = df[col].astype('category')
+        elif dtype == 'float32':
+            if pd.api.types.is_numeric_dtype(df[col]):
+                df[col] = df[col].astype('float32')
+        elif _fits(df[col], dtype):
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def drop_unused_categories(df):
+    """Drop categories with no rows left, e.g. after filtering for a chart"""
+    for col in df.select_dtypes('category').columns:
+        df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def load_artifact(name_or_path, columns=None, customer_key=False, exclude=None,
+                  processed_dir=PROCESSED_DIR):
+    """
+    Read a pipeline artifact with the shared schema applied.
+
+    ``columns`` restricts the read to a subset of columns and ``exclude``
+    skips columns. With ``customer_key=True`` an int32 Customer_Key column
+    is added.
+    """
+    path = artifact_path(name_or_path, processed_dir)
+    arrow_path = _fresh_stage_file(path)
+
+    def selected(header):
+        return [col for col in header if (columns is None or col in columns)
+                and (exclude is None or col not in exclude)]
+
+    if arrow_path is not None:
+        # Memory-mapped: columns that aren't selected are never touched
+        table = feather.read_table(arrow_path, memory_map=True)
+        df = table.select(selected(table.column_names)).to_pandas()
+    else:
+        usecols = selected(pd.read_csv(path, nrows=0).columns)
+
+        # Categoricals and float32 can be parsed directly; integers are
+        # downcast afterwards so missing values never break the read
+        read_dtypes = {col: declared_dtype(col) for col in usecols
+                       if declared_dtype(col) in ('category', 'float32')}
+        parse_dates = [col for col in DATE_COLUMNS if col in usecols]
+
+        # round_trip: floats parse to exactly the values that were written, so
+        # the CSV and Feather copies hand the models bit-identical features
+        df = pd.read_csv(path, usecols=usecols, dtype=read_dtypes, parse_dates=parse_dates,
+                         float_precision='round_trip')
+    df = enforce_schema(df)
+    if customer_key and 'Customer_ID' in df.columns:
+        df[CUSTOMER_KEY] = customer_keys(df['Customer_ID'])
+    return df
+
+
+def save_artifact(df, name_or_path, processed_dir=PROCESSED_DIR, csv=None):
+    """
+    Write an artifact after enforcing the schema.
+
+    The Feather copy read by the next stage is always written; the CSV
+    export follows EXPORT_CSV unless csv is given explicitly.
+    """
+    path = artifact_path(name_or_path, processed_dir)
+    csv = EXPORT_CSV if csv is None else csv
+    df = enforce_schema(df.drop(columns=[CUSTOMER_KEY], errors='ignore').reset_index(drop=True))
+    if csv:
+        df.to_csv(path, index=False)
+
+    # Write-then-rename: readers may still have the previous file memory-mapped
+    arrow_path = stage_path(path)
+    feather.write_feather(df, arrow_path + '.tmp', compression='uncompressed')
+    os.replace(arrow_path + '.tmp', arrow_path)
+    return path
+
+
+def memory_report(frames):
+    """Memory footprint (deep) of a dict of named DataFrames, in MB"""
+    rows = []
+    for name, df in frames.items():
+        rows.append({
+            'Artifact': name,
+            'Rows': len(df),
+            'Columns': df.shape[1],
+            'Memory_MB': round(df.memory_usage(deep=True).sum() / 1e6, 3),
+        })
+    return pd.DataFrame(rows)
+
+
+def compare_footprint(processed_dir=PROCESSED_DIR):
+    """Compare default read_csv memory against the typed schema for every artifact"""
+    rows = []
+    for path in sorted(glob.glob(os.path.join(processed_dir, '*.csv'))):
+        default_mb = pd.read_csv(path).memory_usage(deep=True).sum() / 1e6
+        typed_mb = load_artifact(path).memory_usage(deep=True).sum() / 1e6
+        rows.append({
+            'Artifact': os.path.basename(path),
+            'Default_MB': round(default_mb, 3),
+            'Typed_MB': round(typed_mb, 3),
+            'Reduction_%': round((1 - typed_mb / default_mb) * 100, 1) if default_mb else 0.0,
+        })
+    report = pd.DataFrame(rows)
+    total = pd.DataFrame([{
+        'Artifact': 'TOTAL',
+        'Default_MB': report['Default_MB'].sum(),
+        'Typed_MB': report['Typed_MB'].sum(),
+        'Reduction_%': round((1 - report['Typed_MB'].sum() / report['Default_MB'].sum()) * 100, 1),
+    }])
+    return pd.concat([report, total], ignore_index=True)
+
+
+if __name__ == '__main__':
+    directory = sys.argv[1] if len(sys.argv) > 1 else PROCESSED_DIR
+    print(compare_footprint(directory).to_string(index=False))
@@ -0,0 +1,134 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+R/F/M score histogram for instant what-if segmentation
+
+Every segment rule depends only on (R_Score, F_Score, M_Score), and there
+are 125 score combinations. The segmentation stage saves the customer count
+and total Monetary per combination (rfm_score_histogram.csv). Segment sizes
+and revenue under any rule set are then a weighted np.bincount of the rule
+set's 5x5x5 lookup array over those 125 cells. Trying "Champions needs R=5"
+never touches customer rows or reruns the segmentation.
+
+Usage (from src/):
+    python score_histogram.py                   # segment sizes under the current rules
+    python score_histogram.py new_rules.json    # current rules vs an alternative rules file
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from rfm_segments import SCORE_LEVELS, RFMSegmenter
+from schema import PROCESSED_DIR, load_artifact, save_artifact
+
+SCORE_COLUMNS = ['R_Score', 'F_Score', 'M_Score']
+
+
+class ScoreHistogram:
+    """Customer count and total Monetary per (R, F, M) score combination"""
+
+    def __init__(self, customers, monetary):
+        shape = (SCORE_LEVELS,) * 3
+        self.customers = np.asarray(customers, dtype=np.int64).reshape(shape)
+        self.monetary = np.asarray(monetary, dtype=np.float64).reshape(shape)
+
+    @classmethod
+    def from_scores(cls, r, f, m, monetary):
+        """One pass over customers' 1-5 scores and Monetary values"""
+        r, f, m = (np.asarray(score, dtype=np.intp) - 1 for score in (r, f, m))
+        cell = (r * SCORE_LEVELS + f) * SCORE_LEVELS + m
+        size = SCORE_LEVELS ** 3
+        return cls(np.bincount(cell, minlength=size),
+                   np.bincount(cell, weights=np.asarray(monetary, dtype=np.float64), minlength=size))
+
+    @classmethod
+    def from_customers(cls, customers):
+        return cls.from_scores(*(customers[col] for col in SCORE_COLUMNS), customers['Monetary'])
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Rebuild from the 125-row table written by save()"""
+        frame = frame.sort_values(SCORE_COLUMNS)
+        return cls(frame['Customers'].to_numpy(), frame['Monetary'].to_numpy())
+
+    def to_frame(self):
+        r, f, m = np.indices(self.customers.shape).reshape(3, -1) + 1
+        return pd.DataFrame({'R_Score': r, 'F_Score': f, 'M_Score': m,
+                             'Customers': self.customers.ravel(), 'Monetary': self.monetary.ravel()})
+
+    def segment_sizes(self, segmenter):
+        """Customers, Monetary and their shares per segment of an RFMSegmenter"""
+        codes = segmenter.lookup.ravel()
+        k = len(segmenter.segments)
+        customers = np.bincount(codes, weights=self.customers.ravel(), minlength=k).astype(np.int64)
+        monetary = np.bincount(codes, weights=self.monetary.ravel(), minlength=k)
+        with np.errstate(invalid='ignore'):
+            return pd.DataFrame({
+                'RFM_Segment': segmenter.segments,
+                'Customers': customers,
+                'Monetary': monetary,
+                'Customer_Share': customers / customers.sum(),
+                'Monetary_Share': monetary / monetary.sum(),
+            })
+
+    def moved(self, baseline, alternative):
+        """
+        Customers and Monetary whose segment differs between two segmenters:
+        the exact total over the score cells that change label, which net
+        per-segment changes understate when segments swap customers.
+        """
+        changed = np.array(baseline.segments, dtype=object)[baseline.lookup] != \
+            np.array(alternative.segments, dtype=object)[alternative.lookup]
+        return int(self.customers[changed].sum()), float(self.monetary[changed].sum())
+
+    def what_if(self, rules, default=None, baseline=None):
+        """
+        Segment sizes under ``rules`` next to the ``baseline`` segmenter (the
+        saved rules by default), with the change in customers and Monetary.
+        Segments present in either rule set are listed, baseline order first.
+        """
+        baseline = baseline or RFMSegmenter.load()
+        alternative = RFMSegmenter(rules, baseline.default if default is None else default)
+        current = self.segment_sizes(baseline).set_index('RFM_Segment')
+        proposed = self.segment_sizes(alternative).set_index('RFM_Segment')
+
+        segments = list(dict.fromkeys(list(current.index) + list(proposed.index)))
+        current = current.reindex(segments, fill_value=0)
+        proposed = proposed.reindex(segments, fill_value=0)
+        return pd.DataFrame({
+            'Customers': current['Customers'],
+            'Customers_What_If': proposed['Customers'],
+            'Customers_Change': proposed['Customers'] - current['Customers'],
+            'Monetary': current['Monetary'],
+            'Monetary_What_If': proposed['Monetary'],
+            'Monetary_Change': proposed['Monetary'] - current['Monetary'],
+        }).rename_axis('RFM_Segment').reset_index()
+
+    def save(self, name='rfm_score_histogram', processed_dir=PROCESSED_DIR):
+        """Write the 125 cells where the dashboards read them (processed_dir)"""
+        return save_artifact(self.to_frame(), name, processed_dir=processed_dir)
+
+    @classmethod
+    def load(cls, name='rfm_score_histogram', processed_dir=PROCESSED_DIR):
+        return cls.from_frame(load_artifact(name, processed_dir=processed_dir))
+
+
+if __name__ == '__main__':
+    histogram = ScoreHistogram.load()
+    segmenter = RFMSegmenter.load()
+
+    start = time.perf_counter()
+    if len(sys.argv) > 1:
+        alternative = RFMSegmenter.from_json(sys.argv[1])
+        table = histogram.what_if(alternative.rules, alternative.default, segmenter)
+        moved_customers, moved_monetary = histogram.moved(segmenter, alternative)
+    else:
+        table = histogram.segment_sizes(segmenter)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(table.to_string(index=False))
+    if len(sys.argv) > 1:
+        print(f"\n✓ {moved_customers:,} customers (GH₵{moved_monetary:,.0f}) change segment")
+    print(f"\n✓ Evaluated {histogram.customers.sum():,} customers from 125 score cells in {elapsed:.2f}ms")
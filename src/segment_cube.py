@@ -0,0 +1,153 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Pre-aggregated segment cube for the dashboards
+
+Customers are grouped once by every segment dimension (RFM segment, cluster,
+churn risk, priority, purchase timing, CLV category, customer type and
+attribution channel). Each cell keeps only additive measures: the customer
+count and the sum and sum of squares of Monetary, CLV, Frequency, Recency and
+churn probability. Any slice, dice or roll-up is then a small groupby over
+the cells, and means and standard deviations are derived from the sums, so
+dashboards never group raw customer rows.
+
+Usage (from src/):
+    python segment_cube.py                          # build from rfm_with_predictions
+    python segment_cube.py RFM_Segment Cluster_Name # roll up the saved cube
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from schema import PROCESSED_DIR, load_artifact, save_artifact
+
+DIMENSIONS = ['RFM_Segment', 'Cluster_Name', 'Churn_Risk_Level', 'Customer_Priority',
+              'Purchase_Timing_Status', 'CLV_Category', 'Customer_Type', 'Attribution']
+
+# Measure name -> customer column
+MEASURES = {
+    'Monetary': 'Monetary',
+    'CLV': 'Predicted_CLV',
+    'Frequency': 'Frequency',
+    'Recency': 'Recency',
+    'Churn_Probability': 'Churn_Probability',
+}
+
+# Measure -> weight measure, kept as a sum of products for weighted means
+WEIGHTED_MEASURES = {'Churn_Probability': 'Monetary'}
+
+COUNT = 'Customers'
+MISSING = '(none)'
+
+
+def _weighted_name(measure, weight):
+    return f'{measure}_x_{weight}'
+
+
+class SegmentCube:
+    """Additive measures per combination of segment dimensions"""
+
+    def __init__(self, cells, dimensions, measures):
+        self.cells = cells
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+
+    @classmethod
+    def build(cls, customers, dimensions=DIMENSIONS, measures=MEASURES, weighted=WEIGHTED_MEASURES):
+        """
+        One grouped pass over the customer table.
+
+        Dimensions and measures missing from ``customers`` are left out, so
+        the same builder serves the segmentation stage (before predictions)
+        and the final customer table.
+        """
+        dimensions = [dim for dim in dimensions if dim in customers.columns]
+        measures = {name: col for name, col in measures.items() if col in customers.columns}
+
+        values = {}
+        for name, col in measures.items():
+            column = customers[col].to_numpy(dtype=np.float64)
+            values[f'{name}_sum'] = column
+            values[f'{name}_sumsq'] = column ** 2
+        for name, weight in weighted.items():
+            if name in measures and weight in measures:
+                values[_weighted_name(name, weight)] = (customers[measures[name]].to_numpy(dtype=np.float64)
+                                                        * customers[measures[weight]].to_numpy(dtype=np.float64))
+
+        keys = {dim: customers[dim].astype(object).fillna(MISSING).to_numpy() for dim in dimensions}
+        frame = pd.DataFrame({**keys, COUNT: 1, **values})
+        cells = frame.groupby(dimensions, sort=True).sum().reset_index() if dimensions else \
+            frame.sum().to_frame().T
+        cells[COUNT] = cells[COUNT].astype(np.int64)
+        return cls(cells, dimensions, measures)
+
+    @classmethod
+    def from_cells(cls, cells):
+        """Wrap a saved cell table, recovering its dimensions and measures from the columns"""
+        measures = [col[:-len('_sum')] for col in cells.columns if col.endswith('_sum')]
+        dimensions = [col for col in cells.columns if col != COUNT and not col.endswith(('_sum', '_sumsq'))
+                      and '_x_' not in col]
+        return cls(cells, dimensions, measures)
+
+    def slice(self, **filters):
+        """
+        Sub-cube for the given dimension values.
+
+        Each keyword is a dimension and a value or list of values, e.g.
+        ``cube.slice(RFM_Segment=['Champions', 'Loyal Customers'])``.
+        """
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dim, selected in filters.items():
+            if selected is None:
+                continue
+            if isinstance(selected, (str, int, float)):
+                selected = [selected]
+            mask &= self.cells[dim].isin(list(selected)).to_numpy()
+        return SegmentCube(self.cells[mask].reset_index(drop=True), self.dimensions, self.measures)
+
+    def rollup(self, by=None):
+        """Additive cells summed over every dimension not in ``by`` (a grand total when None)"""
+        by = [by] if isinstance(by, str) else list(by or [])
+        additive = [col for col in self.cells.columns if col not in self.dimensions]
+        if not by:
+            return self.cells[additive].sum().to_frame().T
+        return self.cells.groupby(by, sort=True, observed=True)[additive].sum().reset_index()
+
+    def summary(self, by=None):
+        """Roll-up with mean, standard deviation (ddof=1) and weighted means per measure"""
+        table = self.rollup(by)
+        count = table[COUNT].to_numpy(dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for measure in self.measures:
+                total = table[f'{measure}_sum'].to_numpy()
+                table[f'{measure}_mean'] = total / count
+                variance = (table[f'{measure}_sumsq'].to_numpy() - total ** 2 / count) / (count - 1)
+                table[f'{measure}_std'] = np.sqrt(np.clip(variance, 0, None))
+            for col in [col for col in table.columns if '_x_' in col]:
+                measure, weight = col.split('_x_')
+                table[f'{measure}_weighted_mean'] = table[col] / table[f'{weight}_sum']
+        return table
+
+    def members(self, dimension):
+        """Distinct values of a dimension present in the cube"""
+        return self.cells[dimension].unique().tolist()
+
+    def save(self, name='segment_cube', processed_dir=PROCESSED_DIR):
+        """Write the cells where the dashboards read them (processed_dir)"""
+        return save_artifact(self.cells, name, processed_dir=processed_dir)
+
+    @classmethod
+    def load(cls, name='segment_cube', processed_dir=PROCESSED_DIR):
+        return cls.from_cells(load_artifact(name, processed_dir=processed_dir))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        cube = SegmentCube.load()
+        print(cube.summary(sys.argv[1:]).to_string(index=False))
+    else:
+        cube = SegmentCube.build(load_artifact('rfm_with_predictions'))
+        cube.save()
+        print(f"✓ Saved segment_cube.csv: {len(cube.cells):,} cells over {len(cube.dimensions)} dimensions "
+              f"({cube.cells[COUNT].sum():,} customers)")
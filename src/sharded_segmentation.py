@@ -0,0 +1,136 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Sharded segmentation: RFM scores and K-Means within each channel
+
+The segmentation stage scores and clusters the whole population at once.
+Here customers are partitioned by a key (the Attribution channel by default)
+and each shard gets its own quintile breakpoints, RFM segments and K-Means
+clusters, fitted in a pool of worker processes from one in-memory customer
+table. Shards smaller than MIN_SHARD_SIZE are pooled into one 'Other' shard,
+since quintiles and clusters of a handful of customers mean little.
+
+Results are merged into one table in the input's row order, with
+shard-qualified labels ("Direct | Champions"). Shard clusters are numbered
+by mean Monetary, highest first, so Cluster_1 is the top-spending cluster in
+every shard.
+
+Usage (from src/):
+    python sharded_segmentation.py                  # shard rfm_clean by Attribution
+    python sharded_segmentation.py Customer_Type 4  # another key, 4 workers
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+
+from cluster_model import CLUSTERING_FEATURES
+from process_pool import pool_context
+from rfm_scoring import SCORED_COLUMNS, RFMBreakpoints
+from rfm_segments import RFMSegmenter
+
+SHARD_KEY = 'Attribution'
+MIN_SHARD_SIZE = 100
+OTHER_SHARD = 'Other'
+MISSING_SHARD = 'Unknown'
+LABEL_SEPARATOR = ' | '
+
+SHARD_COLUMNS = ['Shard', 'Shard_R_Score', 'Shard_F_Score', 'Shard_M_Score', 'Shard_RFM_Score',
+                 'Shard_RFM_Segment', 'Shard_Cluster', 'Shard_Cluster_Name']
+
+
+def shard_labels(keys, min_size=MIN_SHARD_SIZE):
+    """Shard name per customer: the key value, or 'Other' for keys with fewer than min_size customers"""
+    keys = pd.Series(keys).astype(object).fillna(MISSING_SHARD).astype(str)
+    counts = keys.value_counts()
+    small = counts.index[counts < min_size]
+    return keys.where(~keys.isin(small), OTHER_SHARD).to_numpy(dtype=object)
+
+
+def _segment_one(shard, customers, segmenter, n_clusters, features, random_state):
+    """Worker: score, segment and cluster one shard"""
+    from threadpoolctl import threadpool_limits
+
+    start = time.perf_counter()
+    scores = RFMBreakpoints.from_frame(customers).score(customers)
+    r, f, m = (scores[column].to_numpy() for column in SCORED_COLUMNS)
+    segments = np.array(segmenter.segments, dtype=object)[segmenter.codes(r, f, m)]
+
+    X = customers[features].fillna(0).to_numpy(dtype=np.float64)
+    scale = X.std(axis=0)
+    X = (X - X.mean(axis=0)) / np.where(scale > 0, scale, 1.0)
+    k = min(n_clusters, len(np.unique(X, axis=0)))
+    # One BLAS/OpenMP thread per worker so parallel fits don't oversubscribe
+    with threadpool_limits(limits=1):
+        labels = KMeans(n_clusters=k, random_state=random_state, n_init=10).fit_predict(X)
+
+    # Renumber clusters by mean Monetary, highest first
+    spend = np.bincount(labels, weights=customers['Monetary'].to_numpy(dtype=np.float64), minlength=k) \
+        / np.bincount(labels, minlength=k)
+    rank = np.empty(k, dtype=np.int8)
+    rank[np.argsort(-spend, kind='stable')] = np.arange(1, k + 1)
+    clusters = rank[labels]
+
+    prefix = f'{shard}{LABEL_SEPARATOR}'
+    result = pd.DataFrame({
+        'Shard': shard,
+        'Shard_R_Score': r,
+        'Shard_F_Score': f,
+        'Shard_M_Score': m,
+        'Shard_RFM_Score': (r + f + m).astype(np.int8),
+        'Shard_RFM_Segment': prefix + segments,
+        'Shard_Cluster': clusters,
+        'Shard_Cluster_Name': prefix + pd.Series(clusters).map(lambda c: f'Cluster_{c}').to_numpy(dtype=object),
+    }, index=customers.index)
+    return result, {'Shard': shard, 'Customers': len(customers), 'Clusters': k,
+                    'Seconds': round(time.perf_counter() - start, 2)}
+
+
+def segment_sharded(customers, key=SHARD_KEY, n_clusters=5, segmenter=None, features=CLUSTERING_FEATURES,
+                    min_shard_size=MIN_SHARD_SIZE, workers=None, random_state=42):
+    """
+    Segment every shard of ``customers`` in parallel.
+
+    Returns the merged table (Customer_ID plus SHARD_COLUMNS, in the order
+    of ``customers``) and one row per shard with its size, cluster count and
+    fit time.
+    """
+    segmenter = segmenter or RFMSegmenter.load()
+    columns = list(dict.fromkeys(['Customer_ID'] + list(SCORED_COLUMNS.values()) + list(features)))
+    shards = shard_labels(customers[key], min_shard_size)
+    positions = pd.Series(np.arange(len(customers))).groupby(shards, sort=False).indices
+    # Largest shards first so the pool is not left waiting on one big fit
+    order = sorted(positions, key=lambda shard: -len(positions[shard]))
+
+    workers = workers or min(len(order), os.cpu_count() or 1)
+    # Not forked: the segmentation stage has already fitted KMeans, so its
+    # OpenMP threads are running (see process_pool)
+    with pool_context().Pool(processes=workers) as pool:
+        jobs = [pool.apply_async(_segment_one, (shard, customers[columns].iloc[positions[shard]], segmenter,
+                                                n_clusters, list(features), random_state))
+                for shard in order]
+        results = [job.get() for job in jobs]
+
+    merged = pd.concat([frame for frame, _ in results]).reindex(customers.index)
+    merged.insert(0, 'Customer_ID', customers['Customer_ID'].to_numpy())
+    report = pd.DataFrame([info for _, info in results], columns=['Shard', 'Customers', 'Clusters', 'Seconds'])
+    return merged, report
+
+
+if __name__ == '__main__':
+    from schema import load_artifact, save_artifact
+
+    key = sys.argv[1] if len(sys.argv) > 1 else SHARD_KEY
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    customers = load_artifact('rfm_clean')
+
+    start = time.perf_counter()
+    sharded, report = segment_sharded(customers, key, workers=workers)
+    print(report.to_string(index=False))
+    print(f"\n✓ Segmented {len(sharded):,} customers in {len(report)} shards by {key} "
+          f"in {time.perf_counter() - start:.2f}s")
+    save_artifact(sharded, 'rfm_sharded_segments.csv')
+    print("✓ Saved rfm_sharded_segments.csv")
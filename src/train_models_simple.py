@@ -11,6 +11,7 @@ from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, roc_auc_score, r2_score, mean_absolute_error
 import pickle
 import warnings
+from analytics_store import query_table
 warnings.filterwarnings('ignore')
 
 print("="*80)
@@ -22,7 +23,7 @@ print("="*80)
 # ============================================================================
 print("\n[1/4] Loading data...")
 try:
-    rfm_data = pd.read_csv('../data/processed/rfm_with_predictions.csv')
+    rfm_data = query_table('rfm_with_predictions')
     print(f"SUCCESS: Loaded {len(rfm_data):,} customers")
 except FileNotFoundError:
     print("ERROR: rfm_with_predictions.csv not found")
@@ -0,0 +1,201 @@
+"""
+AFRIMASH CUSTOMER INTELLIGENCE CHALLENGE
+Date-partitioned transaction storage
+
+Transactions are stored as one directory per calendar month
+(transactions/Year=2024/Month=03/part-00000.feather, ...). A date-bounded read
+only opens the months that overlap the range, so a 90-day view touches three
+or four partitions instead of the whole history, and a new load appends part
+files to the affected months without rewriting anything else.
+
+The partitions remember the transactions_clean file (and its mtime/size)
+they were built from; when that artifact is replaced, load_transactions
+rebuilds them so partitioned and whole-table reads never disagree.
+
+Usage (from src/):
+    python transaction_partitions.py          # build from transactions_clean
+"""
+
+import json
+import os
+import re
+import shutil
+import sys
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from date_dimension import DATE_KEY, to_date_key
+from schema import PROCESSED_DIR, artifact_source, enforce_schema, load_artifact
+
+PARTITION_DIR = os.path.join(PROCESSED_DIR, 'transactions')
+PARTITION_PATTERN = re.compile(r'Year=(\d{4})[\\/]Month=(\d{2})$')
+# Which transactions_clean version the partitions were built from
+SOURCE_FILE = '_source.json'
+
+
+def _partition_dir(root, month_key):
+    return os.path.join(root, f'Year={month_key // 100}', f'Month={month_key % 100:02d}')
+
+
+def partitions(root=PARTITION_DIR):
+    """Month key (YYYYMM) -> partition directory, for every stored month"""
+    found = {}
+    if not os.path.isdir(root):
+        return found
+    for year in os.listdir(root):
+        if not os.path.isdir(os.path.join(root, year)):
+            continue
+        for month in os.listdir(os.path.join(root, year)):
+            path = os.path.join(root, year, month)
+            match = PARTITION_PATTERN.search(path)
+            if match:
+                found[int(match.group(1)) * 100 + int(match.group(2))] = path
+    return dict(sorted(found.items()))
+
+
+def write_partitions(transactions, root=PARTITION_DIR, overwrite=False):
+    """
+    Store transactions by month.
+
+    Each call adds one part file per month it touches; overwrite=True
+    drops the existing partitions first (full rebuild).
+    """
+    if overwrite and os.path.isdir(root):
+        shutil.rmtree(root)
+    transactions = enforce_schema(transactions.reset_index(drop=True))
+    month_keys = transactions[DATE_KEY].to_numpy() // 100
+
+    written = []
+    for month_key, rows in transactions.groupby(month_keys, sort=True):
+        directory = _partition_dir(root, int(month_key))
+        os.makedirs(directory, exist_ok=True)
+        part = len([name for name in os.listdir(directory) if name.endswith('.feather')])
+        path = os.path.join(directory, f'part-{part:05d}.feather')
+        feather.write_feather(rows.reset_index(drop=True), path + '.tmp', compression='uncompressed')
+        os.replace(path + '.tmp', path)
+        written.append(path)
+    return written
+
+
+def compact_partitions(root=PARTITION_DIR, months=None):
+    """Merge the part files of each month (or of the given months) into one"""
+    stored = partitions(root)
+    for month in (stored if months is None else months):
+        directory = stored[month]
+        parts = sorted(name for name in os.listdir(directory) if name.endswith('.feather'))
+        if len(parts) < 2:
+            continue
+        merged = enforce_schema(_read_month(directory, None))
+        path = os.path.join(directory, 'part-00000.feather')
+        feather.write_feather(merged, path + '.tmp', compression='uncompressed')
+        os.replace(path + '.tmp', path)
+        for name in parts[1:]:
+            os.remove(os.path.join(directory, name))
+
+
+def read_partitions(root=PARTITION_DIR, columns=None, date_range=None, last_days=None, exclude=None):
+    """
+    Read transactions, opening only the months that overlap the requested dates.
+
+    ``date_range`` is an inclusive (start, end) of dates or YYYYMMDD keys
+    (either side may be None); ``last_days`` selects the N days up to the
+    latest stored transaction. ``columns``/``exclude`` work as in load_artifact.
+    """
+    stored = partitions(root)
+    if not stored:
+        raise FileNotFoundError(f"No transaction partitions under {root}")
+
+    start, end = (to_date_key(value) for value in (date_range or (None, None)))
+    if last_days is not None:
+        newest = max(stored)
+        newest_keys = _read_month(stored[newest], [DATE_KEY])[DATE_KEY]
+        latest_date = pd.to_datetime(str(int(newest_keys.max())), format='%Y%m%d')
+        start = to_date_key(latest_date - pd.Timedelta(days=last_days - 1))
+
+    # Partition pruning: skip months entirely outside [start, end]
+    months = [month for month in stored
+              if (start is None or month >= start // 100) and (end is None or month <= end // 100)]
+
+    read_columns = None if columns is None else list(dict.fromkeys(list(columns) + [DATE_KEY]))
+    frames = [_read_month(stored[month], read_columns) for month in months]
+    if not frames:
+        frames = [_read_month(stored[max(stored)], read_columns).iloc[0:0]]
+
+    df = pd.concat(frames, ignore_index=True)
+    keep = pd.Series(True, index=df.index)
+    if start is not None:
+        keep &= df[DATE_KEY] >= start
+    if end is not None:
+        keep &= df[DATE_KEY] <= end
+    df = df[keep.to_numpy()].reset_index(drop=True)
+    df = df[[col for col in df.columns if (columns is None or col in columns)
+             and (exclude is None or col not in exclude)]]
+    return enforce_schema(df)
+
+
+def _read_month(directory, columns):
+    frames = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.feather'):
+            continue
+        table = feather.read_table(os.path.join(directory, name), memory_map=True)
+        selected = table.column_names if columns is None else \
+            [col for col in columns if col in table.column_names]
+        frames.append(table.select(selected).to_pandas())
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def _source_version(processed_dir):
+    """File name, mtime and size of the current transactions_clean (None if missing)"""
+    path = artifact_source('transactions_clean', processed_dir)
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return {'source': os.path.basename(path), 'mtime': stat.st_mtime, 'size': stat.st_size}
+
+
+def record_source(root=PARTITION_DIR, processed_dir=PROCESSED_DIR):
+    """Mark the partitions as holding the current transactions_clean"""
+    with open(os.path.join(root, SOURCE_FILE), 'w') as f:
+        json.dump(_source_version(processed_dir), f, indent=2)
+
+
+def partitions_current(root=PARTITION_DIR, processed_dir=PROCESSED_DIR):
+    """True if partitions exist and were built from the current transactions_clean"""
+    if not partitions(root):
+        return False
+    current = _source_version(processed_dir)
+    if current is None:
+        # Nothing to rebuild from; serve what is stored
+        return True
+    try:
+        with open(os.path.join(root, SOURCE_FILE)) as f:
+            return json.load(f) == current
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+
+def ensure_partitions(root=PARTITION_DIR, processed_dir=PROCESSED_DIR):
+    """(Re)build the partitions from transactions_clean unless they are current; True if rebuilt"""
+    if partitions_current(root, processed_dir):
+        return False
+    write_partitions(load_artifact('transactions_clean', processed_dir=processed_dir), root, overwrite=True)
+    record_source(root, processed_dir)
+    return True
+
+
+def load_transactions(columns=None, date_range=None, last_days=None, exclude=None,
+                      root=PARTITION_DIR, processed_dir=PROCESSED_DIR):
+    """Partition-pruned transaction read; partitions are (re)built when transactions_clean changed"""
+    ensure_partitions(root, processed_dir)
+    return read_partitions(root, columns, date_range, last_days, exclude)
+
+
+if __name__ == '__main__':
+    directory = sys.argv[1] if len(sys.argv) > 1 else PROCESSED_DIR
+    root = os.path.join(directory, 'transactions')
+    written = write_partitions(load_artifact('transactions_clean', processed_dir=directory), root,
+                               overwrite=True)
+    record_source(root, directory)
+    print(f"✓ Wrote {len(written)} monthly partitions under {root}")